@@ -0,0 +1,65 @@
+"""Benchmark du démarrage à froid de `de-pipeline` (une tâche courte = un processus neuf)."""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+COMMANDS = {
+    "help": ["--help"],
+    "preview": ["preview"],
+    "run-help": ["run", "--help"],
+}
+
+
+def time_command(args: list[str], repeat: int) -> list[float]:
+    """Durées (s) de `python -m de_pipeline.cli <args>`, chacune dans un processus neuf."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "de_pipeline.cli", *args],
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def time_command_python(repeat: int) -> list[float]:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--max-ms", type=float, default=None, help="échec si une médiane dépasse ce budget"
+    )
+    args = parser.parse_args()
+
+    baseline = statistics.median(time_command_python(args.repeat))
+    print(f"{'python -c pass':<16} {baseline * 1000:8.1f} ms (interpréteur seul)")
+    over_budget = False
+    for name, cmd in COMMANDS.items():
+        median = statistics.median(time_command(cmd, args.repeat))
+        print(f"{name:<16} {median * 1000:8.1f} ms")
+        if args.max_ms is not None and median * 1000 > args.max_ms:
+            over_budget = True
+    if over_budget:
+        print(f"❌ démarrage au-delà du budget de {args.max_ms:.0f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""Benchmarks de la pipeline sur données synthétiques, comparés à une baseline (régressions)."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+from datetime import UTC, datetime
+from pathlib import Path
+
+from de_pipeline.bench.suite import BENCHMARKS, BenchConfig, compare, run_suite, summary_lines
+
+DEFAULT_BASELINE = Path("benchmarks/baseline.json")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000, help="lignes par mois")
+    parser.add_argument("--months", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="runs par benchmark (médiane)")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), default=None)
+    parser.add_argument("--config-dir", default="config")
+    parser.add_argument("--workdir", default=None, help="dossier de travail (défaut: temporaire)")
+    parser.add_argument("--output", default=None, help="rapport JSON (défaut: data/bench/)")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument(
+        "--threshold", type=float, default=0.25, help="régression relative tolérée (0.25 = 25%%)"
+    )
+    parser.add_argument(
+        "--update-baseline", action="store_true", help="écrire ce run comme nouvelle baseline"
+    )
+    args = parser.parse_args()
+
+    config = BenchConfig(
+        rows_per_month=args.rows,
+        months=args.months,
+        seed=args.seed,
+        repeat=args.repeat,
+        config_dir=Path(args.config_dir),
+    )
+    with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+        report = run_suite(Path(workdir), config, only=args.only)
+
+    output = Path(
+        args.output or f"data/bench/bench_{datetime.now(UTC).strftime('%Y%m%dT%H%M%SZ')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    baseline_path = Path(args.baseline)
+    baseline = None
+    if baseline_path.exists() and not args.update_baseline:
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    for line in summary_lines(report, baseline):
+        print(line)
+    print(f"📄 Rapport: {output}")
+
+    if args.update_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"📌 Baseline mise à jour: {baseline_path}")
+        return 0
+    if baseline is None:
+        print("ℹ️  Pas de baseline : rien à comparer (--update-baseline pour en créer une)")
+        return 0
+
+    regressions = compare(report, baseline, threshold=args.threshold)
+    for r in regressions:
+        print(
+            f"❌ {r['benchmark']}.{r['metric']}: {r['current']:,.2f} "
+            f"vs {r['baseline']:,.2f} ({r['change']:+.1%})"
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
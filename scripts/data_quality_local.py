@@ -0,0 +1,11 @@
+"""Data Quality checks locaux sur les fichiers Parquet téléchargés, avant chargement."""
+
+from __future__ import annotations
+
+import sys
+
+from de_pipeline.cli import main
+
+if __name__ == "__main__":
+    # Équivaut à `de-pipeline dq --local` (code retour 1 si un check échoue)
+    sys.exit(main(["dq", "--local"]))
@@ -1,52 +1,46 @@
 """Charger données Parquet depuis GCS vers BigQuery."""
 from __future__ import annotations
 
-import os
-
-from google.cloud import bigquery
+import sys
+from typing import TYPE_CHECKING
 
+from de_pipeline.cli import main
 from de_pipeline.common.logging import get_logger
+from de_pipeline.common.profiling import profiled
+from de_pipeline.common.schemas import GREEN_TRIPDATA_COLUMNS, TAXI_ZONE_COLUMNS
+from de_pipeline.load.loader import (
+    MonthLoad,
+    bigquery_schema,
+    ensure_month_partitioned_table,
+    load_csv,
+    load_month,
+)
+
+if TYPE_CHECKING:
+    from google.cloud import bigquery
 
 logger = get_logger(__name__)
 
 
-def create_dataset_if_not_exists(
-    client: bigquery.Client,
-    project_id: str,
-    dataset_id: str,
-) -> None:
-    """Créer un dataset s'il n'existe pas."""
-    dataset_ref = f"{project_id}.{dataset_id}"
-    try:
-        client.get_dataset(dataset_ref)
-        logger.info(f"✅ Dataset {dataset_id} existe déjà")
-    except Exception:
-        dataset = bigquery.Dataset(dataset_ref)
-        dataset.location = "EU"
-        client.create_dataset(dataset)
-        logger.info(f"✅ Dataset {dataset_id} créé")
-
-
+@profiled()
 def load_parquet_to_bq(
     gcs_path: str,
     project_id: str,
     dataset_id: str,
     table_id: str,
-) -> None:
-    """Charger un fichier Parquet de GCS vers BigQuery."""
-    client = bigquery.Client(project=project_id)
-
-    job_config = bigquery.LoadJobConfig(
-        autodetect=True,
-        source_format=bigquery.SourceFormat.PARQUET,
-        write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
-    )
-
+    year: int,
+    month: int,
+    client: bigquery.Client | None = None,
+) -> dict:
+    """Charger le Parquet d'un mois de GCS vers sa partition BigQuery (remplacée, schéma fixé)."""
+    if client is None:
+        from google.cloud import bigquery
+
+        client = bigquery.Client(project=project_id)
     table_ref = f"{project_id}.{dataset_id}.{table_id}"
-    load_job = client.load_table_from_uri(gcs_path, table_ref, job_config=job_config)
-    load_job.result()
-
-    logger.info(f"✅ Loaded {gcs_path} -> {table_ref}")
+    schema = bigquery_schema(GREEN_TRIPDATA_COLUMNS)
+    ensure_month_partitioned_table(client, table_ref, schema)
+    return load_month(client, table_ref, MonthLoad(year=year, month=month, uri=gcs_path), schema)
 
 
 def load_csv_to_bq(
@@ -54,46 +48,20 @@ def load_csv_to_bq(
     project_id: str,
     dataset_id: str,
     table_id: str,
+    client: bigquery.Client | None = None,
 ) -> None:
-    """Charger un fichier CSV de GCS vers BigQuery."""
-    client = bigquery.Client(project=project_id)
-
-    job_config = bigquery.LoadJobConfig(
-        autodetect=True,
-        source_format=bigquery.SourceFormat.CSV,
-        write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,  # Remplacer zones
+    """Charger un fichier CSV de GCS vers BigQuery (table remplacée, schéma fixé)."""
+    if client is None:
+        from google.cloud import bigquery
+
+        client = bigquery.Client(project=project_id)
+    load_csv(
+        client,
+        gcs_path,
+        f"{project_id}.{dataset_id}.{table_id}",
+        bigquery_schema(TAXI_ZONE_COLUMNS),
     )
 
-    table_ref = f"{project_id}.{dataset_id}.{table_id}"
-    load_job = client.load_table_from_uri(gcs_path, table_ref, job_config=job_config)
-    load_job.result()
-
-    logger.info(f"✅ Loaded {gcs_path} -> {table_ref}")
-
 
 if __name__ == "__main__":
-    project_id = os.getenv("GCP_PROJECT_ID")
-    dataset_raw = os.getenv("BQ_DATASET_RAW")
-    bucket_name = os.getenv("GCS_RAW_BUCKET")
-
-    client = bigquery.Client(project=project_id)
-    create_dataset_if_not_exists(client, project_id, dataset_raw)
-
-    # Charger les données
-    logger.info("Loading Parquet files to BigQuery...")
-    load_parquet_to_bq(
-        f"gs://{bucket_name}/raw/green_taxi/ingestion_date=*/green_tripdata_*.parquet",
-        project_id,
-        dataset_raw,
-        "green_tripdata_raw",
-    )
-
-    logger.info("Loading CSV (zones) to BigQuery...")
-    load_csv_to_bq(
-        f"gs://{bucket_name}/raw/green_taxi/ingestion_date=*/taxi_zone_lookup.csv",
-        project_id,
-        dataset_raw,
-        "taxi_zone_lookup",
-    )
-
-    logger.info("✅ All data loaded to BigQuery!")
+    sys.exit(main(["load"]))
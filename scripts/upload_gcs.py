@@ -1,48 +1,49 @@
 """Upload données locales vers Google Cloud Storage (GCS)."""
 from __future__ import annotations
 
-import os
+import sys
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from google.cloud import storage
-
+from de_pipeline.cli import main
 from de_pipeline.common.logging import get_logger
+from de_pipeline.common.profiling import profiled
+from de_pipeline.storage.uploader import iter_upload_jobs, upload_files
+
+if TYPE_CHECKING:
+    from google.cloud import storage
 
 logger = get_logger(__name__)
 
 
+@profiled()
 def upload_to_gcs(
     local_path: Path,
     bucket_name: str,
     gcs_prefix: str,
-) -> None:
-    """Upload un fichier ou dossier vers GCS."""
-    client = storage.Client()
+    client: storage.Client | None = None,
+    partition: str | None = None,
+    max_workers: int = 8,
+    chunk_threshold: int = 128 * 1024 * 1024,
+    part_size: int = 32 * 1024 * 1024,
+) -> dict:
+    """Upload un fichier ou dossier vers GCS, en parallèle (optionnellement une seule partition)."""
+    if client is None:
+        from google.cloud import storage
+
+        client = storage.Client()
     bucket = client.bucket(bucket_name)
 
-    if local_path.is_file():
-        # Upload un seul fichier
-        blob_path = f"{gcs_prefix}/{local_path.name}"
-        blob = bucket.blob(blob_path)
-        blob.upload_from_filename(str(local_path))
-        logger.info(f"✅ Uploaded: {local_path.name} -> gs://{bucket_name}/{blob_path}")
-
-    elif local_path.is_dir():
-        # Upload dossier récursivement
-        for file in local_path.rglob("*"):
-            if file.is_file():
-                relative_path = file.relative_to(local_path.parent)
-                blob_path = f"{gcs_prefix}/{relative_path}".replace("\\", "/")
-                blob = bucket.blob(blob_path)
-                blob.upload_from_filename(str(file))
-                logger.info(f"✅ Uploaded: {file.name} -> gs://{bucket_name}/{blob_path}")
+    jobs = iter_upload_jobs(local_path, gcs_prefix, partition=partition)
+    logger.info(f"📦 {len(jobs)} fichier(s) à uploader vers gs://{bucket_name}/{gcs_prefix}")
+    return upload_files(
+        bucket,
+        jobs,
+        max_workers=max_workers,
+        chunk_threshold=chunk_threshold,
+        part_size=part_size,
+    )
 
 
 if __name__ == "__main__":
-    project_id = os.getenv("GCP_PROJECT_ID")
-    bucket_name = os.getenv("GCS_RAW_BUCKET")
-    local_raw = Path("data/raw/raw/green_taxi")
-
-    logger.info(f"Starting upload to gs://{bucket_name}")
-    upload_to_gcs(local_raw, bucket_name, "raw/green_taxi")
-    logger.info("Upload completed!")
+    sys.exit(main(["upload"]))
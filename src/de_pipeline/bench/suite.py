@@ -0,0 +1,356 @@
+"""
+Benchmark suite: synthetic TLC files served over local HTTP, then download, upload,
+local DQ, transforms and the end-to-end DAG, each timed `repeat` times (median kept).
+"""
+
+from __future__ import annotations
+
+import os
+import platform
+import shutil
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import UTC, date, datetime
+from pathlib import Path
+
+from de_pipeline.common.logging import get_logger
+from de_pipeline.ingestion.source import month_start_n_months_back
+
+logger = get_logger(__name__)
+
+# Metric compared against the baseline, and whether higher is better.
+TRACKED: dict[str, tuple[str, bool]] = {
+    "download": ("throughput_mb_s", True),
+    "upload": ("throughput_mb_s", True),
+    "dq_local": ("rows_per_s", True),
+    "transform": ("rows_per_s", True),
+    "e2e": ("wall_sec", False),
+}
+
+
+@dataclass(frozen=True)
+class BenchConfig:
+    rows_per_month: int = 200_000
+    months: int = 2
+    seed: int = 0
+    row_group_size: int = 1_000_000
+    repeat: int = 3
+    config_dir: Path = Path("config")
+
+    def params(self) -> dict:
+        """What must match for two reports to be comparable."""
+        return {
+            "rows_per_month": self.rows_per_month,
+            "months": self.months,
+            "seed": self.seed,
+            "row_group_size": self.row_group_size,
+        }
+
+
+@dataclass
+class BenchEnv:
+    """Generated sources shared by every benchmark of a suite run."""
+
+    config: BenchConfig
+    cdn_dir: Path
+    base_url: str
+    months: list[tuple[int, int]]
+    trip_files: list[Path] = field(default_factory=list)
+    rows: int = 0
+    bytes: int = 0
+
+
+def prepare_sources(cdn_dir: Path, config: BenchConfig) -> BenchEnv:
+    """Write the months the pipeline would fetch today, in the CDN layout of config/dataset.yml."""
+    from de_pipeline.bench.synthetic import write_green_month, write_zone_lookup
+
+    months = month_start_n_months_back(date.today(), config.months)
+    env = BenchEnv(config=config, cdn_dir=cdn_dir, base_url="", months=months)
+    for y, m in months:
+        path = write_green_month(
+            cdn_dir / "trip-data" / f"green_tripdata_{y:04d}-{m:02d}.parquet",
+            y,
+            m,
+            config.rows_per_month,
+            seed=config.seed,
+            row_group_size=config.row_group_size,
+        )
+        env.trip_files.append(path)
+        env.bytes += path.stat().st_size
+    env.rows = config.rows_per_month * len(months)
+    write_zone_lookup(cdn_dir / "misc" / "taxi_zone_lookup.csv")
+    return env
+
+
+def _context(env: BenchEnv, workdir: Path):
+    """Local-backend context over `workdir`, sourcing from the bench HTTP server."""
+    from de_pipeline.orchestration.context import PipelineContext
+
+    ctx = PipelineContext.from_config(env.config.config_dir, backend="local")
+    ctx.dataset_cfg["dataset"]["source"]["base_url"] = env.base_url
+    ctx.dataset_cfg["dataset"]["default_range"]["months_back"] = env.config.months
+    ctx.runtime["local_raw_dir"] = str(workdir / "raw")
+    ctx.runtime["local"] = {
+        "bucket_dir": str(workdir / "bucket"),
+        "warehouse_dir": str(workdir / "warehouse"),
+    }
+    ctx.runtime["metrics"] = {"output_dir": str(workdir / "runs")}
+    ctx.runtime["cache"] = {**ctx.section("cache"), "dir": str(workdir / "raw" / "_blobs")}
+    ctx.runtime["repartition"] = {**ctx.section("repartition"), "dir": str(workdir / "partitioned")}
+    ctx.section("download")["mode"] = "local"
+    return ctx
+
+
+def bench_download(env: BenchEnv, workdir: Path) -> dict:
+    from de_pipeline.ingestion.batch import DownloadJob, download_many
+
+    ctx = _context(env, workdir)
+    download_cfg = ctx.section("download")
+    jobs = [
+        DownloadJob(
+            url=f"{env.base_url}/trip-data/{p.name}", dest_path=workdir / p.name, label=p.name
+        )
+        for p in env.trip_files
+    ]
+    summary = download_many(
+        jobs,
+        max_workers=int(download_cfg.get("max_workers", 1)),
+        timeout_sec=int(ctx.runtime["request_timeout_sec"]),
+        chunk_size=int(ctx.runtime["chunk_size_bytes"]),
+        split_parts=int(download_cfg.get("split_parts", 1)),
+        split_min_bytes=int(download_cfg.get("split_min_bytes", 0)),
+    )
+    if summary["failed"]:
+        raise RuntimeError(f"download failed: {summary['failed']}")
+    return {"bytes": summary["bytes"], "throughput_mb_s": summary["throughput_mb_s"]}
+
+
+class _DirBlob:
+    def __init__(self, bucket: _DirBucket, name: str) -> None:
+        self.name = name
+        self.path = bucket.root / name
+
+    def upload_from_filename(self, filename: str) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(filename, self.path)
+
+    def upload_from_file(self, file_obj, size: int | None = None) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_bytes(file_obj.read(size))
+
+    def compose(self, sources: list[_DirBlob]) -> None:
+        with open(self.path, "wb") as out:
+            for source in sources:
+                with open(source.path, "rb") as f:
+                    shutil.copyfileobj(f, out, 1024 * 1024)
+
+    def delete(self) -> None:
+        self.path.unlink()
+
+
+class _DirBucket:
+    """Bucket writing real bytes to disk, so upload_files' chunk/compose path is timed."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.name = root.name
+
+    def blob(self, name: str) -> _DirBlob:
+        return _DirBlob(self, name)
+
+
+def bench_upload(env: BenchEnv, workdir: Path) -> dict:
+    from de_pipeline.storage.uploader import UploadJob, upload_files
+
+    upload_cfg = _context(env, workdir).section("upload")
+    jobs = [UploadJob(path=p, blob_name=f"raw/green_taxi/{p.name}") for p in env.trip_files]
+    summary = upload_files(
+        _DirBucket(workdir / "bucket"),
+        jobs,
+        max_workers=int(upload_cfg.get("max_workers", 8)),
+        chunk_threshold=int(upload_cfg.get("chunk_threshold_bytes", 128 * 1024 * 1024)),
+        part_size=int(upload_cfg.get("part_size_bytes", 32 * 1024 * 1024)),
+    )
+    if summary["failed"]:
+        raise RuntimeError(f"upload failed: {summary['failed']}")
+    return {"bytes": summary["bytes"], "throughput_mb_s": summary["throughput_mb_s"]}
+
+
+def bench_dq_local(env: BenchEnv, workdir: Path) -> dict:
+    from de_pipeline.dq.engine import evaluate_files
+    from de_pipeline.dq.rules import load_rules
+
+    ctx = _context(env, workdir)
+    local_cfg = ctx.dq_cfg.get("local", {})
+    start = time.perf_counter()
+    reports = evaluate_files(
+        env.trip_files,
+        load_rules(ctx.dq_cfg["tables"]["green_tripdata_raw"]["rules"]),
+        batch_size=int(local_cfg.get("batch_size", 65_536)),
+        max_workers=int(local_cfg.get("max_workers", 1)),
+    )
+    elapsed = time.perf_counter() - start
+    rows = sum(r["rows"] for r in reports)
+    return {"rows": rows, "rows_per_s": rows / elapsed if elapsed > 0 else 0.0}
+
+
+def bench_transform(env: BenchEnv, workdir: Path) -> dict:
+    """Raw month loads, full fact rebuild and dim_location on the local warehouse."""
+    from de_pipeline.common.schemas import GREEN_TRIPDATA_COLUMNS, TAXI_ZONE_COLUMNS
+    from de_pipeline.load.loader import MonthLoad, load_months
+    from de_pipeline.transform.dimensions import create_dim_location
+    from de_pipeline.transform.fact import create_fact_green_tripdata
+    from de_pipeline.warehouse.local import LocalWarehouse
+
+    warehouse = LocalWarehouse(workdir / "warehouse")
+    try:
+        for dataset in ("raw", "curated"):
+            warehouse.ensure_dataset(dataset)
+        table_ref = "local.raw.green_tripdata_raw"
+        warehouse.ensure_month_partitioned_table(table_ref, GREEN_TRIPDATA_COLUMNS)
+        loads = [
+            MonthLoad(y, m, str(p)) for (y, m), p in zip(env.months, env.trip_files, strict=True)
+        ]
+        start = time.perf_counter()
+        load_months(warehouse, table_ref, loads, GREEN_TRIPDATA_COLUMNS)
+        warehouse.load_csv(
+            str(env.cdn_dir / "misc" / "taxi_zone_lookup.csv"),
+            "local.raw.taxi_zone_lookup",
+            TAXI_ZONE_COLUMNS,
+        )
+        load_sec = time.perf_counter() - start
+        start = time.perf_counter()
+        create_fact_green_tripdata(warehouse, "local", "raw", "curated")
+        create_dim_location(warehouse, "local", "raw", "curated")
+        transform_sec = time.perf_counter() - start
+    finally:
+        warehouse.close()
+    return {
+        "load_sec": load_sec,
+        "transform_sec": transform_sec,
+        "rows_per_s": env.rows / transform_sec if transform_sec > 0 else 0.0,
+    }
+
+
+def bench_e2e(env: BenchEnv, workdir: Path) -> dict:
+    """The whole DAG (download -> bucket -> warehouse -> transforms -> DQ) on the local backend."""
+    from de_pipeline.orchestration.dag import run_dag
+    from de_pipeline.orchestration.pipeline import build_stages
+
+    ctx = _context(env, workdir)
+    try:
+        summary = run_dag(
+            build_stages(ctx),
+            ctx,
+            max_workers=int(ctx.section("pipeline").get("max_workers", 4)),
+            metrics=ctx.metrics,
+        )
+    finally:
+        ctx.warehouse().close()
+    if summary["failed"] or summary["blocked"]:
+        raise RuntimeError(f"pipeline failed: {summary['failed']}, blocked: {summary['blocked']}")
+    return {"stages": len(summary["done"])}
+
+
+BENCHMARKS: dict[str, Callable[[BenchEnv, Path], dict]] = {
+    "download": bench_download,
+    "upload": bench_upload,
+    "dq_local": bench_dq_local,
+    "transform": bench_transform,
+    "e2e": bench_e2e,
+}
+
+
+def _timed(func: Callable[[BenchEnv, Path], dict], env: BenchEnv, workdir: Path) -> dict:
+    workdir.mkdir(parents=True)
+    start = time.perf_counter()
+    try:
+        metrics = func(env, workdir)
+    finally:
+        wall_sec = time.perf_counter() - start
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {"wall_sec": wall_sec, **metrics}
+
+
+def run_suite(workdir: Path, config: BenchConfig, only: list[str] | None = None) -> dict:
+    """Generate sources under `workdir`, serve them and run the benchmarks; returns the report."""
+    from de_pipeline.bench.server import serve_directory
+
+    names = only or list(BENCHMARKS)
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        raise ValueError(f"Unknown benchmark(s): {sorted(unknown)}")
+
+    start = time.perf_counter()
+    env = prepare_sources(workdir / "cdn", config)
+    logger.info(
+        f"🧪 Sources synthétiques: {env.rows} lignes, {env.bytes / 1e6:.1f} MB "
+        f"en {time.perf_counter() - start:.1f}s"
+    )
+    results: dict[str, dict] = {}
+    with serve_directory(env.cdn_dir) as base_url:
+        env.base_url = base_url
+        for name in names:
+            runs = [
+                _timed(BENCHMARKS[name], env, workdir / "runs" / f"{name}-{i}")
+                for i in range(config.repeat)
+            ]
+            # Le run médian (en durée) représente le benchmark.
+            runs.sort(key=lambda r: r["wall_sec"])
+            results[name] = {**runs[len(runs) // 2], "runs_wall_sec": [r["wall_sec"] for r in runs]}
+            logger.info(f"⏱️  {name}: {results[name]['wall_sec']:.2f}s")
+
+    return {
+        "created_at": datetime.now(UTC).isoformat(),
+        "params": config.params(),
+        "environment": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "dataset": {"rows": env.rows, "bytes": env.bytes},
+        "results": results,
+    }
+
+
+def compare(report: dict, baseline: dict, threshold: float = 0.25) -> list[dict]:
+    """
+    Tracked metrics worse than the baseline by more than `threshold` (relative).
+    Reports made with different params are not comparable and raise ValueError.
+    """
+    if report["params"] != baseline["params"]:
+        raise ValueError(
+            f"Baseline params {baseline['params']} differ from this run {report['params']}"
+        )
+    regressions = []
+    for name, (metric, higher_is_better) in TRACKED.items():
+        current = report["results"].get(name, {}).get(metric)
+        reference = baseline["results"].get(name, {}).get(metric)
+        if current is None or not reference:
+            continue
+        change = (current - reference) / reference
+        if (-change if higher_is_better else change) > threshold:
+            regressions.append(
+                {
+                    "benchmark": name,
+                    "metric": metric,
+                    "baseline": reference,
+                    "current": current,
+                    "change": change,
+                }
+            )
+    return regressions
+
+
+def summary_lines(report: dict, baseline: dict | None = None) -> list[str]:
+    lines = []
+    for name, result in report["results"].items():
+        metric, _ = TRACKED.get(name, ("wall_sec", False))
+        line = f"{name:<10} {result['wall_sec']:8.2f}s  {metric}={result[metric]:,.2f}"
+        reference = (baseline or {}).get("results", {}).get(name, {}).get(metric)
+        if reference:
+            line += f"  ({(result[metric] - reference) / reference:+.1%} vs baseline)"
+        lines.append(line)
+    return lines
@@ -0,0 +1,172 @@
+"""Synthetic green-taxi files with the real TLC column set and plausible distributions."""
+
+from __future__ import annotations
+
+import calendar
+import csv
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+N_ZONES = 265
+BOROUGHS = ["Bronx", "Brooklyn", "Manhattan", "Queens", "Staten Island", "EWR"]
+
+# Physical types of the published files (BigQuery types in common.schemas).
+GREEN_ARROW_SCHEMA = pa.schema(
+    [
+        ("VendorID", pa.int32()),
+        ("lpep_pickup_datetime", pa.timestamp("us")),
+        ("lpep_dropoff_datetime", pa.timestamp("us")),
+        ("store_and_fwd_flag", pa.string()),
+        ("RatecodeID", pa.float64()),
+        ("PULocationID", pa.int32()),
+        ("DOLocationID", pa.int32()),
+        ("passenger_count", pa.float64()),
+        ("trip_distance", pa.float64()),
+        ("fare_amount", pa.float64()),
+        ("extra", pa.float64()),
+        ("mta_tax", pa.float64()),
+        ("tip_amount", pa.float64()),
+        ("tolls_amount", pa.float64()),
+        ("ehail_fee", pa.float64()),
+        ("improvement_surcharge", pa.float64()),
+        ("total_amount", pa.float64()),
+        ("payment_type", pa.float64()),
+        ("trip_type", pa.float64()),
+        ("congestion_surcharge", pa.float64()),
+        ("cbd_congestion_fee", pa.float64()),
+    ]
+)
+
+
+def _zone_weights(rng: np.random.Generator) -> np.ndarray:
+    # A few zones carry most of the trips (Zipf-like), in a random order of zone ids.
+    weights = 1.0 / np.arange(1, N_ZONES + 1) ** 1.1
+    rng.shuffle(weights)
+    return weights / weights.sum()
+
+
+def _choice(rng: np.random.Generator, values, probs, size: int) -> np.ndarray:
+    return rng.choice(np.asarray(values), size=size, p=probs)
+
+
+def _with_nulls(values: np.ndarray, null_mask: np.ndarray, arrow_type: pa.DataType) -> pa.Array:
+    return pa.array(values, type=arrow_type, mask=null_mask)
+
+
+def green_batch(
+    rng: np.random.Generator, year: int, month: int, rows: int, zone_weights: np.ndarray
+) -> pa.RecordBatch:
+    """`rows` trips picked up during `year`-`month`."""
+    start = np.datetime64(datetime(year, month, 1), "us")
+    month_us = calendar.monthrange(year, month)[1] * 86_400 * 1_000_000
+    pickup = start + np.sort(rng.integers(0, month_us, rows)).astype("timedelta64[us]")
+    minutes = np.clip(rng.lognormal(np.log(12.0), 0.6, rows), 1.0, 180.0)
+    dropoff = pickup + (minutes * 60e6).astype("timedelta64[us]")
+
+    # Store-and-forward / street-hail metadata is missing together on ~3% of rows.
+    missing = rng.random(rows) < 0.03
+    distance = np.round(rng.lognormal(np.log(2.0), 0.8, rows), 2)
+    distance[rng.random(rows) < 0.01] = 0.0
+    fare = np.round(3.0 + 2.5 * distance + 0.5 * minutes + rng.normal(0, 1.5, rows), 2)
+    fare[rng.random(rows) < 0.005] *= -1  # remboursements
+    payment = _choice(rng, [1.0, 2.0, 3.0, 4.0], [0.6, 0.37, 0.02, 0.01], rows)
+    tip = np.where(payment == 1.0, np.round(fare * rng.uniform(0.0, 0.3, rows), 2), 0.0)
+    extra = _choice(rng, [0.0, 1.0, 2.5], [0.5, 0.3, 0.2], rows)
+    mta_tax = np.where(rng.random(rows) < 0.97, 0.5, 0.0)
+    tolls = np.where(rng.random(rows) < 0.03, 6.94, 0.0)
+    improvement = np.full(rows, 1.0)
+    congestion = np.where(rng.random(rows) < 0.2, 2.75, 0.0)
+    cbd = np.where(rng.random(rows) < 0.1, 0.75, 0.0)
+    total = np.round(fare + extra + mta_tax + tip + tolls + improvement + congestion, 2)
+
+    columns = {
+        "VendorID": pa.array(_choice(rng, [1, 2], [0.15, 0.85], rows), pa.int32()),
+        "lpep_pickup_datetime": pa.array(pickup, pa.timestamp("us")),
+        "lpep_dropoff_datetime": pa.array(dropoff, pa.timestamp("us")),
+        "store_and_fwd_flag": _with_nulls(
+            _choice(rng, ["N", "Y"], [0.996, 0.004], rows), missing, pa.string()
+        ),
+        "RatecodeID": _with_nulls(
+            _choice(rng, [1.0, 2.0, 3.0, 4.0, 5.0], [0.93, 0.01, 0.005, 0.005, 0.05], rows),
+            missing,
+            pa.float64(),
+        ),
+        "PULocationID": pa.array(rng.choice(N_ZONES, rows, p=zone_weights) + 1, pa.int32()),
+        "DOLocationID": pa.array(rng.choice(N_ZONES, rows, p=zone_weights) + 1, pa.int32()),
+        "passenger_count": _with_nulls(
+            _choice(
+                rng,
+                [0.0, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+                [0.01, 0.84, 0.08, 0.02, 0.01, 0.02, 0.02],
+                rows,
+            ),
+            missing,
+            pa.float64(),
+        ),
+        "trip_distance": pa.array(distance, pa.float64()),
+        "fare_amount": pa.array(fare, pa.float64()),
+        "extra": pa.array(extra, pa.float64()),
+        "mta_tax": pa.array(mta_tax, pa.float64()),
+        "tip_amount": pa.array(tip, pa.float64()),
+        "tolls_amount": pa.array(tolls, pa.float64()),
+        "ehail_fee": pa.nulls(rows, pa.float64()),
+        "improvement_surcharge": pa.array(improvement, pa.float64()),
+        "total_amount": pa.array(total, pa.float64()),
+        "payment_type": _with_nulls(payment, missing, pa.float64()),
+        "trip_type": _with_nulls(
+            _choice(rng, [1.0, 2.0], [0.97, 0.03], rows), missing, pa.float64()
+        ),
+        "congestion_surcharge": _with_nulls(congestion, missing, pa.float64()),
+        # Colonne apparue en 2025 : absente des fichiers plus anciens.
+        "cbd_congestion_fee": pa.array(cbd, pa.float64()),
+    }
+    schema = GREEN_ARROW_SCHEMA
+    if year < 2025:
+        del columns["cbd_congestion_fee"]
+        schema = schema.remove(schema.get_field_index("cbd_congestion_fee"))
+    return pa.RecordBatch.from_arrays(list(columns.values()), schema=schema)
+
+
+def write_green_month(
+    path: Path,
+    year: int,
+    month: int,
+    rows: int,
+    seed: int = 0,
+    row_group_size: int = 1_000_000,
+) -> Path:
+    """
+    Write one monthly file of `rows` trips, one row group at a time (memory bounded by
+    `row_group_size`, so tens of millions of rows are fine). Same seed, same bytes.
+    """
+    rng = np.random.default_rng([seed, year, month])
+    zone_weights = _zone_weights(rng)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    writer = None
+    try:
+        for offset in range(0, rows, row_group_size):
+            batch = green_batch(rng, year, month, min(row_group_size, rows - offset), zone_weights)
+            if writer is None:
+                writer = pq.ParquetWriter(path, batch.schema, compression="snappy")
+            writer.write_batch(batch, row_group_size=row_group_size)
+    finally:
+        if writer is not None:
+            writer.close()
+    return path
+
+
+def write_zone_lookup(path: Path) -> Path:
+    """taxi_zone_lookup.csv with the real header and one row per zone id."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        writer.writerow(["LocationID", "Borough", "Zone", "service_zone"])
+        for zone in range(1, N_ZONES + 1):
+            borough = BOROUGHS[zone % len(BOROUGHS)]
+            service = "Yellow Zone" if borough == "Manhattan" else "Boro Zone"
+            writer.writerow([zone, borough, f"Zone {zone}", service])
+    return path
@@ -0,0 +1,414 @@
+"""`de-pipeline` : point d'entrée unique de la pipeline TLC (une sous-commande par étape)."""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+from de_pipeline.common.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Les sous-commandes n'importent que ce dont elles ont besoin (pas de google-cloud,
+# pandas ou pyarrow pour `preview` / `--help`) : démarrage rapide des tâches courtes.
+
+
+def _context(args: argparse.Namespace):
+    from de_pipeline.orchestration.context import PipelineContext
+
+    ctx = PipelineContext.from_config(Path(args.config_dir), backend=args.backend)
+    if args.profile:
+        from de_pipeline.common.profiling import enable_profiling
+
+        enable_profiling(ctx.run_dir / "profiles")
+        logger.info(f"🔬 Profiling activé -> {ctx.run_dir / 'profiles'}")
+    return ctx
+
+
+def cmd_preview(args: argparse.Namespace) -> int:
+    """Afficher les URLs sources de la fenêtre months_back."""
+    from datetime import date
+
+    import yaml
+
+    from de_pipeline.ingestion.source import TLCSources, month_start_n_months_back
+
+    with open(Path(args.config_dir) / "dataset.yml", encoding="utf-8") as f:
+        cfg = yaml.safe_load(f)
+    src_cfg = cfg["dataset"]["source"]
+    months_back = int(cfg["dataset"]["default_range"]["months_back"])
+
+    src = TLCSources(
+        base_url=src_cfg["base_url"],
+        trips_path_template=src_cfg["trips_path_template"],
+        zones_path=src_cfg["zones_path"],
+    )
+
+    print("Zones lookup URL:")
+    print(src.zones_url())
+    for service in cfg["dataset"].get("services") or ["green"]:
+        print(f"\nTrip parquet URLs ({service}):")
+        for y, m in month_start_n_months_back(date.today(), months_back):
+            print(src.trip_url(y, m, service))
+    return 0
+
+
+def cmd_download(args: argparse.Namespace) -> int:
+    from de_pipeline.orchestration.pipeline import (
+        download_trips,
+        download_zones,
+        normalize_trips,
+        repartition_trips,
+    )
+
+    ctx = _context(args)
+    download_zones(ctx)
+    download_trips(ctx)
+    normalize_trips(ctx)
+    repartition_trips(ctx)
+    return 0
+
+
+def cmd_upload(args: argparse.Namespace) -> int:
+    from de_pipeline.orchestration.pipeline import upload
+
+    ctx = _context(args)
+    logger.info(f"Starting upload to {ctx.object_store().uri('')}")
+    upload(ctx)
+    logger.info("Upload completed!")
+    return 0
+
+
+def cmd_load(args: argparse.Namespace) -> int:
+    from de_pipeline.orchestration.pipeline import load_trips, load_zones
+
+    ctx = _context(args)
+    ctx.warehouse().ensure_dataset(ctx.dataset_raw)
+    logger.info("Loading Parquet files to BigQuery...")
+    load_trips(ctx)
+    logger.info("Loading CSV (zones) to BigQuery...")
+    load_zones(ctx)
+    logger.info("✅ All data loaded to BigQuery!")
+    return 0
+
+
+def cmd_transform(args: argparse.Namespace) -> int:
+    from de_pipeline.orchestration.pipeline import (
+        transform_aggregates,
+        transform_dim_datetime,
+        transform_dim_location,
+        transform_fact,
+    )
+
+    ctx = _context(args)
+    ctx.warehouse().ensure_dataset(ctx.dataset_curated)
+    logger.info("🔄 Création des tables transformées...")
+    transform_fact(ctx)
+    transform_dim_datetime(ctx)
+    transform_dim_location(ctx)
+    transform_aggregates(ctx)
+    logger.info("✅ Transformations complétées!")
+    return 0
+
+
+def _dq_local(ctx) -> int:
+    """Règles DQ en une passe par fichier sur la partition locale du jour."""
+    from de_pipeline.common.services import service_of_table
+    from de_pipeline.dq.engine import evaluate_files
+    from de_pipeline.dq.rules import load_rules
+
+    local_cfg = ctx.dq_cfg.get("local", {})
+    logger.info(f"🔍 Data Quality locale sur {ctx.partition}...")
+    all_pass = True
+    for table, table_cfg in ctx.dq_cfg["tables"].items():
+        service = service_of_table(table)
+        folder = ctx.service_dir(service) if service is not None else ctx.partition_dir
+        paths = sorted(folder.glob(table_cfg.get("file_pattern", "")))
+        paths = [p for p in paths if p.suffix == ".parquet"]
+        if not paths:
+            continue
+        reports = evaluate_files(
+            paths,
+            load_rules(table_cfg["rules"]),
+            batch_size=int(local_cfg.get("batch_size", 65_536)),
+            max_workers=int(local_cfg.get("max_workers", 1)),
+            max_hashes=int(local_cfg.get("max_hashes_in_memory", 8_000_000)),
+        )
+        for report in reports:
+            name = Path(report["path"]).name
+            if report["passed"]:
+                logger.info(f"  ✅ {name}: {report['rows']} lignes, tous les checks passés")
+                continue
+            all_pass = False
+            failed = [r for r in report["results"] if not r["passed"]]
+            logger.warning(f"  ⚠️  {name}: {failed}")
+
+    if all_pass:
+        logger.info("✅ DQ locale OK")
+        return 0
+    logger.warning("⚠️  DQ locale en échec : chargement à éviter")
+    return 1
+
+
+def _dq_warehouse(ctx, dry_run: bool) -> int:
+    """Checks DQ dans l'entrepôt (BigQuery ou DuckDB), une requête par table, tables en parallèle."""
+    from de_pipeline.dq.rules import table_rules
+    from de_pipeline.dq.warehouse import check_tables
+
+    tables = table_rules(
+        ctx.dq_cfg["tables"],
+        ctx.project_id,
+        {"raw": ctx.dataset_raw, "curated": ctx.dataset_curated},
+    )
+    logger.info("🔍 Exécution des Data Quality checks...")
+    reports = check_tables(
+        ctx.warehouse(),
+        tables,
+        max_workers=int(ctx.dq_cfg.get("warehouse", {}).get("max_workers", 4)),
+        dry_run=dry_run,
+    )
+
+    if dry_run:
+        total = 0
+        for report in reports:
+            scanned = report.get("bytes_processed") or 0
+            total += scanned
+            logger.info(f"📊 {report['table']}: {scanned / 1e6:.1f} MB seraient scannés")
+        logger.info(f"🧮 Total dry-run: {total / 1e6:.1f} MB")
+        return 0
+
+    all_pass = True
+    for report in reports:
+        logger.info(f"\n📊 Checks sur {report['table']}:")
+        if "error" in report:
+            logger.error(f"  ❌ Erreur: {report['error']}")
+            all_pass = False
+        elif report["passed"]:
+            logger.info(f"  ✅ Tous les checks passés ({report['rows']} lignes)")
+        else:
+            failed = {r["rule"]: r["failed_rows"] for r in report["results"] if not r["passed"]}
+            logger.warning(f"  ⚠️  Certains checks échoués: {failed}")
+            all_pass = False
+
+    if all_pass:
+        logger.info("\n✅ TOUS LES CHECKS DE QUALITE PASSES!")
+        return 0
+    logger.warning("\n⚠️  CERTAINS CHECKS DE QUALITE ECHOUES!")
+    return 1
+
+
+def cmd_dq(args: argparse.Namespace) -> int:
+    ctx = _context(args)
+    if args.local:
+        return _dq_local(ctx)
+    return _dq_warehouse(ctx, dry_run=args.dry_run)
+
+
+def cmd_gc(args: argparse.Namespace) -> int:
+    """Dédupliquer l'historique local (liens physiques) et évincer selon le budget (LRU)."""
+    from de_pipeline.common.manifest import JsonManifest
+    from de_pipeline.common.services import SERVICES
+    from de_pipeline.ingestion.cache import collect_garbage
+
+    ctx = _context(args)
+    cache = ctx.blob_cache()
+    if cache is None:
+        logger.error("❌ runtime.cache.enabled est à false : rien à collecter")
+        return 1
+    cache_cfg = ctx.section("cache")
+    max_bytes = args.max_bytes if args.max_bytes is not None else cache_cfg.get("max_bytes")
+    max_age_days = (
+        args.max_age_days if args.max_age_days is not None else cache_cfg.get("max_age_days")
+    )
+    # Dernier téléchargement de chaque mois : nécessaire au mode incrémental, jamais évincé.
+    protect = {
+        e[key]
+        for service in SERVICES.values()
+        for e in JsonManifest(ctx.download_manifest_path(service)).entries().values()
+        for key in ("md5", "normalized_md5")
+        if e.get(key)
+    }
+    summary = collect_garbage(
+        cache,
+        ctx.local_raw_dir,
+        max_bytes=int(max_bytes) if max_bytes is not None else None,
+        max_age_days=float(max_age_days) if max_age_days is not None else None,
+        protect=protect,
+        exclude=(ctx.manifests_dir,),
+        dry_run=args.dry_run,
+    )
+    for path in summary["removed_paths"]:
+        logger.info(f"  {'(dry-run) ' if args.dry_run else ''}🗑️  {path}")
+    return 0
+
+
+def cmd_run(args: argparse.Namespace) -> int:
+    """Pipeline complète en DAG : Téléchargement -> GCS -> BigQuery -> Transformations -> DQ."""
+    from dataclasses import replace
+
+    from de_pipeline.common.manifest import JsonManifest
+    from de_pipeline.common.profiling import profiled, profiling_dir
+    from de_pipeline.orchestration.dag import StageCheckpoint, run_dag
+    from de_pipeline.orchestration.pipeline import build_stages
+
+    ctx = _context(args)
+    logger.info("=" * 80)
+    logger.info("🚀 DEMARRAGE PIPELINE TLC END-TO-END")
+    logger.info(f"📅 {ctx.started_at.isoformat()}")
+    logger.info("=" * 80)
+
+    # Vérifier la config du backend
+    if ctx.backend == "local":
+        logger.info("💻 Backend local : bucket et entrepôt DuckDB sous data/ (hors ligne)")
+    elif not ctx.project_id:
+        logger.error("❌ GCP_PROJECT_ID non configuré dans .env")
+        return 1
+    else:
+        logger.info(f"✅ Project GCP: {ctx.project_id}")
+
+    pipeline_cfg = ctx.section("pipeline")
+    checkpoint = StageCheckpoint(
+        JsonManifest(ctx.manifests_dir / "run_pipeline.json"), run_id=ctx.ingestion_date
+    )
+    if args.fresh:
+        checkpoint.clear()
+
+    stages = build_stages(ctx)
+    max_workers = int(pipeline_cfg.get("max_workers", 4))
+    if profiling_dir() is not None:
+        # Étapes une par une : pic mémoire et profil attribuables à une seule étape
+        if not args.profile:
+            from de_pipeline.common.profiling import enable_profiling
+
+            enable_profiling(ctx.run_dir / "profiles")
+        stages = [replace(s, func=profiled(s.name)(s.func)) for s in stages]
+        max_workers = 1
+
+    summary = run_dag(
+        stages,
+        ctx,
+        checkpoint=checkpoint,
+        max_workers=max_workers,
+        metrics=ctx.metrics,
+    )
+
+    # Rapport de run (JSON) + métriques Prometheus (textfile collector)
+    metrics_cfg = ctx.section("metrics")
+    report_path = ctx.run_dir / "run_report.json"
+    ctx.metrics.write_json(report_path, resumed=summary["resumed"], blocked=summary["blocked"])
+    ctx.metrics.write_prometheus(
+        Path(metrics_cfg.get("prometheus_textfile", "data/runs/de_pipeline.prom"))
+    )
+    logger.info(f"📊 Rapport de run: {report_path}")
+
+    # Résumé
+    logger.info("=" * 80)
+    if not summary["failed"]:
+        checkpoint.clear()
+        logger.info("✅ PIPELINE COMPLETEE AVEC SUCCES!")
+        logger.info(f"⏱️  Durée: {summary['elapsed_sec']:.2f}s")
+        logger.info("=" * 80)
+        return 0
+
+    logger.warning(f"⚠️  PIPELINE AVEC ERREURS: {len(summary['failed'])} étape(s) échouée(s)")
+    for name, error in summary["failed"].items():
+        logger.warning(f"   - {name}: {error}")
+    for name in summary["blocked"]:
+        logger.warning(f"   - {name}: non exécutée (dépendance en échec)")
+    logger.warning("↩️  Relancer la même commande pour reprendre à l'étape en échec")
+    logger.info("=" * 80)
+    return 1
+
+
+def cmd_backfill(args: argparse.Namespace) -> int:
+    """Backfill d'une plage de mois : chaque mois passe seul download -> normalize -> upload -> load."""
+    from de_pipeline.common.manifest import JsonManifest
+    from de_pipeline.common.services import get_service
+    from de_pipeline.ingestion.source import parse_month_range
+    from de_pipeline.orchestration.backfill import MonthCheckpoint, run_backfill
+
+    ctx = _context(args)
+    months = parse_month_range(args.months)
+    services = [get_service(name) for name in args.services.split(",")] if args.services else None
+    checkpoint = MonthCheckpoint(JsonManifest(ctx.manifests_dir / "backfill.json"))
+    if args.fresh:
+        checkpoint.clear()
+
+    summary = run_backfill(ctx, months, services=services, checkpoint=checkpoint)
+    report_path = ctx.run_dir / "run_report.json"
+    ctx.metrics.write_json(report_path, resumed=summary["resumed"], failed=summary["failed"])
+    logger.info(f"📊 Rapport de run: {report_path}")
+    logger.info(
+        f"✅ {len(summary['done'])} mois chargé(s), {len(summary['resumed'])} déjà faits "
+        f"(checkpoint), en {summary['elapsed_sec']:.1f}s"
+    )
+    if not summary["failed"]:
+        return 0
+    for key, error in summary["failed"].items():
+        logger.warning(f"   - {key}: {error}")
+    logger.warning("↩️  Relancer la même commande pour reprendre chaque mois à son étape en échec")
+    return 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--config-dir", default="config", help="dossier des config/*.yml")
+    common.add_argument(
+        "--profile",
+        action="store_true",
+        help="profiler (cProfile + pic mémoire), comme DE_PIPELINE_PROFILE=1",
+    )
+    common.add_argument(
+        "--backend",
+        choices=("gcp", "local"),
+        help="remplace runtime.backend (local : dossier bucket + DuckDB, sans GCP)",
+    )
+
+    parser = argparse.ArgumentParser(prog="de-pipeline", description=__doc__)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def command(name: str, func, help_text: str) -> argparse.ArgumentParser:
+        cmd = sub.add_parser(name, parents=[common], help=help_text)
+        cmd.set_defaults(func=func)
+        return cmd
+
+    command("preview", cmd_preview, "afficher les URLs sources")
+    command("download", cmd_download, "télécharger zones et trips")
+    command("upload", cmd_upload, "uploader la partition vers le bucket")
+    command("load", cmd_load, "charger bucket -> tables raw")
+    command("transform", cmd_transform, "construire fact/dim")
+    dq = command("dq", cmd_dq, "checks de qualité (BigQuery, ou fichiers locaux)")
+    dq.add_argument("--local", action="store_true", help="fichiers Parquet locaux du jour")
+    dq.add_argument("--dry-run", action="store_true", help="estimer les octets scannés")
+    gc = command("gc", cmd_gc, "dédupliquer et purger l'historique raw local (LRU)")
+    gc.add_argument("--dry-run", action="store_true", help="afficher sans rien supprimer")
+    gc.add_argument("--max-bytes", type=int, default=None, help="remplace runtime.cache.max_bytes")
+    gc.add_argument(
+        "--max-age-days", type=float, default=None, help="remplace runtime.cache.max_age_days"
+    )
+    backfill = command("backfill", cmd_backfill, "rattraper une plage de mois (pipeline par mois)")
+    backfill.add_argument("--months", required=True, help="plage YYYY-MM..YYYY-MM ou YYYY-MM..now")
+    backfill.add_argument(
+        "--services",
+        default=None,
+        help="services séparés par des virgules (défaut : dataset.services)",
+    )
+    backfill.add_argument(
+        "--fresh", action="store_true", help="ignorer le checkpoint par mois et tout relancer"
+    )
+    run = command("run", cmd_run, "pipeline complète (DAG, reprise sur échec)")
+    run.add_argument("--fresh", action="store_true", help="ignorer le checkpoint et tout relancer")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    from dotenv import load_dotenv
+
+    args = build_parser().parse_args(argv)
+    load_dotenv()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
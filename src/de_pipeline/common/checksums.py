@@ -0,0 +1,96 @@
+"""md5 + crc32c computed in one pass, and a cache of the checksums of local files."""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+from pathlib import Path
+
+import google_crc32c
+
+from de_pipeline.common.manifest import JsonManifest
+
+
+class Checksums:
+    """md5 and crc32c of one byte stream, fed chunk by chunk (each chunk read once)."""
+
+    def __init__(self) -> None:
+        self._md5 = hashlib.md5()
+        self._crc32c = google_crc32c.Checksum()
+
+    def update(self, chunk: bytes) -> None:
+        # google-crc32c n'accepte que des bytes (pas de memoryview) : les chunks lus sont passés tels quels.
+        self._md5.update(chunk)
+        self._crc32c.update(chunk)
+
+    def hexdigest(self) -> str:
+        """md5 in hex, as hashlib (the manifests' `md5`)."""
+        return self._md5.hexdigest()
+
+    @property
+    def crc32c(self) -> str:
+        return self._crc32c.digest().hex()
+
+    def as_dict(self) -> dict:
+        return {"md5": self.hexdigest(), "crc32c": self.crc32c}
+
+
+def file_checksums(
+    path: Path, chunk_size: int = 1024 * 1024, offset: int = 0, length: int | None = None
+) -> tuple[int, Checksums]:
+    """(bytes, checksums) of `path`, or of its `length` bytes from `offset`."""
+    checksums = Checksums()
+    total = 0
+    with open(path, "rb") as f:
+        f.seek(offset)
+        while length is None or total < length:
+            size = chunk_size if length is None else min(chunk_size, length - total)
+            chunk = f.read(size)
+            if not chunk:
+                break
+            checksums.update(chunk)
+            total += len(chunk)
+    return total, checksums
+
+
+def to_gcs(hex_digest: str) -> str:
+    """Hex digest -> base64 of its bytes, the form of GCS `md5Hash` / `crc32c`."""
+    return base64.b64encode(bytes.fromhex(hex_digest)).decode("ascii")
+
+
+def from_gcs(value: str | None) -> str | None:
+    """GCS `md5Hash` / `crc32c` (base64) -> hex digest."""
+    return base64.b64decode(value).hex() if value else None
+
+
+class ChecksumIndex:
+    """
+    md5 and crc32c of local files, by path, valid while a file keeps its size and mtime
+    (a rewrite invalidates it). Downloads record what they hashed while streaming, so
+    the upload compares with the bucket without reading the file again.
+    """
+
+    def __init__(self, manifest: JsonManifest) -> None:
+        self.manifest = manifest
+
+    @staticmethod
+    def _stat(path: Path) -> dict:
+        stat = path.stat()
+        return {"bytes": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def record(self, path: Path, md5: str, crc32c: str) -> dict:
+        entry = {**self._stat(path), "md5": md5, "crc32c": crc32c}
+        self.manifest.set(str(Path(path).resolve()), entry)
+        return entry
+
+    def get(self, path: Path) -> dict:
+        """bytes, md5 and crc32c (hex) of `path`, hashed now if not recorded or stale."""
+        path = Path(path)
+        entry = self.manifest.get(str(path.resolve()))
+        if entry and {k: entry.get(k) for k in ("bytes", "mtime_ns")} == self._stat(path):
+            return entry
+        _, checksums = file_checksums(path)
+        return self.record(path, checksums.hexdigest(), checksums.crc32c)
+
+    def save(self) -> None:
+        self.manifest.save()
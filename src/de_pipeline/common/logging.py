@@ -1,7 +1,21 @@
 import logging
 import os
 
-from rich.logging import RichHandler
+
+class _LazyRichHandler(logging.Handler):
+    """RichHandler built on the first record, so importing a module does not import rich."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._handler: logging.Handler | None = None
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self._handler is None:
+            from rich.logging import RichHandler
+
+            self._handler = RichHandler(rich_tracebacks=True)
+            self._handler.setFormatter(self.formatter)
+        self._handler.emit(record)
 
 
 def get_logger(name: str) -> logging.Logger:
@@ -10,6 +24,6 @@ def get_logger(name: str) -> logging.Logger:
         level=level,
         format="%(message)s",
         datefmt="[%X]",
-        handlers=[RichHandler(rich_tracebacks=True)],
+        handlers=[_LazyRichHandler()],
     )
     return logging.getLogger(name)
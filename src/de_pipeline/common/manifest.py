@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from pathlib import Path
+
+
+class JsonManifest:
+    """
+    Small persistent key -> entry store backed by one JSON file.
+    Updates are thread-safe; `save` writes atomically (tmp file + rename).
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        # Saves in order: an older snapshot never replaces a newer one on disk.
+        self._save_lock = threading.Lock()
+        self._entries: dict[str, dict] = {}
+        if path.exists():
+            with open(path, encoding="utf-8") as f:
+                self._entries = json.load(f)
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            return dict(entry) if entry is not None else None
+
+    def set(self, key: str, entry: dict) -> None:
+        with self._lock:
+            self._entries[key] = dict(entry)
+
+    def remove(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def entries(self) -> dict[str, dict]:
+        with self._lock:
+            return {k: dict(v) for k, v in self._entries.items()}
+
+    def save(self) -> None:
+        with self._save_lock:
+            with self._lock:
+                payload = json.dumps(self._entries, indent=2, sort_keys=True)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(
+                f"{self.path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+            )
+            tmp_path.write_text(payload, encoding="utf-8")
+            tmp_path.replace(self.path)
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+
+# Counters carried by every span, summed from files up to stages and the run.
+COUNTERS = (
+    "bytes",
+    "rows",
+    "bq_bytes_processed",
+    "bq_bytes_billed",
+    "retries",
+    "quarantined_rows",
+    "duplicate_rows",
+)
+
+
+@dataclass
+class Span:
+    stage: str
+    name: str
+    wall_sec: float = 0.0
+    status: str = "ok"
+    error: str | None = None
+    bytes: int = 0
+    rows: int = 0
+    bq_bytes_processed: int = 0
+    bq_bytes_billed: int = 0
+    retries: int = 0
+    quarantined_rows: int = 0
+    duplicate_rows: int = 0
+    files: list[Span] = field(default_factory=list)
+
+    def add(self, **counters: int | None) -> None:
+        for key, value in counters.items():
+            if key not in COUNTERS:
+                raise ValueError(f"Unknown counter: {key}")
+            setattr(self, key, getattr(self, key) + int(value or 0))
+
+    def totals(self) -> dict[str, int]:
+        """Own counters plus those of its files."""
+        return {
+            key: getattr(self, key) + sum(getattr(f, key) for f in self.files) for key in COUNTERS
+        }
+
+
+class RunMetrics:
+    """
+    Spans of one pipeline run: one per stage, and one per file (month, object, table)
+    a stage handled. Thread-safe; stages of a DAG record into the same instance.
+    """
+
+    def __init__(self, run_id: str) -> None:
+        self.run_id = run_id
+        self.started_at = datetime.now(UTC)
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self._stages: dict[str, Span] = {}
+
+    def _stage(self, stage: str) -> Span:
+        with self._lock:
+            if stage not in self._stages:
+                self._stages[stage] = Span(stage=stage, name=stage)
+            return self._stages[stage]
+
+    @contextmanager
+    def stage(self, stage: str) -> Iterator[Span]:
+        """Time a stage; its span is marked failed if the block raises."""
+        span = self._stage(stage)
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.status, span.error = "failed", str(e)
+            raise
+        finally:
+            span.wall_sec += time.perf_counter() - start
+
+    def add(self, stage: str, **counters: int | None) -> None:
+        """Stage-level counters (e.g. BigQuery bytes of a transform query)."""
+        span = self._stage(stage)
+        with self._lock:
+            span.add(**counters)
+
+    def file(self, stage: str, name: str, wall_sec: float = 0.0, **counters: int | None) -> None:
+        """Record one file handled by `stage`."""
+        span = Span(stage=stage, name=name, wall_sec=wall_sec)
+        span.add(**counters)
+        parent = self._stage(stage)
+        with self._lock:
+            parent.files.append(span)
+
+    def report(self) -> dict:
+        with self._lock:
+            stages = list(self._stages.values())
+        stage_reports = []
+        for span in stages:
+            entry = {k: v for k, v in asdict(span).items() if k not in ("files", *COUNTERS)}
+            entry.update(span.totals())
+            entry["throughput_mb_s"] = (
+                entry["bytes"] / 1e6 / span.wall_sec if span.wall_sec > 0 else 0.0
+            )
+            entry["files"] = [
+                {k: v for k, v in asdict(f).items() if k != "files"} for f in span.files
+            ]
+            stage_reports.append(entry)
+        return {
+            "run_id": self.run_id,
+            "started_at": self.started_at.isoformat(),
+            "wall_sec": time.perf_counter() - self._t0,
+            "status": "failed" if any(s.status == "failed" for s in stages) else "ok",
+            "totals": {key: sum(s[key] for s in stage_reports) for key in COUNTERS},
+            "stages": stage_reports,
+        }
+
+    def write_json(self, path: Path, **extra) -> dict:
+        """Write the run report, plus any `extra` top-level keys."""
+        report = {**self.report(), **extra}
+        _write_atomic(path, json.dumps(report, indent=2))
+        return report
+
+    def write_prometheus(self, path: Path, prefix: str = "de_pipeline") -> None:
+        """Prometheus textfile-collector format (file replaced atomically)."""
+        _write_atomic(path, prometheus_text(self.report(), prefix=prefix))
+
+
+def job_bytes(job) -> dict:
+    """Bytes processed/billed of a finished BigQuery query job (None when unknown)."""
+    return {
+        "bytes_processed": getattr(job, "total_bytes_processed", None),
+        "bytes_billed": getattr(job, "total_bytes_billed", None),
+    }
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(report: dict, prefix: str = "de_pipeline") -> str:
+    """Gauges of the run, its stages and its files, labelled by stage (and file)."""
+    lines: list[str] = []
+
+    def metric(name: str, help_text: str, samples: list[tuple[dict, float]]) -> None:
+        lines.append(f"# HELP {prefix}_{name} {help_text}")
+        lines.append(f"# TYPE {prefix}_{name} gauge")
+        for labels, value in samples:
+            rendered = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items())
+            lines.append(
+                f"{prefix}_{name}{{{rendered}}} {value}" if rendered else f"{prefix}_{name} {value}"
+            )
+
+    # Run-level series carry no run_id label: the textfile holds the latest run only.
+    run: dict = {}
+    started = datetime.fromisoformat(report["started_at"]).timestamp()
+    metric("run_start_timestamp_seconds", "Start of the run.", [(run, started)])
+    metric("run_duration_seconds", "Wall time of the run.", [(run, report["wall_sec"])])
+    metric("run_success", "1 if every stage succeeded.", [(run, int(report["status"] == "ok"))])
+
+    stages = report["stages"]
+    metric(
+        "stage_duration_seconds",
+        "Wall time of a stage.",
+        [({"stage": s["stage"]}, s["wall_sec"]) for s in stages],
+    )
+    metric(
+        "stage_success",
+        "1 if the stage succeeded.",
+        [({"stage": s["stage"]}, int(s["status"] == "ok")) for s in stages],
+    )
+    for key in COUNTERS:
+        metric(
+            f"stage_{key}",
+            f"{key} of a stage, files included.",
+            [({"stage": s["stage"]}, s[key]) for s in stages],
+        )
+    files = [(s["stage"], f) for s in stages for f in s["files"]]
+    metric(
+        "file_duration_seconds",
+        "Wall time spent on one file.",
+        [({"stage": stage, "file": f["name"]}, f["wall_sec"]) for stage, f in files],
+    )
+    for key in ("bytes", "rows", "retries"):
+        metric(
+            f"file_{key}",
+            f"{key} of one file.",
+            [({"stage": stage, "file": f["name"]}, f[key]) for stage, f in files],
+        )
+    return "\n".join(lines) + "\n"
+
+
+def _write_atomic(path: Path, payload: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp_path.write_text(payload, encoding="utf-8")
+    tmp_path.replace(path)
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, TypeVar
+
+from de_pipeline.common.logging import get_logger
+
+logger = get_logger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Opt-in: DE_PIPELINE_PROFILE=1 (or true/yes), profiles under DE_PIPELINE_PROFILE_DIR.
+PROFILE_ENV = "DE_PIPELINE_PROFILE"
+PROFILE_DIR_ENV = "DE_PIPELINE_PROFILE_DIR"
+DEFAULT_PROFILE_DIR = Path("data/runs/profiles")
+
+_lock = threading.Lock()
+# One cProfile session at a time: nested or concurrent profiled calls run unprofiled
+# and are accounted to the enclosing session.
+_session = threading.Lock()
+_output_dir: Path | None = None
+_counts: dict[str, int] = {}
+
+
+def enable_profiling(output_dir: Path) -> None:
+    global _output_dir
+    with _lock:
+        _output_dir = Path(output_dir)
+
+
+def disable_profiling() -> None:
+    global _output_dir
+    with _lock:
+        _output_dir = None
+        _counts.clear()
+
+
+def profiling_dir() -> Path | None:
+    """Where profiles go, or None when profiling is off (the default)."""
+    global _output_dir
+    with _lock:
+        if _output_dir is None and os.getenv(PROFILE_ENV, "").lower() in ("1", "true", "yes"):
+            _output_dir = Path(os.getenv(PROFILE_DIR_ENV) or DEFAULT_PROFILE_DIR)
+        return _output_dir
+
+
+def _next_label(name: str) -> str:
+    with _lock:
+        _counts[name] = _counts.get(name, 0) + 1
+        n = _counts[name]
+    return name if n == 1 else f"{name}-{n}"
+
+
+def _run_profiled(name: str, output_dir: Path, func: Callable, args, kwargs):
+    label = _next_label(name)
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    profiler = cProfile.Profile()
+    status = "ok"
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        return func(*args, **kwargs)
+    except BaseException:
+        status = "failed"
+        raise
+    finally:
+        profiler.disable()
+        wall_sec = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        if started_tracing:
+            tracemalloc.stop()
+        _write_profile(output_dir, label, profiler, wall_sec, peak, status)
+
+
+def _write_profile(
+    output_dir: Path,
+    label: str,
+    profiler: cProfile.Profile,
+    wall_sec: float,
+    peak_bytes: int,
+    status: str,
+) -> None:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(str(output_dir / f"{label}.prof"))
+    text = io.StringIO()
+    pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(30)
+    (output_dir / f"{label}.txt").write_text(text.getvalue(), encoding="utf-8")
+    record = {
+        "name": label,
+        "status": status,
+        "wall_sec": round(wall_sec, 3),
+        "peak_memory_bytes": peak_bytes,
+        "profile": f"{label}.prof",
+    }
+    with _lock, open(output_dir / "profiles.jsonl", "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+    logger.info(f"🔬 {label}: {wall_sec:.2f}s, pic mémoire {peak_bytes / 1e6:.1f} MB")
+
+
+def profiled(name: str | None = None) -> Callable[[F], F]:
+    """
+    Profile each call of the decorated function when profiling is on: cProfile stats
+    (<name>.prof, top functions in <name>.txt) and tracemalloc peak memory, appended
+    to profiles.jsonl. Off by default, and then only costs an env/flag check.
+    """
+
+    def decorate(func: F) -> F:
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            output_dir = profiling_dir()
+            if output_dir is None or not _session.acquire(blocking=False):
+                return func(*args, **kwargs)
+            try:
+                return _run_profiled(label, output_dir, func, args, kwargs)
+            finally:
+                _session.release()
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
@@ -0,0 +1,102 @@
+"""Pinned column schemas of the raw TLC tables, as (name, BigQuery type) pairs."""
+
+from __future__ import annotations
+
+# Column added by normalize to every trips file: the trip fingerprint as INT64, the stable
+# trip_id of the fact tables (ingestion.fingerprint).
+TRIP_ID_COLUMN: tuple[str, str] = ("trip_id", "INT64")
+
+GREEN_TRIPDATA_COLUMNS: list[tuple[str, str]] = [
+    ("VendorID", "INT64"),
+    ("lpep_pickup_datetime", "TIMESTAMP"),
+    ("lpep_dropoff_datetime", "TIMESTAMP"),
+    ("store_and_fwd_flag", "STRING"),
+    ("RatecodeID", "FLOAT64"),
+    ("PULocationID", "INT64"),
+    ("DOLocationID", "INT64"),
+    ("passenger_count", "FLOAT64"),
+    ("trip_distance", "FLOAT64"),
+    ("fare_amount", "FLOAT64"),
+    ("extra", "FLOAT64"),
+    ("mta_tax", "FLOAT64"),
+    ("tip_amount", "FLOAT64"),
+    ("tolls_amount", "FLOAT64"),
+    ("ehail_fee", "FLOAT64"),
+    ("improvement_surcharge", "FLOAT64"),
+    ("total_amount", "FLOAT64"),
+    ("payment_type", "FLOAT64"),
+    ("trip_type", "FLOAT64"),
+    ("congestion_surcharge", "FLOAT64"),
+    # Only in files from 2025 on; NULL for older months.
+    ("cbd_congestion_fee", "FLOAT64"),
+]
+
+TAXI_ZONE_COLUMNS: list[tuple[str, str]] = [
+    ("LocationID", "INT64"),
+    ("Borough", "STRING"),
+    ("Zone", "STRING"),
+    ("service_zone", "STRING"),
+]
+
+YELLOW_TRIPDATA_COLUMNS: list[tuple[str, str]] = [
+    ("VendorID", "INT64"),
+    ("tpep_pickup_datetime", "TIMESTAMP"),
+    ("tpep_dropoff_datetime", "TIMESTAMP"),
+    ("passenger_count", "FLOAT64"),
+    ("trip_distance", "FLOAT64"),
+    ("RatecodeID", "FLOAT64"),
+    ("store_and_fwd_flag", "STRING"),
+    ("PULocationID", "INT64"),
+    ("DOLocationID", "INT64"),
+    ("payment_type", "INT64"),
+    ("fare_amount", "FLOAT64"),
+    ("extra", "FLOAT64"),
+    ("mta_tax", "FLOAT64"),
+    ("tip_amount", "FLOAT64"),
+    ("tolls_amount", "FLOAT64"),
+    ("improvement_surcharge", "FLOAT64"),
+    ("total_amount", "FLOAT64"),
+    ("congestion_surcharge", "FLOAT64"),
+    ("Airport_fee", "FLOAT64"),
+    ("cbd_congestion_fee", "FLOAT64"),
+]
+
+# For-hire vehicles (dispatch bases); location ids are published as doubles.
+FHV_TRIPDATA_COLUMNS: list[tuple[str, str]] = [
+    ("dispatching_base_num", "STRING"),
+    ("pickup_datetime", "TIMESTAMP"),
+    ("dropOff_datetime", "TIMESTAMP"),
+    ("PUlocationID", "FLOAT64"),
+    ("DOlocationID", "FLOAT64"),
+    ("SR_Flag", "FLOAT64"),
+    ("Affiliated_base_number", "STRING"),
+]
+
+# High-volume for-hire vehicles (Uber, Lyft...): ~20M rows a month.
+FHVHV_TRIPDATA_COLUMNS: list[tuple[str, str]] = [
+    ("hvfhs_license_num", "STRING"),
+    ("dispatching_base_num", "STRING"),
+    ("originating_base_num", "STRING"),
+    ("request_datetime", "TIMESTAMP"),
+    ("on_scene_datetime", "TIMESTAMP"),
+    ("pickup_datetime", "TIMESTAMP"),
+    ("dropoff_datetime", "TIMESTAMP"),
+    ("PULocationID", "INT64"),
+    ("DOLocationID", "INT64"),
+    ("trip_miles", "FLOAT64"),
+    ("trip_time", "INT64"),
+    ("base_passenger_fare", "FLOAT64"),
+    ("tolls", "FLOAT64"),
+    ("bcf", "FLOAT64"),
+    ("sales_tax", "FLOAT64"),
+    ("congestion_surcharge", "FLOAT64"),
+    ("airport_fee", "FLOAT64"),
+    ("tips", "FLOAT64"),
+    ("driver_pay", "FLOAT64"),
+    ("shared_request_flag", "STRING"),
+    ("shared_match_flag", "STRING"),
+    ("access_a_ride_flag", "STRING"),
+    ("wav_request_flag", "STRING"),
+    ("wav_match_flag", "STRING"),
+    ("cbd_congestion_fee", "FLOAT64"),
+]
@@ -0,0 +1,136 @@
+"""TLC trip services (green, yellow, FHV, HVFHV): file names, schemas, tables, fact mapping."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from de_pipeline.common.schemas import (
+    FHV_TRIPDATA_COLUMNS,
+    FHVHV_TRIPDATA_COLUMNS,
+    GREEN_TRIPDATA_COLUMNS,
+    TRIP_ID_COLUMN,
+    YELLOW_TRIPDATA_COLUMNS,
+)
+
+
+@dataclass(frozen=True, eq=False)
+class TripService:
+    """
+    One TLC trip feed. `name` is the prefix of its monthly files (`<name>_tripdata_YYYY-MM.parquet`);
+    its files live under `<local_raw_dir>/<local_prefix>/` and `raw/<local_prefix>/` in the bucket.
+    """
+
+    name: str
+    local_prefix: str
+    columns: list[tuple[str, str]]
+    pickup_column: str
+    dropoff_column: str
+    # Raw columns carried into the fact table (raw name, fact name).
+    fact_columns: list[tuple[str, str]]
+    # Extra conditions a raw row must meet to enter the fact table.
+    fact_filters: tuple[str, ...] = ()
+
+    @property
+    def file_prefix(self) -> str:
+        return f"{self.name}_tripdata_"
+
+    def file_name(self, year: int, month: int) -> str:
+        return f"{self.file_prefix}{year:04d}-{month:02d}.parquet"
+
+    @property
+    def raw_columns(self) -> list[tuple[str, str]]:
+        """Pinned schema of the raw table: the canonical columns plus the trip_id of normalize."""
+        return [*self.columns, TRIP_ID_COLUMN]
+
+    @property
+    def raw_table(self) -> str:
+        return f"{self.name}_tripdata_raw"
+
+    @property
+    def fact_table(self) -> str:
+        return f"fact_{self.name}_tripdata"
+
+
+GREEN = TripService(
+    name="green",
+    local_prefix="green_taxi",
+    columns=GREEN_TRIPDATA_COLUMNS,
+    pickup_column="lpep_pickup_datetime",
+    dropoff_column="lpep_dropoff_datetime",
+    fact_columns=[
+        ("VendorID", "VendorID"),
+        ("lpep_pickup_datetime", "pickup_datetime"),
+        ("lpep_dropoff_datetime", "dropoff_datetime"),
+        ("store_and_fwd_flag", "store_and_fwd_flag"),
+        ("RatecodeID", "RatecodeID"),
+        ("PULocationID", "PULocationID"),
+        ("DOLocationID", "DOLocationID"),
+        ("passenger_count", "passenger_count"),
+        ("trip_distance", "trip_distance"),
+        ("fare_amount", "fare_amount"),
+        ("extra", "extra"),
+        ("mta_tax", "mta_tax"),
+        ("tip_amount", "tip_amount"),
+        ("tolls_amount", "tolls_amount"),
+        ("ehail_fee", "ehail_fee"),
+        ("total_amount", "total_amount"),
+        ("payment_type", "payment_type"),
+        ("trip_type", "trip_type"),
+        ("congestion_surcharge", "congestion_surcharge"),
+    ],
+    fact_filters=("trip_distance > 0", "fare_amount > 0"),
+)
+
+YELLOW = TripService(
+    name="yellow",
+    local_prefix="yellow_taxi",
+    columns=YELLOW_TRIPDATA_COLUMNS,
+    pickup_column="tpep_pickup_datetime",
+    dropoff_column="tpep_dropoff_datetime",
+    fact_columns=[(raw, raw.removeprefix("tpep_")) for raw, _ in YELLOW_TRIPDATA_COLUMNS],
+    fact_filters=("trip_distance > 0", "fare_amount > 0"),
+)
+
+FHV = TripService(
+    name="fhv",
+    local_prefix="fhv",
+    columns=FHV_TRIPDATA_COLUMNS,
+    pickup_column="pickup_datetime",
+    dropoff_column="dropOff_datetime",
+    fact_columns=[
+        ("dispatching_base_num", "dispatching_base_num"),
+        ("pickup_datetime", "pickup_datetime"),
+        ("dropOff_datetime", "dropoff_datetime"),
+        ("PUlocationID", "PULocationID"),
+        ("DOlocationID", "DOLocationID"),
+        ("SR_Flag", "SR_Flag"),
+        ("Affiliated_base_number", "Affiliated_base_number"),
+    ],
+)
+
+FHVHV = TripService(
+    name="fhvhv",
+    local_prefix="fhvhv",
+    columns=FHVHV_TRIPDATA_COLUMNS,
+    pickup_column="pickup_datetime",
+    dropoff_column="dropoff_datetime",
+    fact_columns=[(raw, raw) for raw, _ in FHVHV_TRIPDATA_COLUMNS],
+    fact_filters=("trip_miles > 0", "base_passenger_fare > 0"),
+)
+
+SERVICES: dict[str, TripService] = {s.name: s for s in (GREEN, YELLOW, FHV, FHVHV)}
+
+
+def get_service(name: str) -> TripService:
+    try:
+        return SERVICES[name]
+    except KeyError:
+        raise ValueError(f"Unknown TLC service: {name} (known: {', '.join(SERVICES)})") from None
+
+
+def service_of_table(table: str) -> TripService | None:
+    """Service whose raw or fact table is `table` (None for shared tables such as zones)."""
+    for service in SERVICES.values():
+        if table in (service.raw_table, service.fact_table):
+            return service
+    return None
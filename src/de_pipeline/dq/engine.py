@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from de_pipeline.common.logging import get_logger
+from de_pipeline.dq.rules import NoDuplicates, NotNull, Range, RowCount, Rule
+
+logger = get_logger(__name__)
+
+
+def _failing_rows(rule: NotNull | Range, batch: pa.RecordBatch) -> int:
+    if isinstance(rule, NotNull):
+        mask = pc.is_null(batch.column(rule.columns[0]))
+        for column in rule.columns[1:]:
+            mask = pc.or_(mask, pc.is_null(batch.column(column)))
+        return pc.sum(mask).as_py() or 0
+
+    values = batch.column(rule.column)
+    checks = []
+    if rule.min is not None:
+        checks.append(
+            pc.less(values, rule.min) if rule.min_inclusive else pc.less_equal(values, rule.min)
+        )
+    if rule.max is not None:
+        checks.append(
+            pc.greater(values, rule.max)
+            if rule.max_inclusive
+            else pc.greater_equal(values, rule.max)
+        )
+    if not checks:
+        return 0
+    mask = checks[0]
+    for check in checks[1:]:
+        mask = pc.or_(mask, check)
+    # NULLs are NotNull's business: they never count as out of range.
+    return pc.sum(pc.fill_null(mask, False)).as_py() or 0
+
+
+def row_hashes(batch: pa.RecordBatch, columns: tuple[str, ...] = ()) -> np.ndarray:
+    """Vectorized 64-bit hash of each row over `columns` (all columns when empty)."""
+    if columns:
+        batch = batch.select(list(columns))
+    return pd.util.hash_pandas_object(batch.to_pandas(), index=False).to_numpy()
+
+
+class DuplicateCounter:
+    """
+    Counts repeated row hashes in bounded memory: up to `max_in_memory` hashes are kept
+    in RAM, beyond that all hashes are spilled to `buckets` temporary files by their
+    top bits, and each bucket is deduplicated on its own (one bucket in RAM at a time).
+    """
+
+    def __init__(self, max_in_memory: int = 8_000_000, buckets: int = 64) -> None:
+        self.max_in_memory = max_in_memory
+        self.buckets = buckets
+        self._chunks: list[np.ndarray] = []
+        self._in_memory = 0
+        self._spill_dir: Path | None = None
+
+    def add(self, hashes: np.ndarray) -> None:
+        self._chunks.append(hashes.astype(np.uint64, copy=False))
+        self._in_memory += hashes.size
+        if self._in_memory > self.max_in_memory:
+            self._spill()
+
+    def _spill(self) -> None:
+        if self._spill_dir is None:
+            self._spill_dir = Path(tempfile.mkdtemp(prefix="dq_hashes_"))
+        hashes = np.concatenate(self._chunks)
+        shift = np.uint64(64 - max(1, (self.buckets - 1).bit_length()))
+        bucket_of = hashes >> shift
+        for bucket in np.unique(bucket_of):
+            with open(self._spill_dir / f"{int(bucket)}.bin", "ab") as f:
+                hashes[bucket_of == bucket].tofile(f)
+        self._chunks, self._in_memory = [], 0
+
+    def duplicates(self) -> int:
+        """Number of rows whose hash was already seen (rows - distinct hashes)."""
+        if self._spill_dir is None:
+            if not self._chunks:
+                return 0
+            hashes = np.concatenate(self._chunks)
+            return int(hashes.size - np.unique(hashes).size)
+        self._spill()
+        try:
+            total = 0
+            for path in self._spill_dir.glob("*.bin"):
+                hashes = np.fromfile(path, dtype=np.uint64)
+                total += hashes.size - np.unique(hashes).size
+            return int(total)
+        finally:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir = None
+
+
+def _result(rule: Rule, failed: int, rows: int) -> dict:
+    tolerance = getattr(rule, "tolerance", 0.0)
+    return {
+        "rule": rule.name,
+        "failed_rows": int(failed),
+        "passed": failed <= tolerance * rows,
+    }
+
+
+def evaluate_file(
+    path: Path, rules: list[Rule], batch_size: int = 65_536, max_hashes: int = 8_000_000
+) -> dict:
+    """
+    Evaluate every rule in a single streaming pass over one parquet file.
+    Only the columns the rules need are read, one record batch at a time; duplicate
+    checks keep at most `max_hashes` row hashes in memory (then spill to disk).
+    Returns {"path", "rows", "passed", "results": [{"rule", "failed_rows", "passed"}, ...]}.
+    """
+    pf = pq.ParquetFile(path, memory_map=True)
+    available = set(pf.schema_arrow.names)
+    missing = {
+        rule.name: sorted(set(rule.columns) - available)
+        for rule in rules
+        if set(rule.columns) - available
+    }
+    active = [rule for rule in rules if rule.name not in missing]
+    if any(isinstance(r, NoDuplicates) and not r.columns for r in active):
+        columns = None
+    else:
+        columns = sorted({c for r in active for c in r.columns}) or None
+
+    rows = 0
+    failures = {rule.name: 0 for rule in active}
+    hashes = {r.name: DuplicateCounter(max_hashes) for r in active if isinstance(r, NoDuplicates)}
+    for batch in pf.iter_batches(batch_size=batch_size, columns=columns):
+        rows += batch.num_rows
+        for rule in active:
+            if isinstance(rule, NotNull | Range):
+                failures[rule.name] += _failing_rows(rule, batch)
+            elif isinstance(rule, NoDuplicates):
+                hashes[rule.name].add(row_hashes(batch, rule.columns))
+
+    results = []
+    for rule in rules:
+        if rule.name in missing:
+            results.append(
+                {
+                    "rule": rule.name,
+                    "failed_rows": rows,
+                    "passed": False,
+                    "missing": missing[rule.name],
+                }
+            )
+        elif isinstance(rule, RowCount):
+            ok = rows >= rule.min_rows and (rule.max_rows is None or rows <= rule.max_rows)
+            results.append({"rule": rule.name, "failed_rows": 0, "passed": ok, "rows": rows})
+        elif isinstance(rule, NoDuplicates):
+            results.append(_result(rule, hashes[rule.name].duplicates(), rows))
+        else:
+            results.append(_result(rule, failures[rule.name], rows))
+
+    return {
+        "path": str(path),
+        "rows": rows,
+        "passed": all(r["passed"] for r in results),
+        "results": results,
+    }
+
+
+def evaluate_files(
+    paths: list[Path],
+    rules: list[Rule],
+    batch_size: int = 65_536,
+    max_workers: int = 1,
+    max_hashes: int = 8_000_000,
+) -> list[dict]:
+    """Evaluate independent files in parallel worker processes (in-process when max_workers <= 1)."""
+    if max_workers <= 1 or len(paths) <= 1:
+        return [evaluate_file(path, rules, batch_size, max_hashes) for path in paths]
+    n = len(paths)
+    with ProcessPoolExecutor(max_workers=min(max_workers, n)) as pool:
+        return list(pool.map(evaluate_file, paths, [rules] * n, [batch_size] * n, [max_hashes] * n))
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class RowCount:
+    """The table/file holds between `min_rows` and `max_rows` rows."""
+
+    name: str
+    min_rows: int = 1
+    max_rows: int | None = None
+
+    @property
+    def columns(self) -> tuple[str, ...]:
+        return ()
+
+
+@dataclass(frozen=True)
+class NotNull:
+    """No row has a NULL in any of `columns` (up to `tolerance`, a fraction of rows)."""
+
+    name: str
+    columns: tuple[str, ...]
+    tolerance: float = 0.0
+
+
+@dataclass(frozen=True)
+class Range:
+    """Non-null values of `column` lie within [min, max] (bounds optional, exclusive if asked)."""
+
+    name: str
+    column: str
+    min: float | None = None
+    max: float | None = None
+    min_inclusive: bool = True
+    max_inclusive: bool = True
+    tolerance: float = 0.0
+
+    @property
+    def columns(self) -> tuple[str, ...]:
+        return (self.column,)
+
+
+@dataclass(frozen=True)
+class NoDuplicates:
+    """No two rows are identical over `columns` (all columns when empty)."""
+
+    name: str
+    columns: tuple[str, ...] = ()
+    tolerance: float = 0.0
+
+
+Rule = RowCount | NotNull | Range | NoDuplicates
+
+
+def load_rules(specs: list[dict]) -> list[Rule]:
+    """
+    Build rules from their declarative form (config/dq.yml), e.g.
+    {"type": "range", "column": "trip_distance", "min": 0, "min_inclusive": False}.
+    """
+    rules: list[Rule] = []
+    for spec in specs:
+        spec = dict(spec)
+        kind = spec.pop("type", None)
+        name = spec.pop("name", None)
+        if kind == "row_count":
+            rules.append(
+                RowCount(
+                    name=name or "row_count", min_rows=spec.get("min", 1), max_rows=spec.get("max")
+                )
+            )
+        elif kind == "not_null":
+            columns = tuple(spec["columns"])
+            rules.append(
+                NotNull(
+                    name=name or "not_null", columns=columns, tolerance=spec.get("tolerance", 0.0)
+                )
+            )
+        elif kind == "range":
+            rules.append(Range(name=name or f"range_{spec['column']}", **spec))
+        elif kind == "duplicates":
+            columns = tuple(spec.get("columns", ()))
+            rules.append(
+                NoDuplicates(
+                    name=name or "no_duplicates",
+                    columns=columns,
+                    tolerance=spec.get("tolerance", 0.0),
+                )
+            )
+        else:
+            raise ValueError(f"Unknown DQ rule type: {kind!r}")
+    return rules
+
+
+def table_rules(
+    tables_cfg: dict, project_id: str, datasets: dict[str, str]
+) -> dict[str, list[Rule]]:
+    """
+    Rules of every table of the `dq.tables` config block, indexed by full table reference.
+    `datasets` maps the config's dataset alias (raw, curated) to the BigQuery dataset id.
+    """
+    return {
+        f"{project_id}.{datasets[cfg['dataset']]}.{table}": load_rules(cfg["rules"])
+        for table, cfg in tables_cfg.items()
+    }
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+from de_pipeline.common.logging import get_logger
+from de_pipeline.dq.rules import NoDuplicates, NotNull, Range, RowCount, Rule
+from de_pipeline.warehouse.base import as_warehouse
+from de_pipeline.warehouse.dialect import BIGQUERY, Dialect
+
+logger = get_logger(__name__)
+
+
+def _range_violation(rule: Range) -> str:
+    checks = []
+    if rule.min is not None:
+        checks.append(f"{rule.column} {'<' if rule.min_inclusive else '<='} {rule.min}")
+    if rule.max is not None:
+        checks.append(f"{rule.column} {'>' if rule.max_inclusive else '>='} {rule.max}")
+    return " OR ".join(checks) or "FALSE"
+
+
+def _failed_rows_expr(rule: Rule, dialect: Dialect) -> str:
+    if isinstance(rule, RowCount):
+        return "0"
+    if isinstance(rule, NotNull):
+        return "COUNTIF(" + " OR ".join(f"{c} IS NULL" for c in rule.columns) + ")"
+    if isinstance(rule, Range):
+        # A comparison with NULL is NULL, which COUNTIF does not count.
+        return f"COUNTIF({_range_violation(rule)})"
+    if isinstance(rule, NoDuplicates):
+        # COUNT(DISTINCT *) does not exist in BigQuery: fingerprint the row instead.
+        row = "t" if not rule.columns else dialect.struct([f"t.{c}" for c in rule.columns])
+        return f"COUNT(*) - COUNT(DISTINCT {dialect.fingerprint(row)})"
+    raise ValueError(f"Unsupported DQ rule: {rule!r}")
+
+
+def compile_rules_sql(table_ref: str, rules: list[Rule], dialect: Dialect = BIGQUERY) -> str:
+    """
+    Compile every rule for one table into a single aggregate query (one scan).
+    Output columns: `row_count`, then `r<i>` = failed rows of rules[i].
+    """
+    select = ["COUNT(*) AS row_count"]
+    select += [f"{_failed_rows_expr(rule, dialect)} AS r{i}" for i, rule in enumerate(rules)]
+    return "SELECT\n    " + ",\n    ".join(select) + f"\nFROM {dialect.table(table_ref)} AS t"
+
+
+def _evaluate(rules: list[Rule], row_count: int, failed: list[int]) -> list[dict]:
+    results = []
+    for rule, failed_rows in zip(rules, failed, strict=True):
+        if isinstance(rule, RowCount):
+            passed = row_count >= rule.min_rows and (
+                rule.max_rows is None or row_count <= rule.max_rows
+            )
+        else:
+            passed = failed_rows <= rule.tolerance * row_count
+        results.append({"rule": rule.name, "failed_rows": int(failed_rows), "passed": passed})
+    return results
+
+
+def check_table(client, table_ref: str, rules: list[Rule], dry_run: bool = False) -> dict:
+    """
+    Run all rules of one table as one query (BigQuery client or Warehouse `client`).
+    With `dry_run`, nothing is executed: the report holds the bytes the scan would process.
+    """
+    warehouse = as_warehouse(client)
+    sql = compile_rules_sql(table_ref, rules, warehouse.dialect)
+    if dry_run:
+        return {
+            "table": table_ref,
+            "dry_run": True,
+            "bytes_processed": warehouse.dry_run_bytes(sql),
+        }
+
+    row, stats = warehouse.fetch_one(sql)
+    row_count = int(row["row_count"])
+    results = _evaluate(rules, row_count, [row[f"r{i}"] for i in range(len(rules))])
+    return {
+        "table": table_ref,
+        "rows": row_count,
+        "passed": all(r["passed"] for r in results),
+        "results": results,
+        **stats,
+    }
+
+
+def check_tables(
+    client,
+    tables: dict[str, list[Rule]],
+    max_workers: int = 4,
+    dry_run: bool = False,
+) -> list[dict]:
+    """
+    Check tables concurrently (one job each) over a shared client.
+    A table whose job fails gets {"table", "passed": False, "error"} instead of stopping the others.
+    """
+
+    def _safe_check(table_ref: str) -> dict:
+        try:
+            return check_table(client, table_ref, tables[table_ref], dry_run=dry_run)
+        except Exception as e:
+            logger.error(f"DQ job failed for {table_ref}: {e}")
+            return {"table": table_ref, "passed": False, "error": str(e)}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tables)))) as pool:
+        return list(pool.map(_safe_check, tables))
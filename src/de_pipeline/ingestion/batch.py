@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from de_pipeline.common.logging import get_logger
+from de_pipeline.common.manifest import JsonManifest
+from de_pipeline.ingestion.downloader import download_file, download_file_split
+from de_pipeline.ingestion.incremental import is_unchanged, manifest_entry, remote_validators
+from de_pipeline.ingestion.streaming import stream_to_store
+from de_pipeline.storage.backends import ObjectStore
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class DownloadJob:
+    url: str
+    dest_path: Path
+    label: str
+    # Target object when streaming straight to object storage.
+    object_name: str | None = None
+
+
+def make_session(pool_size: int) -> requests.Session:
+    """Build a keep-alive session whose connection pool fits `pool_size` workers."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _is_retryable(exc: Exception) -> bool:
+    # 4xx (e.g. a month not published yet) will not fix itself: fail fast.
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.status_code >= 500 or exc.response.status_code == 429
+    return isinstance(exc, requests.RequestException)
+
+
+def download_with_retry(
+    job: DownloadJob,
+    session: requests.Session,
+    timeout_sec: int,
+    chunk_size: int,
+    max_retries: int,
+    backoff_sec: float,
+    split_parts: int = 1,
+    split_min_bytes: int = 0,
+    store: ObjectStore | None = None,
+    keep_local: bool = True,
+    sleep: Callable[[float], None] = time.sleep,
+) -> dict:
+    """
+    Download one job, retrying transient errors with exponential backoff.
+    With `split_parts` > 1, files of at least `split_min_bytes` are fetched
+    as parallel byte ranges. With a `store`, bytes are streamed to
+    `job.object_name` instead (plus a local copy at `job.dest_path` if `keep_local`).
+    Returns download_file metadata plus the number of attempts and the wall time
+    (retries and backoff included).
+    """
+    start = time.perf_counter()
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            if store is not None:
+                meta = stream_to_store(
+                    job.url,
+                    store,
+                    job.object_name or job.dest_path.name,
+                    timeout_sec=timeout_sec,
+                    chunk_size=chunk_size,
+                    session=session,
+                    local_copy=job.dest_path if keep_local else None,
+                )
+            elif split_parts > 1:
+                meta = download_file_split(
+                    job.url,
+                    job.dest_path,
+                    timeout_sec=timeout_sec,
+                    chunk_size=chunk_size,
+                    parts=split_parts,
+                    session=session,
+                    min_bytes=split_min_bytes,
+                )
+            else:
+                meta = download_file(
+                    job.url,
+                    job.dest_path,
+                    timeout_sec=timeout_sec,
+                    chunk_size=chunk_size,
+                    session=session,
+                )
+        except Exception as e:
+            if attempt > max_retries or not _is_retryable(e):
+                raise
+            delay = backoff_sec * 2 ** (attempt - 1)
+            logger.warning(f"Retry {attempt}/{max_retries} for {job.label} in {delay:.1f}s: {e}")
+            sleep(delay)
+            continue
+        meta["attempts"] = attempt
+        meta["elapsed_sec"] = time.perf_counter() - start
+        return meta
+
+
+def _run_job(
+    job: DownloadJob,
+    session: requests.Session,
+    timeout_sec: int,
+    chunk_size: int,
+    max_retries: int,
+    backoff_sec: float,
+    split_parts: int,
+    split_min_bytes: int,
+    manifest: JsonManifest | None,
+    store: ObjectStore | None,
+    keep_local: bool,
+) -> dict | None:
+    """Download one job unless the manifest shows the remote object is unchanged (-> None)."""
+    key = job.dest_path.name
+    if manifest is not None:
+        entry = manifest.get(key)
+        if entry and is_unchanged(entry, remote_validators(session, job.url, timeout_sec)):
+            location = entry["path"] or entry.get("uri")
+            logger.info(f"Unchanged upstream, skipping {job.label} (see {location})")
+            return None
+    meta = download_with_retry(
+        job,
+        session,
+        timeout_sec,
+        chunk_size,
+        max_retries,
+        backoff_sec,
+        split_parts=split_parts,
+        split_min_bytes=split_min_bytes,
+        store=store,
+        keep_local=keep_local,
+    )
+    if manifest is not None:
+        manifest.set(key, manifest_entry(meta))
+    return meta
+
+
+def download_many(
+    jobs: Iterable[DownloadJob],
+    max_workers: int,
+    timeout_sec: int,
+    chunk_size: int,
+    max_retries: int = 3,
+    backoff_sec: float = 2.0,
+    split_parts: int = 1,
+    split_min_bytes: int = 0,
+    session: requests.Session | None = None,
+    manifest: JsonManifest | None = None,
+    store: ObjectStore | None = None,
+    keep_local: bool = True,
+) -> dict:
+    """
+    Download jobs concurrently over one shared session.
+    A failed job is recorded in the summary and never blocks the others.
+    With a `manifest`, jobs whose remote object is unchanged since the last
+    recorded download are skipped (HEAD on ETag/Last-Modified/size), and the
+    manifest is updated and saved once all jobs are done.
+    With a `store`, files are streamed to object storage (see stream_to_store).
+    Returns a summary: ok (metadata list), skipped, failed, bytes, elapsed_sec,
+    throughput_mb_s.
+    """
+    jobs = list(jobs)
+    session = session or make_session(max_workers * max(split_parts, 1))
+    ok: list[dict] = []
+    skipped: list[str] = []
+    failed: list[dict] = []
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(
+                _run_job,
+                job,
+                session,
+                timeout_sec,
+                chunk_size,
+                max_retries,
+                backoff_sec,
+                split_parts,
+                split_min_bytes,
+                manifest,
+                store,
+                keep_local,
+            ): job
+            for job in jobs
+        }
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                meta = future.result()
+            except Exception as e:
+                logger.warning(f"Skipped {job.label}: {e}")
+                failed.append({"label": job.label, "url": job.url, "error": str(e)})
+                continue
+            if meta is None:
+                skipped.append(job.label)
+                continue
+            meta["label"] = job.label
+            ok.append(meta)
+    elapsed = time.perf_counter() - start
+    if manifest is not None:
+        manifest.save()
+
+    total_bytes = sum(m["bytes"] for m in ok)
+    summary = {
+        "ok": sorted(ok, key=lambda m: m["label"]),
+        "skipped": sorted(skipped),
+        "failed": sorted(failed, key=lambda m: m["label"]),
+        "bytes": total_bytes,
+        "elapsed_sec": elapsed,
+        "throughput_mb_s": total_bytes / 1e6 / elapsed if elapsed > 0 else 0.0,
+    }
+    logger.info(
+        f"Downloaded {len(ok)}/{len(jobs)} files ({len(skipped)} unchanged), {total_bytes} bytes "
+        f"in {elapsed:.2f}s ({summary['throughput_mb_s']:.2f} MB/s, {max_workers} workers)"
+    )
+    return summary
@@ -0,0 +1,220 @@
+"""Content-addressed store of raw files: partition folders hold hardlinks, not copies."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import defaultdict
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from de_pipeline.common.logging import get_logger
+from de_pipeline.common.manifest import JsonManifest
+from de_pipeline.storage.uploader import TEMP_SUFFIXES
+
+logger = get_logger(__name__)
+
+
+def file_md5(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BlobCache:
+    """
+    Blobs live at `<root>/<md5[:2]>/<md5>`; every partition file with the same content
+    is a hardlink to its blob, so N identical daily copies cost the disk space of one.
+    `root` must be on the same filesystem as the partitions (hardlinks); otherwise files
+    stay plain copies. An index (`<root>/index.json`) records when each blob was last
+    used, for LRU eviction.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.index = JsonManifest(root / "index.json")
+        self._lock = threading.Lock()
+
+    def blob_path(self, md5: str) -> Path:
+        return self.root / md5[:2] / md5
+
+    def blobs(self) -> list[tuple[str, Path]]:
+        return [
+            (path.name, path)
+            for path in sorted(self.root.glob("??/*"))
+            if path.is_file() and not path.name.endswith(TEMP_SUFFIXES)
+        ]
+
+    def _touch(self, md5: str, size: int) -> None:
+        now = datetime.now(UTC).isoformat()
+        entry = self.index.get(md5) or {"first_seen": now}
+        self.index.set(md5, {**entry, "bytes": size, "last_used": now})
+
+    def last_used(self, md5: str) -> datetime:
+        entry = self.index.get(md5)
+        if entry and entry.get("last_used"):
+            return datetime.fromisoformat(entry["last_used"])
+        return datetime.fromtimestamp(self.blob_path(md5).stat().st_mtime, UTC)
+
+    def adopt(self, path: Path, md5: str | None = None) -> bool:
+        """
+        Make `path` a hardlink to the blob of its content (moving its bytes into the
+        store when the content is new). Returns True when `path` now shares a blob
+        that already existed (the copy was deduplicated).
+        """
+        md5 = md5 or file_md5(path)
+        blob = self.blob_path(md5)
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        deduplicated = False
+        with self._lock:
+            try:
+                try:
+                    os.link(path, blob)
+                except FileExistsError:
+                    if not os.path.samefile(path, blob):
+                        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+                        os.link(blob, tmp)
+                        tmp.replace(path)
+                        deduplicated = True
+            except OSError as e:
+                # Autre système de fichiers : pas de lien physique, le fichier reste une copie.
+                logger.warning(f"Cache de blobs inutilisable pour {path}: {e}")
+                return False
+            self._touch(md5, blob.stat().st_size)
+        return deduplicated
+
+    def save(self) -> None:
+        self.index.save()
+
+
+def _partition_files(raw_root: Path, exclude: tuple[Path, ...]) -> list[Path]:
+    excluded = [p.resolve() for p in exclude]
+    files = []
+    for path in sorted(raw_root.rglob("*")):
+        if not path.is_file() or path.name.endswith(TEMP_SUFFIXES):
+            continue
+        resolved = path.resolve()
+        if any(resolved.is_relative_to(e) for e in excluded):
+            continue
+        files.append(path)
+    return files
+
+
+def _inode(path: Path) -> tuple[int, int]:
+    stat = path.stat()
+    return stat.st_dev, stat.st_ino
+
+
+def collect_garbage(
+    cache: BlobCache,
+    raw_root: Path,
+    max_bytes: int | None = None,
+    max_age_days: float | None = None,
+    protect: set[str] | frozenset[str] = frozenset(),
+    exclude: tuple[Path, ...] = (),
+    dry_run: bool = False,
+) -> dict:
+    """
+    Garbage-collect the local raw history under `raw_root`:
+    1. adopt files not yet in the store (existing copies become hardlinks to one blob);
+    2. drop blobs no partition links to any more;
+    3. evict blobs unused for more than `max_age_days`, then least recently used blobs
+       until the store fits in `max_bytes`. Evicting a blob deletes its partition links
+       too (that is what frees the space), and partition folders left empty.
+    Blobs whose md5 is in `protect` (e.g. the latest download of each month) are kept.
+    With `dry_run` nothing changes (files not adopted yet are left out of the sizes).
+    Returns a summary: adopted, deduplicated_bytes, orphans, evicted, freed_bytes,
+    kept_bytes, removed_paths.
+    """
+    exclude = (cache.root, *exclude)
+    files = _partition_files(raw_root, exclude)
+    blob_inodes = {_inode(path): md5 for md5, path in cache.blobs()}
+
+    adopted = 0
+    deduplicated_bytes = 0
+    for path in files:
+        if _inode(path) in blob_inodes:
+            continue
+        adopted += 1
+        if dry_run:
+            continue
+        size = path.stat().st_size
+        if cache.adopt(path):
+            deduplicated_bytes += size
+
+    links: dict[str, list[Path]] = defaultdict(list)
+    blob_inodes = {_inode(path): md5 for md5, path in cache.blobs()}
+    for path in files:
+        md5 = blob_inodes.get(_inode(path))
+        if md5:
+            links[md5].append(path)
+
+    blobs = []
+    orphans = []
+    for md5, path in cache.blobs():
+        size = path.stat().st_size
+        if not links[md5]:
+            orphans.append((md5, size))
+        else:
+            blobs.append((cache.last_used(md5), md5, size))
+
+    evicted: list[tuple[str, int]] = []
+    blobs.sort()
+    if max_age_days is not None:
+        cutoff = datetime.now(UTC) - timedelta(days=max_age_days)
+        evicted += [
+            (md5, size) for used, md5, size in blobs if used < cutoff and md5 not in protect
+        ]
+    if max_bytes is not None:
+        gone = {md5 for md5, _ in evicted}
+        total = sum(size for _, md5, size in blobs if md5 not in gone)
+        for _, md5, size in blobs:
+            if total <= max_bytes:
+                break
+            if md5 in gone or md5 in protect:
+                continue
+            evicted.append((md5, size))
+            total -= size
+
+    removed_paths: list[str] = []
+    for md5, _ in orphans + evicted:
+        targets = [*links[md5], cache.blob_path(md5)]
+        removed_paths += [str(p) for p in links[md5]]
+        if dry_run:
+            continue
+        for target in targets:
+            target.unlink(missing_ok=True)
+        cache.index.remove(md5)
+
+    if not dry_run:
+        for directory in sorted({p.parent for md5, _ in evicted for p in links[md5]}, reverse=True):
+            _remove_empty_dirs(directory, stop=raw_root)
+        cache.save()
+
+    gone = {md5 for md5, _ in orphans + evicted}
+    summary = {
+        "adopted": adopted,
+        "deduplicated_bytes": deduplicated_bytes,
+        "orphans": [md5 for md5, _ in orphans],
+        "evicted": [md5 for md5, _ in evicted],
+        "freed_bytes": deduplicated_bytes + sum(size for _, size in orphans + evicted),
+        "kept_bytes": sum(size for _, md5, size in blobs if md5 not in gone),
+        "removed_paths": removed_paths,
+        "dry_run": dry_run,
+    }
+    logger.info(
+        f"🧹 GC: {adopted} fichier(s) adopté(s), {len(summary['evicted'])} blob(s) évincé(s), "
+        f"{len(orphans)} orphelin(s), {summary['freed_bytes'] / 1e6:.1f} MB libérés, "
+        f"{summary['kept_bytes'] / 1e6:.1f} MB conservés"
+    )
+    return summary
+
+
+def _remove_empty_dirs(directory: Path, stop: Path) -> None:
+    stop = stop.resolve()
+    while directory.resolve() != stop and directory.is_dir() and not any(directory.iterdir()):
+        directory.rmdir()
+        directory = directory.parent
@@ -1,38 +1,318 @@
 from __future__ import annotations
 
-import hashlib
+import json
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import BinaryIO
 
 import requests
 
+from de_pipeline.common.checksums import Checksums, file_checksums
 from de_pipeline.common.logging import get_logger
+from de_pipeline.common.profiling import profiled
 
 logger = get_logger(__name__)
 
+# Errors raised mid-stream that a Range request can recover from.
+RESUMABLE_ERRORS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
 
-def download_file(url: str, dest_path: Path, timeout_sec: int, chunk_size: int) -> dict:
+
+def _part_path(dest_path: Path, suffix: str = ".part") -> Path:
+    return dest_path.with_name(dest_path.name + suffix)
+
+
+def _get(
+    http,
+    url: str,
+    timeout_sec: int,
+    start: int = 0,
+    end: int | None = None,
+    if_range: str | None = None,
+):
+    if not start and end is None:
+        return http.get(url, stream=True, timeout=timeout_sec)
+    headers = {"Range": f"bytes={start}-" if end is None else f"bytes={start}-{end}"}
+    if if_range:
+        # The server answers 200 with the full body if the object changed meanwhile.
+        headers["If-Range"] = if_range
+    return http.get(url, stream=True, timeout=timeout_sec, headers=headers)
+
+
+def response_validators(headers) -> dict:
+    """HTTP validators identifying one version of a remote object."""
+    return {"etag": headers.get("ETag"), "last_modified": headers.get("Last-Modified")}
+
+
+def _if_range(validators: dict) -> str | None:
+    return validators.get("etag") or validators.get("last_modified")
+
+
+def _read_validators(path: Path) -> dict | None:
+    """Validators stored next to a .part, None when missing, unreadable or empty."""
+    try:
+        validators = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+    return validators if isinstance(validators, dict) and _if_range(validators) else None
+
+
+def stream_url(
+    http,
+    url: str,
+    sinks: Sequence[BinaryIO],
+    timeout_sec: int,
+    chunk_size: int,
+    offset: int = 0,
+    checksums: Checksums | None = None,
+    max_resumes: int = 3,
+    restart: Callable[[], None] | None = None,
+    validators: dict | None = None,
+    on_validators: Callable[[dict], None] | None = None,
+) -> tuple[int, Checksums, dict]:
+    """
+    Stream `url` from byte `offset` into every sink while computing md5 and crc32c
+    (`checksums` carries those of the first `offset` bytes, `validators` the version
+    they came from, sent as If-Range).
+    A drop that made progress is resumed with an HTTP Range request. When the
+    server cannot serve the range, `restart` must rewind all sinks; without it
+    the call fails, since bytes already sent (e.g. to an upload) cannot be taken back.
+    `on_validators` gets the validators of each response before its bytes are written.
+    Returns (bytes, checksums, validators).
+    """
+    checksums = checksums or Checksums()
+    resumes = 0
+    validators = validators or {"etag": None, "last_modified": None}
+    while True:
+        received_before = offset
+        try:
+            with _get(http, url, timeout_sec, start=offset, if_range=_if_range(validators)) as r:
+                r.raise_for_status()
+                validators = response_validators(r.headers)
+                if offset and r.status_code != 206:
+                    if restart is None:
+                        raise OSError(f"Server ignored the Range request for {url}, cannot resume")
+                    logger.warning("Server ignored the Range request, restarting from byte 0")
+                    restart()
+                    offset, checksums = 0, Checksums()
+                if on_validators:
+                    on_validators(validators)
+                for chunk in r.iter_content(chunk_size=chunk_size):
+                    if not chunk:
+                        continue
+                    for sink in sinks:
+                        sink.write(chunk)
+                    checksums.update(chunk)
+                    offset += len(chunk)
+            return offset, checksums, validators
+        except requests.HTTPError as e:
+            # 416: the partial data does not match the remote object anymore.
+            if offset and restart and e.response is not None and e.response.status_code == 416:
+                logger.warning("Partial download is not satisfiable, restarting from byte 0")
+                restart()
+                offset, checksums = 0, Checksums()
+                continue
+            raise
+        except RESUMABLE_ERRORS as e:
+            # Only a drop that made progress is resumed right away; connection
+            # failures are left to the caller's retry/backoff policy.
+            if offset == received_before or resumes >= max_resumes:
+                raise
+            resumes += 1
+            logger.warning(
+                f"Interrupted at {offset} bytes, resuming ({resumes}/{max_resumes}): {e}"
+            )
+
+
+@profiled()
+def download_file(
+    url: str,
+    dest_path: Path,
+    timeout_sec: int,
+    chunk_size: int,
+    session: requests.Session | None = None,
+    max_resumes: int = 3,
+) -> dict:
     """
     Download a file with streaming to disk.
-    Returns metadata: bytes, md5.
+    Bytes go to `<dest>.part` first; after a dropped connection (or a leftover
+    .part from an earlier attempt) the download continues with an HTTP Range request.
+    The ETag/Last-Modified of the .part are kept in `<dest>.part.json` and sent as
+    If-Range, so a leftover .part of an object changed since is restarted, not completed
+    with the new bytes; a .part without them is discarded.
+    Pass a shared `session` to reuse keep-alive connections across calls.
+    md5 and crc32c are computed while the bytes arrive (the file is never read back,
+    except a leftover .part).
+    Returns metadata: bytes, md5, crc32c, etag, last_modified.
     """
     dest_path.parent.mkdir(parents=True, exist_ok=True)
+    part_path = _part_path(dest_path)
+    validators_path = _part_path(dest_path, ".part.json")
+    http = session or requests
 
     logger.info(f"Downloading: {url}")
     logger.info(f"To: {dest_path}")
 
-    md5 = hashlib.md5()
-    total_bytes = 0
+    validators = _read_validators(validators_path) if part_path.exists() else None
+    if part_path.exists() and validators is None:
+        logger.warning("Partial download without ETag/Last-Modified, restarting from byte 0")
+        part_path.unlink()
+    if part_path.exists():
+        total_bytes, checksums = file_checksums(part_path, chunk_size)
+        logger.info(f"Found partial download ({total_bytes} bytes), resuming")
+    else:
+        total_bytes, checksums = 0, Checksums()
+
+    def keep_validators(current: dict) -> None:
+        validators_path.write_text(json.dumps(current))
+
+    with open(part_path, "ab") as f:
+
+        def restart() -> None:
+            f.seek(0)
+            f.truncate()
+
+        total_bytes, checksums, validators = stream_url(
+            http,
+            url,
+            [f],
+            timeout_sec,
+            chunk_size,
+            offset=total_bytes,
+            checksums=checksums,
+            max_resumes=max_resumes,
+            restart=restart,
+            validators=validators,
+            on_validators=keep_validators,
+        )
+    part_path.replace(dest_path)
+    validators_path.unlink(missing_ok=True)
+
+    meta = {
+        "url": url,
+        "path": str(dest_path),
+        "bytes": total_bytes,
+        **checksums.as_dict(),
+        **validators,
+    }
+    logger.info(f"Done: {total_bytes} bytes, md5={meta['md5']}")
+    return meta
+
+
+def _fetch_range(
+    http,
+    url: str,
+    path: Path,
+    start: int,
+    end: int,
+    timeout_sec: int,
+    chunk_size: int,
+    max_resumes: int,
+    if_range: str | None = None,
+) -> None:
+    """Write bytes [start, end] of `url` at the same offsets of `path`, resuming on drops."""
+    pos = start
+    resumes = 0
+    with open(path, "r+b") as f:
+        while pos <= end:
+            received_before = pos
+            try:
+                with _get(http, url, timeout_sec, start=pos, end=end, if_range=if_range) as r:
+                    r.raise_for_status()
+                    if r.status_code != 206:
+                        raise requests.HTTPError(
+                            f"Range request not honoured for {url}", response=r
+                        )
+                    f.seek(pos)
+                    for chunk in r.iter_content(chunk_size=chunk_size):
+                        if not chunk:
+                            continue
+                        # Seul un chunk qui déborde de la plage est tronqué, via une vue (sans copie).
+                        if pos + len(chunk) > end + 1:
+                            chunk = memoryview(chunk)[: end + 1 - pos]
+                        f.write(chunk)
+                        pos += len(chunk)
+            except RESUMABLE_ERRORS:
+                if pos == received_before or resumes >= max_resumes:
+                    raise
+                resumes += 1
+                continue
+            if pos <= end:
+                raise OSError(f"Short read for {url}: range ended at byte {pos}, expected {end}")
+
+
+def download_file_split(
+    url: str,
+    dest_path: Path,
+    timeout_sec: int,
+    chunk_size: int,
+    parts: int,
+    session: requests.Session | None = None,
+    min_bytes: int = 0,
+    max_resumes: int = 3,
+) -> dict:
+    """
+    Download one large file as `parts` byte ranges fetched in parallel.
+    Falls back to download_file when the server does not advertise byte
+    ranges or the file is smaller than `min_bytes`.
+    Returns the same metadata as download_file (md5 and crc32c are computed in one
+    pass over the reassembled file).
+    """
+    http = session or requests
+    head = http.head(url, timeout=timeout_sec, allow_redirects=True)
+    head.raise_for_status()
+    size = int(head.headers.get("Content-Length") or 0)
+    if parts <= 1 or head.headers.get("Accept-Ranges") != "bytes" or size < max(min_bytes, parts):
+        return download_file(
+            url, dest_path, timeout_sec, chunk_size, session=session, max_resumes=max_resumes
+        )
+
+    dest_path.parent.mkdir(parents=True, exist_ok=True)
+    split_path = _part_path(dest_path, ".split")
+    logger.info(f"Downloading: {url} ({size} bytes in {parts} ranges)")
+    logger.info(f"To: {dest_path}")
+
+    with open(split_path, "wb") as f:
+        f.truncate(size)
+
+    step = -(-size // parts)
+    ranges = [(start, min(start + step, size) - 1) for start in range(0, size, step)]
+    try:
+        with ThreadPoolExecutor(max_workers=len(ranges)) as pool:
+            futures = [
+                pool.submit(
+                    _fetch_range,
+                    http,
+                    url,
+                    split_path,
+                    start,
+                    end,
+                    timeout_sec,
+                    chunk_size,
+                    max_resumes,
+                    head.headers.get("ETag"),
+                )
+                for start, end in ranges
+            ]
+            for future in futures:
+                future.result()
+    except Exception:
+        split_path.unlink(missing_ok=True)
+        raise
 
-    with requests.get(url, stream=True, timeout=timeout_sec) as r:
-        r.raise_for_status()
-        with open(dest_path, "wb") as f:
-            for chunk in r.iter_content(chunk_size=chunk_size):
-                if not chunk:
-                    continue
-                f.write(chunk)
-                md5.update(chunk)
-                total_bytes += len(chunk)
+    total_bytes, checksums = file_checksums(split_path, chunk_size)
+    split_path.replace(dest_path)
 
-    meta = {"url": url, "path": str(dest_path), "bytes": total_bytes, "md5": md5.hexdigest()}
+    meta = {
+        "url": url,
+        "path": str(dest_path),
+        "bytes": total_bytes,
+        **checksums.as_dict(),
+        **response_validators(head.headers),
+    }
     logger.info(f"Done: {total_bytes} bytes, md5={meta['md5']}")
     return meta
@@ -0,0 +1,356 @@
+"""Trip fingerprints and a persistent per-pickup-month index of the trips already loaded."""
+
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from de_pipeline.common.logging import get_logger
+from de_pipeline.common.manifest import JsonManifest
+from de_pipeline.common.schemas import GREEN_TRIPDATA_COLUMNS
+from de_pipeline.ingestion.normalize import _RowGroupWriter, arrow_schema, conform_batch
+
+logger = get_logger(__name__)
+
+# Index file of the trips without pickup time.
+NO_PICKUP = "none"
+# Stand-in hash of a null value (differs from every hash of 0 / "" / 0.0).
+_NULL_HASH = np.uint64(0x5BD1E9955BD1E995)
+# One row of a file as spilled by dedup_file: fingerprint, row number, pickup month.
+_SPILL_DTYPE = np.dtype([("fingerprint", np.uint64), ("row", np.int64), ("month", np.int32)])
+
+
+def _mix(values: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer: spreads every input bit over the 64 output bits."""
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xBF58476D1CE4E5B9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def _column_hashes(column: pa.Array) -> np.ndarray:
+    if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+        values = column.fill_null("").to_numpy(zero_copy_only=False).astype(object)
+        hashes = pd.util.hash_array(values, categorize=False)
+    elif pa.types.is_floating(column.type):
+        # -0.0 == 0.0 : même empreinte.
+        values = column.fill_null(0.0).to_numpy(zero_copy_only=False) + 0.0
+        hashes = _mix(values.astype(np.float64).view(np.uint64))
+    else:
+        # Entiers et timestamps : leur valeur entière (int64) suffit.
+        values = pc.cast(column, pa.int64()).fill_null(0).to_numpy(zero_copy_only=False)
+        hashes = _mix(values.view(np.uint64))
+    if column.null_count:
+        hashes = np.where(column.is_null().to_numpy(zero_copy_only=False), _NULL_HASH, hashes)
+    return hashes
+
+
+def trip_fingerprints(
+    batch: pa.RecordBatch, columns: list[tuple[str, str]] = GREEN_TRIPDATA_COLUMNS
+) -> np.ndarray:
+    """
+    64-bit fingerprint (uint64) of each trip over the canonical `columns`, computed
+    column by column with numpy. The batch is conformed first, so a month published
+    with other physical types (int vs float ids, ns timestamps) gives the same values.
+    """
+    batch = conform_batch(batch, arrow_schema(columns))
+    fingerprints = np.full(batch.num_rows, np.uint64(len(columns)), dtype=np.uint64)
+    for column in batch.columns:
+        fingerprints = _mix(fingerprints * np.uint64(0x9E3779B97F4A7C15) + _column_hashes(column))
+    return fingerprints
+
+
+def trip_ids(fingerprints: np.ndarray) -> np.ndarray:
+    """Fingerprints as signed 64-bit ids (INT64 column type): the stable trip_id."""
+    return fingerprints.view(np.int64)
+
+
+def _pickup_months(batch: pa.RecordBatch, pickup_column: str) -> np.ndarray:
+    """Pickup month of each row as year * 100 + month (0 without pickup time)."""
+    pickup = batch.column(pickup_column)
+    months = pc.add(pc.multiply(pc.year(pickup), 100), pc.month(pickup))
+    return pc.fill_null(months, 0).to_numpy(zero_copy_only=False).astype(np.int32)
+
+
+def _month_name(month: int) -> str:
+    return f"{month // 100:04d}-{month % 100:02d}" if month else NO_PICKUP
+
+
+class FingerprintIndex:
+    """
+    Fingerprints of the trips already loaded for one service, one file per pickup month
+    (`pickup_month=YYYY-MM.npz`): the sorted fingerprints and the source file month
+    (YYYYMM) that loaded each one. Checking a file only reads the months its trips fall
+    in, so the cost follows the new data, not the size of the history.
+    `sources.json` keeps the pickup months of each source file, so a reload of that file
+    replaces its fingerprints without scanning every month.
+    The trips a file is about to load are staged under `pending/source=YYYYMM/` and only
+    committed to the index once its load succeeded: a failed upload or load never marks
+    trips as loaded.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.sources = JsonManifest(root / "sources.json")
+        # Mois modifiés et pas encore écrits ; les autres sont relus du disque (pas de cache).
+        self._months: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        # Mois en mémoire et commits partagés entre les threads du run.
+        self.lock = threading.RLock()
+
+    def _path(self, month: str) -> Path:
+        return self.root / f"pickup_month={month}.npz"
+
+    def _load(self, month: str) -> tuple[np.ndarray, np.ndarray]:
+        if month in self._months:
+            return self._months[month]
+        path = self._path(month)
+        if path.exists():
+            with np.load(path) as data:
+                return data["fingerprints"], data["sources"]
+        return np.empty(0, np.uint64), np.empty(0, np.int32)
+
+    def owners(self, month: str, fingerprints: np.ndarray, cache: dict | None = None) -> np.ndarray:
+        """
+        Source (YYYYMM) that loaded each fingerprint of `month`, 0 when never loaded.
+        With `cache` (owned by the caller), the month is read from disk once per cache.
+        """
+        if cache is not None and month in cache:
+            known, sources = cache[month]
+        else:
+            with self.lock:
+                known, sources = self._load(month)
+            if cache is not None:
+                cache[month] = (known, sources)
+        if not known.size:
+            return np.zeros(fingerprints.size, np.int32)
+        pos = np.searchsorted(known, fingerprints).clip(max=known.size - 1)
+        return np.where(known[pos] == fingerprints, sources[pos], 0).astype(np.int32)
+
+    def replace(self, source: int, month: str, fingerprints: np.ndarray) -> None:
+        """Make `fingerprints` the trips of `month` loaded by `source` (drops its previous ones)."""
+        with self.lock:
+            known, sources = self._load(month)
+            keep = sources != source
+            merged = np.concatenate([known[keep], fingerprints.astype(np.uint64)])
+            owner = np.concatenate([sources[keep], np.full(fingerprints.size, source, np.int32)])
+            order = np.argsort(merged, kind="stable")
+            self._months[month] = (merged[order], owner[order])
+
+    def _write(self, month: str) -> None:
+        """Write a modified month and drop it from memory."""
+        known, sources = self._months.pop(month)
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self._path(month)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, fingerprints=known, sources=sources)
+        tmp.replace(path)
+
+    def save(self) -> None:
+        with self.lock:
+            for month in sorted(self._months):
+                self._write(month)
+            self.sources.save()
+
+    def _pending_dir(self, source: int) -> Path:
+        return self.root / "pending" / f"source={source}"
+
+    def recorded(self, source: int) -> bool:
+        """True when trips of `source` are staged or committed (its file was deduplicated)."""
+        with self.lock:
+            return self._pending_dir(source).is_dir() or self.sources.get(str(source)) is not None
+
+    @contextmanager
+    def stage(self, source: int) -> Iterator:
+        """
+        Stage the trips `source` is about to load: yields `add(month, fingerprints)`, which
+        appends to the pickup month's pending file. Published on success (replacing what
+        was staged before for `source`), dropped on error.
+        """
+        pending = self._pending_dir(source)
+        tmp = pending.with_name(f"{pending.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+
+        def add(month: str, fingerprints: np.ndarray) -> None:
+            with open(tmp / f"pickup_month={month}.bin", "ab") as f:
+                fingerprints.astype(np.uint64, copy=False).tofile(f)
+
+        try:
+            yield add
+            with self.lock:
+                shutil.rmtree(pending, ignore_errors=True)
+                tmp.rename(pending)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+    def commit(self, source: int, file: str | None = None) -> dict:
+        """
+        Record the trips staged by `source` as loaded by it, once its load succeeded (one
+        pickup month in memory at a time), replacing those it loaded before. A no-op when
+        nothing is staged. Returns: source, rows, overlap (trips another source also loaded).
+        """
+        pending = self._pending_dir(source)
+        with self.lock:
+            if not pending.is_dir():
+                return {"source": source, "rows": 0, "overlap": 0}
+            staged = {
+                path.name.removeprefix("pickup_month=").removesuffix(".bin"): path
+                for path in pending.glob("pickup_month=*.bin")
+            }
+            previous = (self.sources.get(str(source)) or {}).get("months", [])
+            rows = overlap = 0
+            # Mois que cette source avait chargés et qu'elle ne touche plus : vidés d'elle.
+            for name in sorted({*previous, *staged}):
+                fingerprints = np.empty(0, np.uint64)
+                if name in staged:
+                    fingerprints = np.unique(np.fromfile(staged[name], dtype=np.uint64))
+                owners = self.owners(name, fingerprints)
+                overlap += int(((owners != 0) & (owners != source)).sum())
+                self.replace(source, name, fingerprints)
+                self._write(name)
+                rows += fingerprints.size
+            self.sources.set(str(source), {"file": file, "months": sorted(staged)})
+            self.sources.save()
+            shutil.rmtree(pending)
+        if overlap:
+            logger.warning(
+                f"{overlap} trip(s) of {source} were also loaded by another month "
+                "(files deduplicated before either was loaded)"
+            )
+        return {"source": source, "rows": rows, "overlap": overlap}
+
+
+def _rewrite(path: Path, parquet: pq.ParquetFile, dropped: np.ndarray, batch_size: int) -> None:
+    """Rewrite `path` as is (schema, metadata, row group size) without the `dropped` rows (sorted)."""
+    schema = parquet.schema_arrow
+    row_group_size = parquet.metadata.row_group(0).num_rows
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.dedup.tmp")
+    offset = 0
+    try:
+        with pq.ParquetWriter(tmp, schema, compression="zstd") as writer:
+            out = _RowGroupWriter(writer, row_group_size)
+            for batch in parquet.iter_batches(batch_size=batch_size):
+                lo, hi = np.searchsorted(dropped, [offset, offset + batch.num_rows])
+                keep = np.ones(batch.num_rows, dtype=bool)
+                keep[dropped[lo:hi] - offset] = False
+                offset += batch.num_rows
+                out.write(pa.Table.from_batches([batch.filter(pa.array(keep))], schema))
+            out.close()
+        parquet.close()
+        tmp.replace(path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def _spill(
+    parquet: pq.ParquetFile,
+    spill_dir: Path,
+    columns: list[tuple[str, str]],
+    pickup_column: str,
+    batch_size: int,
+    buckets: int,
+) -> None:
+    """
+    Fingerprint, row number and pickup month of every row, one batch at a time, into
+    `buckets` files by the top bits of the fingerprint.
+    """
+    shift = np.uint64(64 - max(1, (buckets - 1).bit_length()))
+    schema = arrow_schema(columns)
+    offset = 0
+    for batch in parquet.iter_batches(batch_size=batch_size):
+        batch = conform_batch(batch, schema)
+        records = np.empty(batch.num_rows, _SPILL_DTYPE)
+        records["fingerprint"] = trip_fingerprints(batch, columns)
+        records["row"] = np.arange(offset, offset + batch.num_rows)
+        records["month"] = _pickup_months(batch, pickup_column)
+        offset += batch.num_rows
+        bucket_of = records["fingerprint"] >> shift
+        for bucket in np.unique(bucket_of):
+            with open(spill_dir / f"{int(bucket)}.bin", "ab") as f:
+                records[bucket_of == bucket].tofile(f)
+
+
+def dedup_file(
+    path: Path,
+    index: FingerprintIndex,
+    source: int,
+    columns: list[tuple[str, str]] = GREEN_TRIPDATA_COLUMNS,
+    pickup_column: str = "lpep_pickup_datetime",
+    batch_size: int = 65_536,
+    buckets: int = 64,
+) -> dict:
+    """
+    Drop from `path` (in place) the trips repeated within the file and those another
+    source file already loaded, then stage the trips kept for `source` (the file month,
+    YYYYMM); `index.commit(source)` records them once the file is loaded. Reprocessing
+    the same source keeps its trips, so a retried or reloaded month is not emptied.
+    Memory stays bounded: fingerprints are spilled to `buckets` temporary files by their
+    top bits (as dq.engine.DuplicateCounter) and checked one bucket at a time; only the
+    numbers of the dropped rows are kept. The file is only rewritten when rows are dropped.
+    Returns: path, rows, duplicates (within the file), already_loaded, elapsed_sec.
+    """
+    start = time.perf_counter()
+    parquet = pq.ParquetFile(path, memory_map=True)
+    total = parquet.metadata.num_rows
+    spill_dir = Path(tempfile.mkdtemp(prefix="dedup_"))
+    duplicates = already_loaded = 0
+    dropped: list[np.ndarray] = []
+    # Mois de l'index lus pour ce fichier seulement : libérés à la fin.
+    months: dict = {}
+    try:
+        _spill(parquet, spill_dir, columns, pickup_column, batch_size, buckets)
+        with index.stage(source) as stage:
+            for bucket in sorted(spill_dir.glob("*.bin")):
+                records = np.fromfile(bucket, dtype=_SPILL_DTYPE)
+                # Par empreinte, la première ligne du fichier est gardée.
+                records = records[np.lexsort((records["row"], records["fingerprint"]))]
+                first = np.ones(records.size, dtype=bool)
+                first[1:] = records["fingerprint"][1:] != records["fingerprint"][:-1]
+                duplicates += int(records.size - first.sum())
+                dropped.append(records["row"][~first])
+                records = records[first]
+                for month in np.unique(records["month"]):
+                    trips = records[records["month"] == month]
+                    name = _month_name(int(month))
+                    owners = index.owners(name, trips["fingerprint"], months)
+                    loaded = (owners != 0) & (owners != source)
+                    already_loaded += int(loaded.sum())
+                    dropped.append(trips["row"][loaded])
+                    stage(name, trips["fingerprint"][~loaded])
+            # Trips publiés (en attente du chargement) une fois le fichier réécrit.
+            dropped = np.sort(np.concatenate(dropped)) if dropped else np.empty(0, np.int64)
+            if dropped.size:
+                _rewrite(path, parquet, dropped, batch_size)
+    finally:
+        shutil.rmtree(spill_dir, ignore_errors=True)
+        parquet.close()
+
+    report = {
+        "path": str(path),
+        "rows": total - int(dropped.size),
+        "duplicates": duplicates,
+        "already_loaded": already_loaded,
+        "elapsed_sec": time.perf_counter() - start,
+    }
+    logger.info(
+        f"Dedup {path.name}: {report['rows']} trips kept, {duplicates} duplicate(s) in the "
+        f"file, {already_loaded} already loaded by another month, "
+        f"in {report['elapsed_sec']:.2f}s"
+    )
+    return report
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import re
+from datetime import UTC, datetime
+
+import requests
+
+from de_pipeline.ingestion.downloader import response_validators
+
+_MONTH_IN_NAME = re.compile(r"(\d{4})-(\d{2})\.parquet$")
+
+
+def remote_validators(http, url: str, timeout_sec: int) -> dict | None:
+    """
+    HEAD the remote object and return its validators (etag, last_modified, bytes).
+    Returns None when the object cannot be checked, so callers fall back to downloading.
+    """
+    try:
+        r = http.head(url, timeout=timeout_sec, allow_redirects=True)
+        r.raise_for_status()
+    except requests.RequestException:
+        return None
+    size = r.headers.get("Content-Length")
+    return {**response_validators(r.headers), "bytes": int(size) if size else None}
+
+
+def is_unchanged(entry: dict | None, remote: dict | None) -> bool:
+    """True when the manifest entry provably describes the current remote object."""
+    if not entry or not remote:
+        return False
+    if remote.get("bytes") is not None and entry.get("bytes") != remote["bytes"]:
+        return False
+    if remote.get("etag") and entry.get("etag"):
+        return entry["etag"] == remote["etag"]
+    if remote.get("last_modified") and entry.get("last_modified"):
+        return entry["last_modified"] == remote["last_modified"]
+    return False
+
+
+def manifest_entry(meta: dict) -> dict:
+    """Manifest record for one downloaded object, built from download_file metadata."""
+    return {
+        "url": meta["url"],
+        "path": meta["path"],
+        "uri": meta.get("uri"),
+        "bytes": meta["bytes"],
+        "md5": meta["md5"],
+        "crc32c": meta.get("crc32c"),
+        "etag": meta.get("etag"),
+        "last_modified": meta.get("last_modified"),
+        "fetched_at": datetime.now(UTC).isoformat(),
+    }
+
+
+def months_in_partition(entries: dict[str, dict], partition: str) -> list[tuple[int, int]]:
+    """
+    (year, month) of the manifest entries whose latest download landed in
+    `partition` (e.g. "ingestion_date=2024-06-02"): the months a run actually changed.
+    """
+    months = set()
+    for key, entry in entries.items():
+        match = _MONTH_IN_NAME.search(key)
+        location = entry.get("uri") or entry["path"].replace("\\", "/")
+        if match and f"/{partition}/" in location:
+            months.add((int(match.group(1)), int(match.group(2))))
+    return sorted(months)
@@ -0,0 +1,266 @@
+"""Rewrite raw TLC parquet into one canonical Arrow schema, a record batch at a time."""
+
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from de_pipeline.common.logging import get_logger
+from de_pipeline.common.schemas import GREEN_TRIPDATA_COLUMNS, TRIP_ID_COLUMN
+
+logger = get_logger(__name__)
+
+# Physical type of each pinned BigQuery type (timestamps without time zone, as published).
+ARROW_TYPES = {
+    "INT64": pa.int64(),
+    "FLOAT64": pa.float64(),
+    "STRING": pa.string(),
+    "TIMESTAMP": pa.timestamp("us"),
+}
+
+# Schema metadata marking a rewritten file (bump the version when the layout changes).
+NORMALIZED_KEY = b"de_pipeline.normalized"
+NORMALIZED_VERSION = b"2"
+
+
+def arrow_schema(columns: list[tuple[str, str]]) -> pa.Schema:
+    """Canonical Arrow schema of (name, BigQuery type) pairs, every field nullable."""
+    return pa.schema([(name, ARROW_TYPES[field_type]) for name, field_type in columns])
+
+
+def normalized_schema(columns: list[tuple[str, str]] = GREEN_TRIPDATA_COLUMNS) -> pa.Schema:
+    """Schema of a normalized file: the canonical columns, then the trip_id."""
+    return arrow_schema([*columns, TRIP_ID_COLUMN])
+
+
+def is_normalized(path: Path, columns: list[tuple[str, str]] = GREEN_TRIPDATA_COLUMNS) -> bool:
+    """True when `path` was already rewritten to the canonical schema of `columns`."""
+    schema = pq.read_schema(path)
+    return (schema.metadata or {}).get(NORMALIZED_KEY) == NORMALIZED_VERSION and schema.equals(
+        normalized_schema(columns)
+    )
+
+
+def conform_batch(batch: pa.RecordBatch, schema: pa.Schema) -> pa.RecordBatch:
+    """
+    Cast `batch` to `schema`: columns in schema order, missing ones all-null, extra
+    ones dropped. int/float drift and null-typed columns are cast safely (a fractional
+    id fails instead of being truncated); timestamps may lose sub-microsecond digits.
+    """
+    arrays = []
+    for field in schema:
+        index = batch.schema.get_field_index(field.name)
+        if index < 0:
+            arrays.append(pa.nulls(batch.num_rows, field.type))
+            continue
+        column = batch.column(index)
+        if column.type != field.type:
+            column = pc.cast(column, field.type, safe=not pa.types.is_timestamp(field.type))
+        arrays.append(column)
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def with_trip_id(batch: pa.RecordBatch, columns: list[tuple[str, str]]) -> pa.RecordBatch:
+    """`batch` conformed to `columns`, plus its trip_id (fingerprint of the canonical row)."""
+    from de_pipeline.ingestion.fingerprint import trip_fingerprints, trip_ids
+
+    batch = conform_batch(batch, arrow_schema(columns))
+    ids = pa.array(trip_ids(trip_fingerprints(batch, columns)), pa.int64())
+    return pa.RecordBatch.from_arrays([*batch.columns, ids], schema=normalized_schema(columns))
+
+
+class _RowGroupWriter:
+    """Buffers tables and writes them as row groups of exactly `row_group_size` rows."""
+
+    def __init__(self, writer: pq.ParquetWriter, row_group_size: int) -> None:
+        self.writer = writer
+        self.row_group_size = row_group_size
+        self._pending: list[pa.Table] = []
+        self._rows = 0
+        self.row_groups = 0
+
+    def write(self, table: pa.Table) -> None:
+        if table.num_rows:
+            self._pending.append(table)
+            self._rows += table.num_rows
+        while self._rows >= self.row_group_size:
+            self._flush(self.row_group_size)
+
+    def close(self) -> None:
+        if self._rows:
+            self._flush(self._rows)
+
+    def _flush(self, rows: int) -> None:
+        table = pa.concat_tables(self._pending)
+        self.writer.write_table(table.slice(0, rows), row_group_size=rows)
+        self.row_groups += 1
+        rest = table.slice(rows)
+        self._pending = [rest] if rest.num_rows else []
+        self._rows = rest.num_rows
+
+
+def _sorted_runs(
+    parquet: pq.ParquetFile,
+    columns: list[tuple[str, str]],
+    schema: pa.Schema,
+    sort_by: str,
+    run_rows: int,
+    batch_size: int,
+):
+    """Yield conformed tables of at most `run_rows` rows, each sorted by `sort_by`."""
+    pending: list[pa.RecordBatch] = []
+    rows = 0
+    for batch in parquet.iter_batches(batch_size=batch_size):
+        pending.append(with_trip_id(batch, columns).replace_schema_metadata(schema.metadata))
+        rows += batch.num_rows
+        if rows >= run_rows:
+            yield pa.Table.from_batches(pending, schema).sort_by(sort_by)
+            pending, rows = [], 0
+    if pending:
+        yield pa.Table.from_batches(pending, schema).sort_by(sort_by)
+
+
+def _merge_runs(runs_path: Path, sort_by: str, batch_size: int, out: _RowGroupWriter) -> None:
+    """
+    k-way merge of the sorted runs (one row group each) of `runs_path`, holding one
+    batch per run: rows up to the smallest "last loaded key" of the runs not fully read
+    yet can no longer be preceded by an unread row, so they are emitted.
+    """
+    parquet = pq.ParquetFile(runs_path, memory_map=True)
+    readers = [
+        parquet.iter_batches(batch_size=batch_size, row_groups=[i])
+        for i in range(parquet.num_row_groups)
+    ]
+    pending: list[pa.Table | None] = [None] * len(readers)
+    done = [False] * len(readers)
+    while True:
+        for i, reader in enumerate(readers):
+            if not done[i] and (pending[i] is None or pending[i].num_rows == 0):
+                batch = next(reader, None)
+                if batch is None:
+                    done[i] = True
+                else:
+                    pending[i] = pa.Table.from_batches([batch])
+        live = [t for t in pending if t is not None and t.num_rows]
+        if not live:
+            return
+        bounds = [
+            pending[i].column(sort_by)[-1]
+            for i in range(len(readers))
+            if not done[i] and pending[i] is not None and pending[i].num_rows
+        ]
+        threshold = min(bounds, key=lambda s: s.as_py()) if bounds else None
+        emitted = []
+        for i, table in enumerate(pending):
+            if table is None or not table.num_rows:
+                continue
+            if threshold is None:
+                emitted.append(table)
+                pending[i] = None
+                continue
+            mask = pc.less_equal(table.column(sort_by), threshold)
+            emitted.append(table.filter(mask))
+            pending[i] = table.filter(pc.invert(mask))
+        out.write(pa.concat_tables(emitted).sort_by(sort_by))
+
+
+def normalize_parquet(
+    src: Path,
+    dest: Path | None = None,
+    columns: list[tuple[str, str]] = GREEN_TRIPDATA_COLUMNS,
+    sort_by: str | None = "lpep_pickup_datetime",
+    row_group_size: int = 1_000_000,
+    sort_run_rows: int = 2_000_000,
+    batch_size: int = 65_536,
+    compression: str = "zstd",
+    compression_level: int | None = None,
+) -> dict:
+    """
+    Rewrite `src` (in place by default) with the canonical schema of `columns` plus the
+    trip_id of each row, sorted by `sort_by` (null keys last), in row groups of
+    `row_group_size` rows.
+    Memory is bounded by `sort_run_rows`: larger files are sorted as runs spilled to a
+    temporary parquet next to `dest`, then merged batch by batch.
+    Returns: path, rows, row_groups, bytes_in, bytes_out, elapsed_sec.
+    """
+    start = time.perf_counter()
+    dest = dest or src
+    schema = normalized_schema(columns).with_metadata({NORMALIZED_KEY: NORMALIZED_VERSION})
+    bytes_in = src.stat().st_size
+    tmp = dest.with_name(f"{dest.name}.{os.getpid()}.tmp")
+    runs_path = dest.with_name(f"{dest.name}.{os.getpid()}.runs.tmp")
+    nulls_path = dest.with_name(f"{dest.name}.{os.getpid()}.nulls.tmp")
+    parquet = pq.ParquetFile(src, memory_map=True)
+    writer = pq.ParquetWriter(
+        tmp, schema, compression=compression, compression_level=compression_level
+    )
+    out = _RowGroupWriter(writer, row_group_size)
+    rows = 0
+    try:
+        if sort_by is None:
+            for batch in parquet.iter_batches(batch_size=batch_size):
+                batch = with_trip_id(batch, columns)
+                out.write(pa.Table.from_batches([batch.replace_schema_metadata(schema.metadata)]))
+                rows += batch.num_rows
+        else:
+            runs = _sorted_runs(parquet, columns, schema, sort_by, sort_run_rows, batch_size)
+            first = next(runs, None)
+            second = next(runs, None)
+            if second is None:
+                # Fits in one run: no spill.
+                if first is not None:
+                    out.write(first)
+                    rows = first.num_rows
+            else:
+                # Null keys cannot be merged (no order): spilled apart, appended last.
+                spill = pq.ParquetWriter(runs_path, schema, compression="lz4")
+                null_spill = None
+                try:
+                    for run in (first, second, *runs):
+                        rows += run.num_rows
+                        keyed = run.filter(pc.is_valid(run.column(sort_by)))
+                        if keyed.num_rows:
+                            spill.write_table(keyed, row_group_size=keyed.num_rows)
+                        if keyed.num_rows < run.num_rows:
+                            null_spill = null_spill or pq.ParquetWriter(nulls_path, schema)
+                            null_spill.write_table(run.filter(pc.is_null(run.column(sort_by))))
+                finally:
+                    spill.close()
+                    if null_spill is not None:
+                        null_spill.close()
+                _merge_runs(runs_path, sort_by, batch_size, out)
+                if null_spill is not None:
+                    for batch in pq.ParquetFile(nulls_path).iter_batches(batch_size=batch_size):
+                        out.write(pa.Table.from_batches([batch]))
+        out.close()
+        writer.close()
+        parquet.close()
+        tmp.replace(dest)
+    except BaseException:
+        writer.close()
+        parquet.close()
+        tmp.unlink(missing_ok=True)
+        raise
+    finally:
+        runs_path.unlink(missing_ok=True)
+        nulls_path.unlink(missing_ok=True)
+
+    report = {
+        "path": str(dest),
+        "rows": rows,
+        "row_groups": out.row_groups,
+        "bytes_in": bytes_in,
+        "bytes_out": dest.stat().st_size,
+        "elapsed_sec": time.perf_counter() - start,
+    }
+    logger.info(
+        f"Normalized {src.name}: {rows} rows, {out.row_groups} row group(s), "
+        f"{bytes_in / 1e6:.1f} -> {report['bytes_out'] / 1e6:.1f} MB "
+        f"in {report['elapsed_sec']:.2f}s"
+    )
+    return report
@@ -0,0 +1,117 @@
+"""Read ingested trips with pyarrow datasets: month pruning, projection and predicate pushdown."""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+
+from de_pipeline.common.services import GREEN, TripService
+from de_pipeline.ingestion.normalize import arrow_schema
+
+_MONTH_FILE = re.compile(r"^(?P<prefix>.*?)(?P<year>\d{4})-(?P<month>\d{2})\.parquet$")
+
+Month = tuple[int, int]
+
+
+def _month_key(month: Month | str) -> Month:
+    if isinstance(month, str):
+        year, m = month.split("-")
+        return int(year), int(m)
+    return month
+
+
+def latest_month_files(
+    root: Path,
+    months: Iterable[Month | str] | None = None,
+    name_prefix: str = "green_tripdata_",
+    partition_key: str = "ingestion_date",
+) -> dict[Month, Path]:
+    """
+    File of the most recent `<partition_key>=...` folder for each month under `root`
+    (e.g. data/raw/green_taxi), restricted to `months` ((year, month) or "YYYY-MM").
+    """
+    wanted = {_month_key(m) for m in months} if months is not None else None
+    latest: dict[Month, tuple[str, Path]] = {}
+    for folder in root.glob(f"{partition_key}=*"):
+        value = folder.name.split("=", 1)[1]
+        for path in folder.glob(f"{name_prefix}*.parquet"):
+            match = _MONTH_FILE.match(path.name)
+            if not match or match.group("prefix") != name_prefix:
+                continue
+            key = (int(match.group("year")), int(match.group("month")))
+            if wanted is not None and key not in wanted:
+                continue
+            if key not in latest or latest[key][0] < value:
+                latest[key] = (value, path)
+    return {key: path for key, (_, path) in sorted(latest.items())}
+
+
+def trips_dataset(
+    root: Path | None = None,
+    months: Iterable[Month | str] | None = None,
+    schema: pa.Schema | None = None,
+    service: TripService = GREEN,
+    layout: str = "ingestion_date",
+) -> ds.Dataset:
+    """
+    Dataset over the local `service` trips of `months` (all when None), memory-mapped;
+    `root` defaults to data/raw/<service folder>.
+    `layout` "ingestion_date" (raw downloads) keeps the latest ingestion_date of each
+    month; "pickup_month" (repartition_trips output) prunes `pickup_month=YYYY-MM` hive
+    partitions (the quarantine partition is left out). Files are read with `schema`
+    (default: the service's canonical one), so months with drifting physical types scan
+    together.
+    """
+    root = root if root is not None else Path("data/raw") / service.local_prefix
+    name_prefix = service.file_prefix
+    schema = schema if schema is not None else arrow_schema(service.columns)
+    filesystem = pafs.LocalFileSystem(use_mmap=True)
+    if layout == "ingestion_date":
+        files = [str(p) for p in latest_month_files(root, months, name_prefix).values()]
+    elif layout == "pickup_month":
+        wanted = (
+            {"{:04d}-{:02d}".format(*_month_key(m)) for m in months} if months is not None else None
+        )
+        files = [
+            str(p)
+            for p in sorted(root.glob(f"pickup_month=*/{name_prefix}*.parquet"))
+            if p.parent.name != "pickup_month=quarantine"
+            and (wanted is None or p.parent.name.split("=", 1)[1] in wanted)
+        ]
+    else:
+        raise ValueError(f"Unknown layout: {layout}")
+    return ds.dataset(files, schema=schema, format="parquet", filesystem=filesystem)
+
+
+def iter_trip_batches(
+    root: Path | None = None,
+    months: Iterable[Month | str] | None = None,
+    columns: list[str] | None = None,
+    filter: ds.Expression | None = None,
+    batch_size: int = 65_536,
+    **dataset_options,
+) -> Iterator[pa.RecordBatch]:
+    """
+    Stream the rows matching `filter` (e.g. `ds.field("trip_distance") > 10`) as record
+    batches of the `columns` only. Row groups whose min/max statistics exclude the
+    filter are skipped without being read.
+    """
+    dataset = trips_dataset(root, months, **dataset_options)
+    yield from dataset.to_batches(columns=columns, filter=filter, batch_size=batch_size)
+
+
+def read_trips(
+    root: Path | None = None,
+    months: Iterable[Month | str] | None = None,
+    columns: list[str] | None = None,
+    filter: ds.Expression | None = None,
+    **dataset_options,
+) -> pa.Table:
+    """Same as iter_trip_batches, as one Arrow table."""
+    dataset = trips_dataset(root, months, **dataset_options)
+    return dataset.to_table(columns=columns, filter=filter)
@@ -0,0 +1,171 @@
+"""Route trips into `pickup_month=YYYY-MM` hive partitions by event time, with a quarantine."""
+
+from __future__ import annotations
+
+import os
+import re
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from de_pipeline.common.logging import get_logger
+
+logger = get_logger(__name__)
+
+PARTITION_KEY = "pickup_month"
+# Hive value of the partition holding rows with out-of-range or impossible timestamps.
+QUARANTINE = "quarantine"
+REASON_COLUMN = "quarantine_reason"
+
+_MONTH_IN_NAME = re.compile(r"(\d{4})-(\d{2})\.parquet$")
+
+
+def month_of_file(path: Path) -> tuple[int, int]:
+    """(year, month) of a TLC file name such as green_tripdata_2024-05.parquet."""
+    match = _MONTH_IN_NAME.search(path.name)
+    if not match:
+        raise ValueError(f"No YYYY-MM month in file name: {path.name}")
+    return int(match.group(1)), int(match.group(2))
+
+
+def partition_dir(root: Path, value: str) -> Path:
+    return root / f"{PARTITION_KEY}={value}"
+
+
+def _month_index(timestamps: pa.ChunkedArray | pa.Array) -> pa.Array:
+    # Mois comme entier (année * 12 + mois - 1) : comparaisons et groupes vectorisés.
+    return pc.add(pc.multiply(pc.year(timestamps), 12), pc.subtract(pc.month(timestamps), 1))
+
+
+def _reasons(
+    batch: pa.RecordBatch,
+    pickup_column: str,
+    dropoff_column: str,
+    file_month: int,
+    max_month_drift: int,
+    now: datetime,
+) -> pa.Array:
+    """Quarantine reason of each row (null: the row is routed to its pickup month)."""
+    pickup = batch.column(pickup_column)
+    dropoff = batch.column(dropoff_column)
+    drift = pc.abs(pc.subtract(_month_index(pickup), file_month))
+    now_scalar = pa.scalar(now, type=pickup.type)
+    # Première raison applicable, dans cet ordre.
+    checks = [
+        ("null_pickup", pc.is_null(pickup)),
+        ("future_pickup", pc.greater(pickup, now_scalar)),
+        ("dropoff_before_pickup", pc.less(dropoff, pickup)),
+        ("out_of_range", pc.greater(drift, max_month_drift)),
+    ]
+    reasons = pa.nulls(batch.num_rows, pa.string())
+    for reason, mask in reversed(checks):
+        reasons = pc.if_else(pc.fill_null(mask, False), reason, reasons)
+    return reasons
+
+
+def repartition_file(
+    src: Path,
+    root: Path,
+    pickup_column: str = "lpep_pickup_datetime",
+    dropoff_column: str = "lpep_dropoff_datetime",
+    max_month_drift: int = 1,
+    now: datetime | None = None,
+    batch_size: int = 65_536,
+    compression: str = "zstd",
+) -> dict:
+    """
+    Split one monthly file into `<root>/pickup_month=YYYY-MM/<src name>` files by the
+    month of each row's pickup time, streaming record batches (one open writer per
+    target partition). Rows without a pickup time, picked up in the future, dropped off
+    before pickup, or more than `max_month_drift` months away from the file's month go
+    to `<root>/pickup_month=quarantine/<src name>` with a `quarantine_reason` column.
+    Re-running on the same source replaces its previous outputs.
+    Returns: source, rows, partitions (month -> rows), quarantined (reason -> rows),
+    elapsed_sec.
+    """
+    start = time.perf_counter()
+    year, month = month_of_file(src)
+    file_month = year * 12 + month - 1
+    now = now or datetime.now()
+    parquet = pq.ParquetFile(src, memory_map=True)
+    schema = parquet.schema_arrow
+    quarantine_schema = schema.append(pa.field(REASON_COLUMN, pa.string()))
+    suffix = f".{os.getpid()}.tmp"
+
+    writers: dict[str, pq.ParquetWriter] = {}
+    partitions: Counter[str] = Counter()
+    quarantined: Counter[str] = Counter()
+
+    def write(value: str, batch: pa.RecordBatch) -> None:
+        if value not in writers:
+            path = partition_dir(root, value) / src.name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            writers[value] = pq.ParquetWriter(
+                path.with_name(path.name + suffix), batch.schema, compression=compression
+            )
+        writers[value].write_batch(batch)
+
+    try:
+        for batch in parquet.iter_batches(batch_size=batch_size):
+            reasons = _reasons(
+                batch, pickup_column, dropoff_column, file_month, max_month_drift, now
+            )
+            bad = pc.is_valid(reasons)
+            if pc.any(bad).as_py():
+                rejected = batch.filter(bad)
+                rejected = pa.RecordBatch.from_arrays(
+                    [*rejected.columns, reasons.filter(bad)], schema=quarantine_schema
+                )
+                write(QUARANTINE, rejected)
+                quarantined.update(
+                    {
+                        row["values"]: row["counts"]
+                        for row in pc.value_counts(rejected.column(REASON_COLUMN)).to_pylist()
+                    }
+                )
+                batch = batch.filter(pc.invert(bad))
+            months = _month_index(batch.column(pickup_column))
+            for index in pc.unique(months).to_pylist():
+                rows = batch.filter(pc.equal(months, index))
+                value = f"{index // 12:04d}-{index % 12 + 1:02d}"
+                write(value, rows)
+                partitions[value] += rows.num_rows
+    except BaseException:
+        for value, writer in writers.items():
+            writer.close()
+            (partition_dir(root, value) / (src.name + suffix)).unlink(missing_ok=True)
+        raise
+    finally:
+        parquet.close()
+
+    for writer in writers.values():
+        writer.close()
+    for value in writers:
+        target = partition_dir(root, value) / src.name
+        target.with_name(target.name + suffix).replace(target)
+    # Sorties d'un run précédent du même fichier dans des partitions non réécrites.
+    for stale in root.glob(f"{PARTITION_KEY}=*/{src.name}"):
+        if stale.parent.name.split("=", 1)[1] not in writers:
+            stale.unlink()
+            if not any(stale.parent.iterdir()):
+                stale.parent.rmdir()
+
+    report = {
+        "source": str(src),
+        "rows": sum(partitions.values()) + sum(quarantined.values()),
+        "partitions": dict(sorted(partitions.items())),
+        "quarantined": dict(sorted(quarantined.items())),
+        "elapsed_sec": time.perf_counter() - start,
+    }
+    own = partitions.get(f"{year:04d}-{month:02d}", 0)
+    logger.info(
+        f"Repartitioned {src.name}: {own} rows in its month, "
+        f"{sum(partitions.values()) - own} moved to {len(partitions) - (own > 0)} other month(s), "
+        f"{sum(quarantined.values())} quarantined {dict(quarantined) or ''}"
+    )
+    return report
@@ -10,10 +10,11 @@ class TLCSources:
     trips_path_template: str
     zones_path: str
 
-    def trip_url(self, year: int, month: int) -> str:
+    def trip_url(self, year: int, month: int, service: str = "green") -> str:
+        """URL of one monthly file; `service` fills `{service}` in the template, if any."""
         yyyy = f"{year:04d}"
         mm = f"{month:02d}"
-        path = self.trips_path_template.format(yyyy=yyyy, mm=mm)
+        path = self.trips_path_template.format(yyyy=yyyy, mm=mm, service=service)
         return f"{self.base_url.rstrip('/')}/{path.lstrip('/')}"
 
     def zones_url(self) -> str:
@@ -29,7 +30,7 @@ def month_start_n_months_back(today: date, months_back: int) -> list[tuple[int,
     if m == 0:
         m = 12
         y -= 1
-    
+
     res: list[tuple[int, int]] = []
     for _ in range(months_back):
         res.append((y, m))
@@ -38,3 +39,34 @@ def month_start_n_months_back(today: date, months_back: int) -> list[tuple[int,
             m = 12
             y -= 1
     return res
+
+
+def parse_month_range(spec: str, today: date | None = None) -> list[tuple[int, int]]:
+    """
+    (year, month) of an inclusive range such as "2014-01..2015-06", oldest first.
+    "now" as the end stands for the last month before `today` (the current month is not
+    published yet); a single "YYYY-MM" is a one-month range.
+    """
+    today = today or date.today()
+    start, _, end = spec.partition("..")
+    end = end or start
+
+    def parse(value: str) -> tuple[int, int]:
+        if value.strip() == "now":
+            return month_start_n_months_back(today, 1)[0]
+        try:
+            year, month = (int(part) for part in value.strip().split("-"))
+        except ValueError:
+            raise ValueError(f"Invalid month {value!r} (expected YYYY-MM or now)") from None
+        if not 1 <= month <= 12:
+            raise ValueError(f"Invalid month {value!r} (expected YYYY-MM or now)")
+        return year, month
+
+    (y, m), last = parse(start), parse(end)
+    if (y, m) > last:
+        raise ValueError(f"Empty month range: {spec}")
+    months: list[tuple[int, int]] = []
+    while (y, m) <= last:
+        months.append((y, m))
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+    return months
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from contextlib import ExitStack
+from pathlib import Path
+
+import requests
+
+from de_pipeline.common.logging import get_logger
+from de_pipeline.ingestion.downloader import stream_url
+from de_pipeline.storage.backends import ObjectStore
+
+logger = get_logger(__name__)
+
+
+def stream_to_store(
+    url: str,
+    store: ObjectStore,
+    object_name: str,
+    timeout_sec: int,
+    chunk_size: int,
+    session: requests.Session | None = None,
+    local_copy: Path | None = None,
+    max_resumes: int = 3,
+) -> dict:
+    """
+    Stream a remote file straight into object storage, computing md5 and crc32c on the way.
+    The upload starts with the first chunk instead of after a full download;
+    `local_copy` optionally tees the same bytes to disk. A failed transfer
+    cancels the upload, so no truncated object is ever published.
+    Returns download_file-style metadata plus the object `uri`.
+    """
+    http = session or requests
+    logger.info(f"Streaming: {url}")
+    logger.info(f"To: {store.uri(object_name)}")
+
+    with ExitStack() as stack:
+        sinks = [stack.enter_context(store.open_writer(object_name))]
+        if local_copy is not None:
+            local_copy.parent.mkdir(parents=True, exist_ok=True)
+            part_path = local_copy.with_name(local_copy.name + ".part")
+            sinks.append(stack.enter_context(open(part_path, "wb")))
+        total_bytes, checksums, validators = stream_url(
+            http, url, sinks, timeout_sec, chunk_size, max_resumes=max_resumes
+        )
+    if local_copy is not None:
+        part_path.replace(local_copy)
+
+    meta = {
+        "url": url,
+        "path": str(local_copy) if local_copy is not None else None,
+        "uri": store.uri(object_name),
+        "bytes": total_bytes,
+        **checksums.as_dict(),
+        **validators,
+    }
+    logger.info(f"Done: {total_bytes} bytes, md5={meta['md5']}")
+    return meta
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import re
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from functools import partial
+
+from de_pipeline.common.logging import get_logger
+from de_pipeline.common.manifest import JsonManifest
+from de_pipeline.warehouse.base import Warehouse
+
+logger = get_logger(__name__)
+
+_MONTH_OBJECT = re.compile(r"ingestion_date=(\d{4}-\d{2}-\d{2})/[^/]*?(\d{4})-(\d{2})\.parquet$")
+
+
+@dataclass(frozen=True)
+class MonthLoad:
+    year: int
+    month: int
+    uri: str
+    # Content identity of the source object (md5 or crc32c); None when unknown.
+    checksum: str | None = None
+
+    @property
+    def partition_id(self) -> str:
+        return f"{self.year:04d}{self.month:02d}"
+
+
+def bigquery_schema(columns: list[tuple[str, str]]) -> list:
+    """SchemaField list from (name, type) pairs; every column is NULLABLE."""
+    from google.cloud import bigquery
+
+    return [bigquery.SchemaField(name, field_type, mode="NULLABLE") for name, field_type in columns]
+
+
+def latest_month_objects(
+    blobs,
+    bucket_name: str,
+    name_prefix: str = "",
+    uri: Callable[[str], str] | None = None,
+) -> list[MonthLoad]:
+    """
+    Pick, for each data month, the object of the most recent ingestion_date.
+    `blobs` are storage blobs (name, md5_hash, crc32c) as returned by list_blobs, or
+    the objects of an ObjectStore listing; `uri` maps an object name to its load URI
+    (default gs://<bucket_name>/<name>). Checksums are only read for the picked objects.
+    """
+    latest: dict[tuple[int, int], tuple[str, object]] = {}
+    for blob in blobs:
+        match = _MONTH_OBJECT.search(blob.name)
+        if not match or not blob.name.rsplit("/", 1)[-1].startswith(name_prefix):
+            continue
+        ingestion_date, y, m = match.group(1), int(match.group(2)), int(match.group(3))
+        if (y, m) not in latest or latest[(y, m)][0] < ingestion_date:
+            latest[(y, m)] = (ingestion_date, blob)
+    if uri is None:
+        uri = lambda name: f"gs://{bucket_name}/{name}"  # noqa: E731
+    return [
+        MonthLoad(year=y, month=m, uri=uri(blob.name), checksum=blob.md5_hash or blob.crc32c)
+        for (y, m), (_, blob) in sorted(latest.items())
+    ]
+
+
+def create_dataset_if_not_exists(
+    client, project_id: str, dataset_id: str, location: str = "EU"
+) -> None:
+    """Créer un dataset s'il n'existe pas."""
+    from google.cloud import bigquery
+
+    dataset_ref = f"{project_id}.{dataset_id}"
+    try:
+        client.get_dataset(dataset_ref)
+        logger.info(f"✅ Dataset {dataset_id} existe déjà")
+    except Exception:
+        dataset = bigquery.Dataset(dataset_ref)
+        dataset.location = location
+        client.create_dataset(dataset)
+        logger.info(f"✅ Dataset {dataset_id} créé")
+
+
+def ensure_month_partitioned_table(client, table_ref: str, schema: list) -> None:
+    """Create `table_ref` with monthly ingestion-time partitions (one per data month) if missing."""
+    from google.cloud import bigquery
+
+    table = bigquery.Table(table_ref, schema=schema)
+    table.time_partitioning = bigquery.TimePartitioning(type_=bigquery.TimePartitioningType.MONTH)
+    client.create_table(table, exists_ok=True)
+
+
+def load_month(client, table_ref: str, load: MonthLoad, schema: list) -> dict:
+    """
+    Load one month file into its own partition (`table$YYYYMM`) with WRITE_TRUNCATE:
+    re-loading a month replaces it instead of appending a copy. New nullable columns of
+    `schema` (e.g. trip_id) are added to a table created before them.
+    """
+    from google.cloud import bigquery
+
+    job_config = bigquery.LoadJobConfig(
+        schema=schema,
+        source_format=bigquery.SourceFormat.PARQUET,
+        write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
+        schema_update_options=[bigquery.SchemaUpdateOption.ALLOW_FIELD_ADDITION],
+    )
+    destination = f"{table_ref}${load.partition_id}"
+    start = time.perf_counter()
+    job = client.load_table_from_uri(load.uri, destination, job_config=job_config)
+    job.result()
+    logger.info(f"Loaded {load.uri} -> {destination} ({job.output_rows} rows)")
+    return {
+        "partition": load.partition_id,
+        "uri": load.uri,
+        "rows": job.output_rows,
+        "bytes": job.output_bytes,
+        "elapsed_sec": time.perf_counter() - start,
+    }
+
+
+def load_csv(client, uri: str, table_ref: str, schema: list) -> dict:
+    """Replace `table_ref` with one CSV file (header row skipped), typed by `schema`."""
+    from google.cloud import bigquery
+
+    job_config = bigquery.LoadJobConfig(
+        schema=schema,
+        skip_leading_rows=1,
+        source_format=bigquery.SourceFormat.CSV,
+        write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
+    )
+    job = client.load_table_from_uri(uri, table_ref, job_config=job_config)
+    job.result()
+    logger.info(f"Loaded {uri} -> {table_ref}")
+    return {"uri": uri, "rows": job.output_rows, "bytes": job.output_bytes}
+
+
+def append_parquet(client, path, table_ref: str, schema: list) -> dict:
+    """Append a local parquet file to `table_ref` (one load job, no query cost)."""
+    from google.cloud import bigquery
+
+    job_config = bigquery.LoadJobConfig(
+        schema=schema,
+        source_format=bigquery.SourceFormat.PARQUET,
+        write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
+    )
+    with open(path, "rb") as f:
+        job = client.load_table_from_file(f, table_ref, job_config=job_config)
+    job.result()
+    logger.info(f"Appended {path} -> {table_ref} ({job.output_rows} rows)")
+    return {"rows": job.output_rows, "bytes": job.output_bytes}
+
+
+def load_months(
+    client,
+    table_ref: str,
+    loads: list[MonthLoad],
+    schema: list,
+    ledger: JsonManifest | None = None,
+    max_workers: int = 4,
+) -> dict:
+    """
+    Submit one load job per month, concurrently over a shared client.
+    `client` may also be a Warehouse, `schema` then being (name, type) pairs.
+    With a `ledger`, months whose source checksum was already loaded are skipped,
+    so re-running the same day costs no load job at all.
+    Returns a summary: loaded, skipped (partition ids), failed.
+    """
+    todo = []
+    skipped = []
+    for load in loads:
+        done = ledger.get(f"{table_ref}${load.partition_id}") if ledger is not None else None
+        if done and load.checksum and done.get("checksum") == load.checksum:
+            skipped.append(load.partition_id)
+        else:
+            todo.append(load)
+
+    load_one = client.load_month if isinstance(client, Warehouse) else partial(load_month, client)
+    loaded: list[dict] = []
+    failed: list[dict] = []
+    if todo:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(todo)))) as pool:
+            futures = {pool.submit(load_one, table_ref, load, schema): load for load in todo}
+            for future in as_completed(futures):
+                load = futures[future]
+                try:
+                    report = future.result()
+                except Exception as e:
+                    logger.error(f"Load failed for {load.uri}: {e}")
+                    failed.append(
+                        {"partition": load.partition_id, "uri": load.uri, "error": str(e)}
+                    )
+                    continue
+                loaded.append(report)
+                if ledger is not None:
+                    ledger.set(
+                        f"{table_ref}${load.partition_id}",
+                        {
+                            "uri": load.uri,
+                            "checksum": load.checksum,
+                            "rows": report["rows"],
+                            "loaded_at": datetime.now(UTC).isoformat(),
+                        },
+                    )
+    if ledger is not None:
+        ledger.save()
+
+    logger.info(
+        f"{table_ref}: {len(loaded)} month(s) loaded, {len(skipped)} unchanged, {len(failed)} failed"
+    )
+    return {
+        "loaded": sorted(loaded, key=lambda r: r["partition"]),
+        "skipped": sorted(skipped),
+        "failed": failed,
+    }
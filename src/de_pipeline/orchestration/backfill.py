@@ -0,0 +1,236 @@
+"""Pipelined backfill: each (service, month) flows through download -> normalize -> upload -> load."""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from collections.abc import Callable, Iterable
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any
+
+from de_pipeline.common.logging import get_logger
+from de_pipeline.common.manifest import JsonManifest
+from de_pipeline.common.services import TripService
+from de_pipeline.orchestration.context import PipelineContext
+
+logger = get_logger(__name__)
+
+# Workers per stage: downloads and uploads are network bound, normalize is CPU bound,
+# loads are jobs the warehouse runs for us.
+DEFAULT_LIMITS = {"download": 4, "normalize": 2, "upload": 4, "load": 2}
+
+
+@dataclass(frozen=True)
+class MonthItem:
+    service: TripService
+    year: int
+    month: int
+
+    @property
+    def key(self) -> str:
+        return f"{self.service.name} {self.year:04d}-{self.month:02d}"
+
+
+class MonthCheckpoint:
+    """
+    Stages completed by each work item, with what they produced (paths, object names),
+    persisted after every stage so a backfill resumes where each month stopped, even
+    on another day. Unlike StageCheckpoint, entries do not expire with the run.
+    """
+
+    def __init__(self, manifest: JsonManifest) -> None:
+        self.manifest = manifest
+
+    def state(self, key: str) -> dict[str, dict]:
+        """Output of the stages `key` already completed, by stage name."""
+        entry = self.manifest.get(key)
+        return dict(entry.get("stages", {})) if entry else {}
+
+    def mark_done(self, key: str, stage: str, info: dict) -> None:
+        stages = {**self.state(key), stage: info}
+        self.manifest.set(key, {"stages": stages, "updated_at": datetime.now(UTC).isoformat()})
+        self.manifest.save()
+
+    def mark_failed(self, key: str, stage: str, error: str) -> None:
+        self.manifest.set(
+            key,
+            {
+                "stages": self.state(key),
+                "error": f"{stage}: {error}",
+                "updated_at": datetime.now(UTC).isoformat(),
+            },
+        )
+        self.manifest.save()
+
+    def clear(self) -> None:
+        for key in self.manifest.entries():
+            self.manifest.remove(key)
+        self.manifest.path.unlink(missing_ok=True)
+
+
+def run_pipelined(
+    items: Iterable[Any],
+    steps: dict[str, Callable[[Any, dict], dict]],
+    limits: dict[str, int],
+    checkpoint: MonthCheckpoint | None = None,
+    max_in_flight: int | None = None,
+) -> dict:
+    """
+    Push every item (anything with a `key`) through `steps` in order, each step having
+    its own pool of `limits[step]` workers: while one item loads, the next uploads and
+    the one after downloads. A step gets the item and the outputs of its previous steps
+    (name -> dict) and returns its own output. At most `max_in_flight` items are started
+    and unfinished at once (bounds local disk), admitted in the given order.
+    A failed item stops there; the others keep flowing. Steps already done in
+    `checkpoint` are not re-run.
+    Returns a summary: done, resumed (already complete), failed (key -> error),
+    results (key -> outputs), elapsed_sec.
+    """
+    t0 = time.perf_counter()
+    names = list(steps)
+    max_in_flight = max_in_flight or sum(limits.get(n, 1) for n in names)
+    queue = deque(items)
+    done: list[str] = []
+    resumed: list[str] = []
+    failed: dict[str, str] = {}
+    results: dict[str, dict] = {}
+    running: dict = {}
+    in_flight = 0
+
+    def run_step(name: str, item: Any, state: dict) -> tuple[dict, float]:
+        start = time.perf_counter()
+        info = steps[name](item, state) or {}
+        return info, time.perf_counter() - start
+
+    pools = {
+        name: ThreadPoolExecutor(
+            max_workers=max(1, int(limits.get(name, 1))), thread_name_prefix=f"backfill-{name}"
+        )
+        for name in names
+    }
+
+    def advance(item: Any, state: dict) -> bool:
+        """Submit the item's next step; False when every step is done."""
+        for name in names:
+            if name not in state:
+                running[pools[name].submit(run_step, name, item, state)] = (item, name, state)
+                return True
+        return False
+
+    try:
+        while queue or running:
+            while queue and in_flight < max_in_flight:
+                item = queue.popleft()
+                state = checkpoint.state(item.key) if checkpoint is not None else {}
+                if advance(item, state):
+                    in_flight += 1
+                else:
+                    resumed.append(item.key)
+                    results[item.key] = state
+            if not running:
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                item, name, state = running.pop(future)
+                try:
+                    info, elapsed = future.result()
+                except Exception as e:
+                    logger.error(f"❌ {item.key} / {name} échoué: {e}")
+                    failed[item.key] = f"{name}: {e}"
+                    results[item.key] = state
+                    if checkpoint is not None:
+                        checkpoint.mark_failed(item.key, name, str(e))
+                    in_flight -= 1
+                    continue
+                logger.info(f"✅ {item.key} / {name} ({elapsed:.1f}s)")
+                state = {**state, name: info}
+                if checkpoint is not None:
+                    checkpoint.mark_done(item.key, name, info)
+                if not advance(item, state):
+                    done.append(item.key)
+                    results[item.key] = state
+                    in_flight -= 1
+    finally:
+        for pool in pools.values():
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    return {
+        "done": done,
+        "resumed": resumed,
+        "failed": failed,
+        "results": results,
+        "elapsed_sec": time.perf_counter() - t0,
+    }
+
+
+def run_backfill(
+    ctx: PipelineContext,
+    months: list[tuple[int, int]],
+    services: list[TripService] | None = None,
+    checkpoint: MonthCheckpoint | None = None,
+) -> dict:
+    """
+    Backfill `months` (oldest first) of `services` (default: the run's services) into
+    the raw tables, one independent work item per service and month, with the stage
+    limits of runtime.backfill. Downloads land in today's ingestion_date partition and
+    are recorded in the download manifests, like a daily run.
+    """
+    from de_pipeline.orchestration.pipeline import (
+        LOAD_LEDGERS,
+        download_month,
+        ensure_datasets,
+        load_trips_month,
+        normalize_month,
+        upload_month,
+    )
+
+    if not months:
+        raise ValueError("No month to backfill")
+    services = services or ctx.services
+    backfill_cfg = ctx.section("backfill")
+    limits = {**DEFAULT_LIMITS, **(backfill_cfg.get("max_workers") or {})}
+    max_in_flight = backfill_cfg.get("max_in_flight")
+
+    manifests = {s.name: JsonManifest(ctx.download_manifest_path(s)) for s in services}
+    ledger = JsonManifest(ctx.manifests_dir / f"{LOAD_LEDGERS[ctx.backend]}.json")
+    ensure_datasets(ctx)
+    for service in services:
+        ctx.warehouse().ensure_month_partitioned_table(
+            f"{ctx.project_id}.{ctx.dataset_raw}.{service.raw_table}", service.raw_columns
+        )
+
+    def download(item: MonthItem, state: dict) -> dict:
+        return download_month(
+            ctx, item.service, item.year, item.month, manifests[item.service.name]
+        )
+
+    def normalize(item: MonthItem, state: dict) -> dict:
+        return normalize_month(
+            ctx, item.service, state["download"]["path"], manifests[item.service.name]
+        )
+
+    def upload(item: MonthItem, state: dict) -> dict:
+        return upload_month(ctx, state["download"]["path"], state["download"]["object_name"])
+
+    def load(item: MonthItem, state: dict) -> dict:
+        return load_trips_month(
+            ctx, item.service, item.year, item.month, state["download"]["object_name"], ledger
+        )
+
+    # Mois par mois, tous les services d'un mois ensemble : les plus anciens finissent d'abord.
+    items = [MonthItem(service, y, m) for y, m in months for service in services]
+    logger.info(
+        f"🔁 Backfill de {len(items)} mois-service(s) "
+        f"({months[0][0]:04d}-{months[0][1]:02d}..{months[-1][0]:04d}-{months[-1][1]:02d}), "
+        f"workers {limits}"
+    )
+    return run_pipelined(
+        items,
+        {"download": download, "normalize": normalize, "upload": upload, "load": load},
+        limits,
+        checkpoint=checkpoint,
+        max_in_flight=int(max_in_flight) if max_in_flight else None,
+    )
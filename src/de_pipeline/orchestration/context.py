@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import os
+import posixpath
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+from de_pipeline.common.metrics import RunMetrics
+
+
+def _read_yaml(path: Path) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+
+@dataclass
+class PipelineContext:
+    """
+    Configuration and clients shared by every stage of one pipeline run.
+    Clients are created on first use, once, and reused by all stages and threads.
+    """
+
+    dataset_cfg: dict
+    runtime_cfg: dict
+    dq_cfg: dict = field(default_factory=dict)
+    project_id: str | None = None
+    bucket_name: str | None = None
+    dataset_raw: str | None = None
+    dataset_curated: str | None = None
+    started_at: datetime = field(default_factory=lambda: datetime.now(UTC))
+    metrics: RunMetrics | None = None
+    _clients: dict[str, Any] = field(default_factory=dict, init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.metrics is None:
+            self.metrics = RunMetrics(self.run_id)
+
+    @classmethod
+    def from_config(
+        cls, config_dir: Path = Path("config"), backend: str | None = None
+    ) -> PipelineContext:
+        """
+        Context from config/*.yml and the GCP_* / GCS_* / BQ_* environment variables
+        (which the local backend does not need: it falls back to local names).
+        `backend` overrides runtime.backend.
+        """
+        dq_path = config_dir / "dq.yml"
+        runtime_cfg = _read_yaml(config_dir / "runtime.yml")
+        if backend:
+            runtime_cfg["runtime"]["backend"] = backend
+        local = runtime_cfg["runtime"].get("backend", "gcp") == "local"
+        return cls(
+            dataset_cfg=_read_yaml(config_dir / "dataset.yml"),
+            runtime_cfg=runtime_cfg,
+            dq_cfg=_read_yaml(dq_path)["dq"] if dq_path.exists() else {},
+            project_id=os.getenv("GCP_PROJECT_ID") or ("local" if local else None),
+            bucket_name=os.getenv("GCS_RAW_BUCKET") or ("local" if local else None),
+            dataset_raw=os.getenv("BQ_DATASET_RAW") or ("raw" if local else None),
+            dataset_curated=os.getenv("BQ_DATASET_CURATED") or ("curated" if local else None),
+        )
+
+    @property
+    def runtime(self) -> dict:
+        return self.runtime_cfg["runtime"]
+
+    @property
+    def backend(self) -> str:
+        """ "gcp" (GCS + BigQuery) or "local" (bucket directory + DuckDB, offline)."""
+        return self.runtime.get("backend", "gcp")
+
+    @property
+    def conventions(self) -> dict:
+        return self.dataset_cfg["raw_conventions"]
+
+    @property
+    def ingestion_date(self) -> str:
+        return self.started_at.strftime(self.runtime["ingestion_date_format"])
+
+    @property
+    def run_id(self) -> str:
+        return self.started_at.strftime("%Y%m%dT%H%M%SZ")
+
+    @property
+    def run_dir(self) -> Path:
+        """Output directory of this run (report, metrics, profiles)."""
+        return Path(self.section("metrics").get("output_dir", "data/runs")) / self.run_id
+
+    @property
+    def partition(self) -> str:
+        return f"{self.conventions['partition_key']}={self.ingestion_date}"
+
+    @property
+    def local_raw_dir(self) -> Path:
+        return Path(self.runtime["local_raw_dir"])
+
+    @property
+    def partition_dir(self) -> Path:
+        return self.local_raw_dir / self.conventions["local_prefix"] / self.partition
+
+    @property
+    def manifests_dir(self) -> Path:
+        return self.local_raw_dir / "_manifests"
+
+    @property
+    def services(self) -> list:
+        """TLC trip services of this run (dataset.services, default: green only)."""
+        from de_pipeline.common.services import get_service
+
+        names = self.dataset_cfg.get("dataset", {}).get("services") or ["green"]
+        return [get_service(name) for name in names]
+
+    def service_prefix(self, service) -> str:
+        """Local folder name of `service` (raw_conventions.local_prefix for green)."""
+        return self.conventions["local_prefix"] if service.name == "green" else service.local_prefix
+
+    def service_dir(self, service) -> Path:
+        """Today's partition of `service` (partition_dir for green)."""
+        return self.local_raw_dir / self.service_prefix(service) / self.partition
+
+    def service_gcs_prefix(self, service) -> str:
+        """Bucket prefix of `service`, next to raw_conventions.gcs_prefix (green's)."""
+        if service.name == "green":
+            return self.conventions["gcs_prefix"]
+        return posixpath.join(
+            posixpath.dirname(self.conventions["gcs_prefix"]), service.local_prefix
+        )
+
+    def download_manifest_path(self, service) -> Path:
+        return self.manifests_dir / f"{self.service_prefix(service)}.json"
+
+    def section(self, name: str) -> dict:
+        """One `runtime.<name>` config block, empty when absent."""
+        return self.runtime.get(name) or {}
+
+    def client(self, name: str, factory: Callable[[], Any]) -> Any:
+        """The shared client `name`, built by `factory` on first use."""
+        with self._lock:
+            if name not in self._clients:
+                self._clients[name] = factory()
+            return self._clients[name]
+
+    def bigquery(self):
+        def factory():
+            from google.cloud import bigquery
+
+            return bigquery.Client(project=self.project_id)
+
+        return self.client("bigquery", factory)
+
+    def storage(self):
+        def factory():
+            from google.cloud import storage
+
+            return storage.Client(project=self.project_id)
+
+        return self.client("storage", factory)
+
+    def blob_cache(self):
+        """Content-addressed raw cache (runtime.cache), or None when disabled."""
+        cache_cfg = self.section("cache")
+        if not cache_cfg.get("enabled", False):
+            return None
+
+        def factory():
+            from de_pipeline.ingestion.cache import BlobCache
+
+            return BlobCache(Path(cache_cfg.get("dir") or self.local_raw_dir / "_blobs"))
+
+        return self.client("blob_cache", factory)
+
+    def checksums(self):
+        """md5 / crc32c of the local files (`_manifests/checksums.json`), shared by the run."""
+
+        def factory():
+            from de_pipeline.common.checksums import ChecksumIndex
+            from de_pipeline.common.manifest import JsonManifest
+
+            return ChecksumIndex(JsonManifest(self.manifests_dir / "checksums.json"))
+
+        return self.client("checksums", factory)
+
+    def object_store(self):
+        """Raw bucket of the configured backend (an ObjectStore)."""
+
+        def factory():
+            from de_pipeline.storage.backends import GCSObjectStore, LocalObjectStore
+
+            if self.backend == "local":
+                return LocalObjectStore(
+                    Path(self.section("local").get("bucket_dir", "data/bucket"))
+                )
+            chunk_size = int(
+                self.section("download").get("stream_chunk_size_bytes", 8 * 1024 * 1024)
+            )
+            return GCSObjectStore(self.storage().bucket(self.bucket_name), chunk_size=chunk_size)
+
+        return self.client("object_store", factory)
+
+    def warehouse(self):
+        """Warehouse of the configured backend: BigQuery, or DuckDB over parquet."""
+
+        def factory():
+            if self.backend == "local":
+                from de_pipeline.warehouse.local import LocalWarehouse
+
+                return LocalWarehouse(
+                    Path(self.section("local").get("warehouse_dir", "data/warehouse"))
+                )
+            from de_pipeline.warehouse.bigquery import BigQueryWarehouse
+
+            return BigQueryWarehouse(self.bigquery(), self.project_id)
+
+        return self.client("warehouse", factory)
+
+    def http(self):
+        def factory():
+            from de_pipeline.ingestion.batch import make_session
+
+            download_cfg = self.section("download")
+            pool_size = int(download_cfg.get("max_workers", 1)) * int(
+                download_cfg.get("split_parts", 1)
+            )
+            return make_session(pool_size)
+
+        return self.client("http", factory)
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any
+
+from de_pipeline.common.logging import get_logger
+from de_pipeline.common.manifest import JsonManifest
+from de_pipeline.common.metrics import RunMetrics
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    func: Callable[[Any], Any]
+    deps: tuple[str, ...] = ()
+
+
+def validate_stages(stages: Iterable[Stage]) -> dict[str, Stage]:
+    """Index stages by name; raise ValueError on duplicates, unknown deps or cycles."""
+    by_name: dict[str, Stage] = {}
+    for stage in stages:
+        if stage.name in by_name:
+            raise ValueError(f"Duplicate stage: {stage.name}")
+        by_name[stage.name] = stage
+    for stage in by_name.values():
+        unknown = [d for d in stage.deps if d not in by_name]
+        if unknown:
+            raise ValueError(f"Stage {stage.name} depends on unknown stage(s): {unknown}")
+
+    visiting: set[str] = set()
+    visited: set[str] = set()
+
+    def visit(name: str) -> None:
+        if name in visited:
+            return
+        if name in visiting:
+            raise ValueError(f"Dependency cycle through stage {name}")
+        visiting.add(name)
+        for dep in by_name[name].deps:
+            visit(dep)
+        visiting.discard(name)
+        visited.add(name)
+
+    for name in by_name:
+        visit(name)
+    return by_name
+
+
+class StageCheckpoint:
+    """
+    Stages completed by a run, persisted after each success so a failed run can resume.
+    Entries recorded under another `run_id` (e.g. a previous ingestion day) are ignored.
+    """
+
+    def __init__(self, manifest: JsonManifest, run_id: str) -> None:
+        self.manifest = manifest
+        self.run_id = run_id
+
+    def is_done(self, name: str) -> bool:
+        entry = self.manifest.get(name)
+        return bool(entry) and entry.get("run_id") == self.run_id
+
+    def mark_done(self, name: str, elapsed_sec: float) -> None:
+        self.manifest.set(
+            name,
+            {
+                "run_id": self.run_id,
+                "elapsed_sec": round(elapsed_sec, 3),
+                "finished_at": datetime.now(UTC).isoformat(),
+            },
+        )
+        self.manifest.save()
+
+    def clear(self) -> None:
+        for name in self.manifest.entries():
+            self.manifest.remove(name)
+        self.manifest.path.unlink(missing_ok=True)
+
+
+def run_dag(
+    stages: Iterable[Stage],
+    context: Any,
+    checkpoint: StageCheckpoint | None = None,
+    max_workers: int = 4,
+    metrics: RunMetrics | None = None,
+) -> dict:
+    """
+    Run stages in-process as soon as their dependencies succeeded, up to `max_workers` at once.
+    Every stage receives the same `context` (shared config and clients).
+    A failed stage blocks its dependents only; independent branches keep running.
+    Stages already done in `checkpoint` are not re-run.
+    With `metrics`, each stage is timed as a span (files are recorded by the stages).
+    Returns a summary: done, resumed, failed (name -> error), blocked, results, elapsed_sec.
+    """
+    by_name = validate_stages(stages)
+    t0 = time.perf_counter()
+
+    resumed = [n for n in by_name if checkpoint is not None and checkpoint.is_done(n)]
+    succeeded: set[str] = set(resumed)
+    done: list[str] = []
+    failed: dict[str, str] = {}
+    blocked: list[str] = []
+    results: dict[str, Any] = {}
+    pending = {n: s for n, s in by_name.items() if n not in succeeded}
+    for name in resumed:
+        logger.info(f"⏭️  {name}: déjà fait (checkpoint)")
+
+    def run_stage(stage: Stage) -> tuple[Any, float]:
+        start = time.perf_counter()
+        logger.info(f"▶️  {stage.name}...")
+        if metrics is None:
+            result = stage.func(context)
+        else:
+            with metrics.stage(stage.name):
+                result = stage.func(context)
+        return result, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        running = {}
+        while pending or running:
+            # Dependents (direct or not) of a failed stage can never run
+            stuck = True
+            while stuck:
+                stuck = False
+                for name, stage in list(pending.items()):
+                    if any(d in failed or d in blocked for d in stage.deps):
+                        blocked.append(name)
+                        del pending[name]
+                        stuck = True
+            for name, stage in list(pending.items()):
+                if all(d in succeeded for d in stage.deps):
+                    running[pool.submit(run_stage, stage)] = name
+                    del pending[name]
+            if not running:
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                try:
+                    result, elapsed = future.result()
+                except Exception as e:
+                    logger.error(f"❌ {name} échoué: {e}")
+                    failed[name] = str(e)
+                    continue
+                logger.info(f"✅ {name} réussi ({elapsed:.2f}s)")
+                succeeded.add(name)
+                done.append(name)
+                results[name] = result
+                if checkpoint is not None:
+                    checkpoint.mark_done(name, elapsed)
+
+    return {
+        "done": done,
+        "resumed": resumed,
+        "failed": failed,
+        "blocked": blocked,
+        "results": results,
+        "elapsed_sec": time.perf_counter() - t0,
+    }
@@ -0,0 +1,818 @@
+"""Stages of the TLC pipeline, as callables of a shared PipelineContext."""
+
+from __future__ import annotations
+
+import time
+from datetime import date
+from pathlib import Path
+
+from de_pipeline.common.logging import get_logger
+from de_pipeline.common.manifest import JsonManifest
+from de_pipeline.common.services import GREEN, SERVICES, TripService, service_of_table
+from de_pipeline.orchestration.context import PipelineContext
+from de_pipeline.orchestration.dag import Stage
+
+logger = get_logger(__name__)
+
+# Stage producing each table checked by DQ (config/dq.yml tables).
+TABLE_STAGES = {
+    **{s.raw_table: "load_trips" for s in SERVICES.values()},
+    "taxi_zone_lookup": "load_zones",
+    **{s.fact_table: "transform_fact" for s in SERVICES.values()},
+    "dim_location": "transform_dim_location",
+    "agg_zone_hour": "transform_aggregates",
+    "agg_borough_day": "transform_aggregates",
+}
+
+
+# Months already loaded, per backend (a local rebuild must not skip months loaded to BigQuery).
+LOAD_LEDGERS = {"gcp": "bigquery_loads", "local": "local_loads"}
+
+
+def _streaming(ctx: PipelineContext) -> bool:
+    return ctx.section("download").get("mode", "local") == "stream"
+
+
+def _rewritten_later(ctx: PipelineContext) -> bool:
+    """True when normalize (and dedup) will replace today's trips files after the download."""
+    return bool(ctx.section("normalize").get("enabled", False)) and not _streaming(ctx)
+
+
+def _adopt(ctx: PipelineContext, metas: list[dict]) -> None:
+    """
+    Hardlink final local files into the content-addressed cache (runtime.cache). Trips files
+    rewritten by normalize are adopted once rewritten only: a blob of the downloaded bytes
+    would lose its last partition link and stay on disk until `gc`.
+    """
+    cache = ctx.blob_cache()
+    if cache is None:
+        return
+    deduplicated = 0
+    for meta in metas:
+        if meta.get("path") and Path(meta["path"]).exists():
+            deduplicated += cache.adopt(Path(meta["path"]), meta.get("md5"))
+    cache.save()
+    if deduplicated:
+        logger.info(f"🔗 {deduplicated} fichier(s) identique(s) déjà en cache : liens physiques")
+
+
+def _record_checksums(ctx: PipelineContext, metas: list[dict]) -> None:
+    """Keep the md5 / crc32c hashed during the download: the upload will not re-read the file."""
+    checksums = ctx.checksums()
+    for meta in metas:
+        if meta.get("path") and meta.get("crc32c") and Path(meta["path"]).exists():
+            checksums.record(Path(meta["path"]), meta["md5"], meta["crc32c"])
+    checksums.save()
+
+
+def _sources(ctx: PipelineContext):
+    from de_pipeline.ingestion.source import TLCSources
+
+    src_cfg = ctx.dataset_cfg["dataset"]["source"]
+    return TLCSources(
+        base_url=src_cfg["base_url"],
+        trips_path_template=src_cfg["trips_path_template"],
+        zones_path=src_cfg["zones_path"],
+    )
+
+
+def download_zones(ctx: PipelineContext) -> dict:
+    """Zones lookup (small csv), to the local partition or streamed to GCS."""
+    from de_pipeline.ingestion.downloader import download_file
+    from de_pipeline.ingestion.streaming import stream_to_store
+
+    timeout_sec = int(ctx.runtime["request_timeout_sec"])
+    chunk_size = int(ctx.runtime["chunk_size_bytes"])
+    url = _sources(ctx).zones_url()
+    dest = ctx.partition_dir / "taxi_zone_lookup.csv"
+    start = time.perf_counter()
+    if _streaming(ctx):
+        keep_local = bool(ctx.section("download").get("keep_local_copy", False))
+        meta = stream_to_store(
+            url,
+            ctx.object_store(),
+            f"{ctx.conventions['gcs_prefix']}/{ctx.partition}/{dest.name}",
+            timeout_sec=timeout_sec,
+            chunk_size=chunk_size,
+            session=ctx.http(),
+            local_copy=dest if keep_local else None,
+        )
+    else:
+        meta = download_file(
+            url, dest, timeout_sec=timeout_sec, chunk_size=chunk_size, session=ctx.http()
+        )
+    ctx.metrics.file(
+        "download_zones", dest.name, wall_sec=time.perf_counter() - start, bytes=meta["bytes"]
+    )
+    _record_checksums(ctx, [meta])
+    _adopt(ctx, [meta])
+    return meta
+
+
+def download_trips(ctx: PipelineContext) -> dict:
+    """Monthly trips parquet of the months_back window, for each service, in parallel."""
+    from de_pipeline.ingestion.batch import DownloadJob, download_many
+    from de_pipeline.ingestion.source import month_start_n_months_back
+
+    download_cfg = ctx.section("download")
+    months_back = int(ctx.dataset_cfg["dataset"]["default_range"]["months_back"])
+    months = month_start_n_months_back(date.today(), months_back)
+    src = _sources(ctx)
+    store = ctx.object_store() if _streaming(ctx) else None
+    keep_local = bool(download_cfg.get("keep_local_copy", False)) if store is not None else True
+
+    summary: dict = {"ok": [], "skipped": [], "failed": [], "bytes": 0}
+    jobs_count = 0
+    # Un service après l'autre (un manifest chacun) ; les mois d'un service en parallèle.
+    for service in ctx.services:
+        jobs = []
+        for y, m in months:
+            filename = service.file_name(y, m)
+            jobs.append(
+                DownloadJob(
+                    url=src.trip_url(y, m, service.name),
+                    dest_path=ctx.service_dir(service) / filename,
+                    label=f"{service.name} {y:04d}-{m:02d}",
+                    object_name=f"{ctx.service_gcs_prefix(service)}/{ctx.partition}/{filename}",
+                )
+            )
+        jobs_count += len(jobs)
+        manifest = None
+        if download_cfg.get("incremental", False):
+            manifest = JsonManifest(ctx.download_manifest_path(service))
+
+        result = download_many(
+            jobs,
+            max_workers=int(download_cfg.get("max_workers", 1)),
+            timeout_sec=int(ctx.runtime["request_timeout_sec"]),
+            chunk_size=int(ctx.runtime["chunk_size_bytes"]),
+            max_retries=int(download_cfg.get("max_retries", 3)),
+            backoff_sec=float(download_cfg.get("retry_backoff_sec", 2)),
+            split_parts=int(download_cfg.get("split_parts", 1)),
+            split_min_bytes=int(download_cfg.get("split_min_bytes", 0)),
+            session=ctx.http(),
+            manifest=manifest,
+            store=store,
+            keep_local=keep_local,
+        )
+        for key in ("ok", "skipped", "failed"):
+            summary[key] += result[key]
+        summary["bytes"] += result["bytes"]
+
+    for meta in summary["ok"]:
+        ctx.metrics.file(
+            "download_trips",
+            meta["url"].rsplit("/", 1)[-1],
+            wall_sec=meta["elapsed_sec"],
+            bytes=meta["bytes"],
+            retries=meta["attempts"] - 1,
+        )
+    _record_checksums(ctx, summary["ok"])
+    if not _rewritten_later(ctx):
+        _adopt(ctx, summary["ok"])
+    for failure in summary["failed"]:
+        logger.warning(f"⚠️  Skipped {failure['label']}: {failure['error']}")
+    # Un mois manquant (pas encore publié) n'empêche pas la suite ; aucun mois, si.
+    if jobs_count and len(summary["failed"]) == jobs_count:
+        raise RuntimeError("No month could be downloaded")
+    return summary
+
+
+def _service_files(ctx: PipelineContext) -> list[tuple[TripService, Path]]:
+    """Today's monthly trips files, with their service."""
+    return [
+        (service, path)
+        for service in ctx.services
+        for path in sorted(ctx.service_dir(service).glob(f"{service.file_prefix}*.parquet"))
+    ]
+
+
+def _normalize_file(ctx: PipelineContext, service: TripService, path: Path) -> dict | None:
+    """
+    Rewrite one trips file (runtime.normalize), then deduplicate it (runtime.dedup);
+    None when both were already done.
+    """
+    import pyarrow.parquet as pq
+
+    from de_pipeline.ingestion.normalize import is_normalized, normalize_parquet
+
+    normalize_cfg = ctx.section("normalize")
+    dedup_enabled = ctx.section("dedup").get("enabled", False)
+    # Idempotent : un fichier déjà réécrit (reprise du DAG) n'est pas réécrit. La dédup
+    # tourne encore si rien n'est en attente ni chargé pour son mois (arrêt entre les deux).
+    if is_normalized(path, service.columns):
+        if not dedup_enabled or _fingerprint_index(ctx, service).recorded(_source_month(path)):
+            return None
+        meta = pq.read_metadata(path)
+        size = path.stat().st_size
+        report = {
+            "path": str(path),
+            "rows": meta.num_rows,
+            "row_groups": meta.num_row_groups,
+            "bytes_in": size,
+            "bytes_out": size,
+            "elapsed_sec": 0.0,
+        }
+    else:
+        report = normalize_parquet(
+            path,
+            columns=service.columns,
+            sort_by=service.pickup_column,
+            row_group_size=int(normalize_cfg.get("row_group_size", 1_000_000)),
+            sort_run_rows=int(normalize_cfg.get("sort_run_rows", 2_000_000)),
+            compression=normalize_cfg.get("compression", "zstd"),
+            compression_level=normalize_cfg.get("compression_level"),
+        )
+    if dedup_enabled:
+        dedup = _dedup_file(ctx, service, path)
+        report.update(rows=dedup["rows"], bytes_out=path.stat().st_size, dedup=dedup)
+    # md5 et crc32c du fichier réécrit, lus une fois : l'upload les réutilise.
+    checksums = ctx.checksums()
+    report["md5"] = checksums.get(path)["md5"]
+    checksums.save()
+    report["service"] = service.name
+    ctx.metrics.file(
+        "normalize_trips",
+        path.name,
+        wall_sec=report["elapsed_sec"],
+        rows=report["rows"],
+        bytes=report["bytes_out"],
+    )
+    return report
+
+
+def _fingerprint_index(ctx: PipelineContext, service: TripService):
+    """Index of the trips already loaded for `service` (runtime.dedup), shared by the run."""
+
+    def factory():
+        from de_pipeline.ingestion.fingerprint import FingerprintIndex
+
+        root = Path(ctx.section("dedup").get("dir", "data/fingerprints"))
+        return FingerprintIndex(root / ctx.service_prefix(service))
+
+    return ctx.client(f"fingerprints:{service.name}", factory)
+
+
+def _source_month(path: Path) -> int:
+    """Month (YYYYMM) of a trips file: its source in the fingerprint index."""
+    from de_pipeline.ingestion.repartition import month_of_file
+
+    year, month = month_of_file(path)
+    return year * 100 + month
+
+
+def _dedup_file(ctx: PipelineContext, service: TripService, path: Path) -> dict:
+    """Drop the trips of `path` repeated in the file or already loaded by another month."""
+    from de_pipeline.ingestion.fingerprint import dedup_file
+
+    report = dedup_file(
+        path,
+        _fingerprint_index(ctx, service),
+        source=_source_month(path),
+        columns=service.columns,
+        pickup_column=service.pickup_column,
+    )
+    ctx.metrics.file(
+        "dedup_trips",
+        path.name,
+        wall_sec=report["elapsed_sec"],
+        rows=report["rows"],
+        duplicate_rows=report["duplicates"] + report["already_loaded"],
+    )
+    return report
+
+
+def _commit_fingerprints(ctx: PipelineContext, service: TripService, partitions: list[str]) -> None:
+    """Record the trips of the month files just loaded (partition ids YYYYMM) in the index."""
+    if not ctx.section("dedup").get("enabled", False):
+        return
+    index = _fingerprint_index(ctx, service)
+    for partition in partitions:
+        year, month = int(partition[:4]), int(partition[4:])
+        index.commit(int(partition), service.file_name(year, month))
+
+
+def _record_normalized(manifest: JsonManifest, reports: list[dict]) -> None:
+    # Le manifest garde le md5 téléchargé (incrémental) ; `gc` protège aussi la version réécrite.
+    for report in reports:
+        entry = manifest.get(Path(report["path"]).name)
+        if entry:
+            manifest.set(Path(report["path"]).name, {**entry, "normalized_md5": report["md5"]})
+    manifest.save()
+
+
+def normalize_trips(ctx: PipelineContext) -> dict:
+    """
+    Rewrite today's trips parquet to the canonical schema (runtime.normalize), sorted by
+    pickup time and zstd-compressed, so loads no longer depend on each month's drift.
+    """
+    summary: dict = {"ok": [], "skipped": [], "bytes_in": 0, "bytes_out": 0}
+    if not ctx.section("normalize").get("enabled", False):
+        return summary
+    if _streaming(ctx):
+        logger.info("⏭️  Mode stream : pas de fichier local à normaliser")
+        return summary
+    for service, path in _service_files(ctx):
+        report = _normalize_file(ctx, service, path)
+        if report is None:
+            summary["skipped"].append(path.name)
+            continue
+        summary["ok"].append(report)
+        summary["bytes_in"] += report["bytes_in"]
+        summary["bytes_out"] += report["bytes_out"]
+    for service in ctx.services:
+        reports = [r for r in summary["ok"] if r["service"] == service.name]
+        manifest_path = ctx.download_manifest_path(service)
+        if reports and manifest_path.exists():
+            _record_normalized(JsonManifest(manifest_path), reports)
+    _adopt(ctx, summary["ok"])
+    return summary
+
+
+def repartition_trips(ctx: PipelineContext) -> dict:
+    """
+    Route today's trips into `pickup_month=YYYY-MM` partitions by event time
+    (runtime.repartition), out-of-range or impossible timestamps into a quarantine
+    partition; per-file counts are kept in `_manifests/repartition.json`.
+    """
+    from de_pipeline.ingestion.repartition import repartition_file
+
+    repartition_cfg = ctx.section("repartition")
+    summary: dict = {"ok": [], "skipped": [], "quarantined_rows": 0}
+    if not repartition_cfg.get("enabled", False):
+        return summary
+    if _streaming(ctx):
+        logger.info("⏭️  Mode stream : pas de fichier local à repartitionner")
+        return summary
+    root = Path(repartition_cfg.get("dir", "data/partitioned"))
+    counts = JsonManifest(ctx.manifests_dir / "repartition.json")
+    for service, path in _service_files(ctx):
+        stat = path.stat()
+        source = {"source": str(path), "bytes": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        entry = counts.get(path.name)
+        if entry and {k: entry.get(k) for k in source} == source:
+            summary["skipped"].append(path.name)
+            continue
+        report = repartition_file(
+            path,
+            root / ctx.service_prefix(service),
+            pickup_column=service.pickup_column,
+            dropoff_column=service.dropoff_column,
+            max_month_drift=_max_month_drift(ctx),
+        )
+        quarantined = sum(report["quarantined"].values())
+        ctx.metrics.file(
+            "repartition_trips",
+            path.name,
+            wall_sec=report["elapsed_sec"],
+            rows=report["rows"],
+            quarantined_rows=quarantined,
+        )
+        counts.set(
+            path.name,
+            {
+                **source,
+                "rows": report["rows"],
+                "partitions": report["partitions"],
+                "quarantined": report["quarantined"],
+            },
+        )
+        counts.save()
+        summary["ok"].append(report)
+        summary["quarantined_rows"] += quarantined
+    return summary
+
+
+def upload(ctx: PipelineContext) -> dict:
+    """Upload the current partition (or all, per runtime.upload.partition_scope) to the bucket."""
+    from de_pipeline.storage.uploader import iter_upload_jobs
+
+    if _streaming(ctx):
+        logger.info("⏭️  Mode stream : fichiers déjà dans GCS")
+        return {"ok": [], "failed": [], "bytes": 0}
+
+    upload_cfg = ctx.section("upload")
+    checksums = ctx.checksums() if upload_cfg.get("skip_identical", True) else None
+    partition = ctx.partition if upload_cfg.get("partition_scope", "current") == "current" else None
+    # Dossier des zones (raw_conventions) et celui de chaque service.
+    prefixes = {ctx.conventions["local_prefix"]: ctx.conventions["gcs_prefix"]}
+    prefixes.update({ctx.service_prefix(s): ctx.service_gcs_prefix(s) for s in ctx.services})
+    jobs = [
+        job
+        for local_prefix, gcs_prefix in prefixes.items()
+        if (ctx.local_raw_dir / local_prefix).exists()
+        for job in iter_upload_jobs(ctx.local_raw_dir / local_prefix, gcs_prefix, partition)
+    ]
+    summary = ctx.object_store().upload_files(
+        jobs,
+        max_workers=int(upload_cfg.get("max_workers", 8)),
+        chunk_threshold=int(upload_cfg.get("chunk_threshold_bytes", 128 * 1024 * 1024)),
+        part_size=int(upload_cfg.get("part_size_bytes", 32 * 1024 * 1024)),
+        checksums=checksums,
+    )
+    if checksums is not None:
+        checksums.save()
+    for f in summary["files"]:
+        ctx.metrics.file("upload", f["blob"], wall_sec=f["transfer_sec"], bytes=f["bytes"])
+    if summary["failed"]:
+        raise RuntimeError(f"{len(summary['failed'])} upload(s) failed")
+    return summary
+
+
+def ensure_datasets(ctx: PipelineContext) -> None:
+    warehouse = ctx.warehouse()
+    for dataset_id in (ctx.dataset_raw, ctx.dataset_curated):
+        warehouse.ensure_dataset(dataset_id)
+
+
+def load_trips(ctx: PipelineContext) -> dict:
+    """
+    One load job per month and service (latest ingestion_date of each month in the
+    bucket), into the service's raw table.
+    """
+    from de_pipeline.load.loader import latest_month_objects, load_months
+
+    store = ctx.object_store()
+    warehouse = ctx.warehouse()
+    ledger = JsonManifest(ctx.manifests_dir / f"{LOAD_LEDGERS[ctx.backend]}.json")
+    summary: dict = {"loaded": [], "skipped": [], "failed": []}
+    for service in ctx.services:
+        loads = latest_month_objects(
+            store.list_objects(f"{ctx.service_gcs_prefix(service)}/"),
+            ctx.bucket_name,
+            name_prefix=service.file_prefix,
+            uri=store.uri,
+        )
+        table_ref = f"{ctx.project_id}.{ctx.dataset_raw}.{service.raw_table}"
+        warehouse.ensure_month_partitioned_table(table_ref, service.raw_columns)
+        result = load_months(
+            warehouse,
+            table_ref,
+            loads,
+            service.raw_columns,
+            ledger=ledger,
+            max_workers=int(ctx.section("load").get("max_workers", 4)),
+        )
+        for report in result["loaded"]:
+            ctx.metrics.file(
+                "load_trips",
+                f"{service.raw_table}${report['partition']}",
+                wall_sec=report["elapsed_sec"],
+                rows=report["rows"],
+                bytes=report["bytes"],
+            )
+        # Trips dédoublonnés enregistrés comme chargés seulement une fois le mois chargé.
+        _commit_fingerprints(
+            ctx, service, [r["partition"] for r in result["loaded"]] + result["skipped"]
+        )
+        for key in summary:
+            summary[key] += result[key]
+    if summary["failed"]:
+        raise RuntimeError(f"{len(summary['failed'])} month load(s) failed")
+    return summary
+
+
+# Étapes d'un seul mois (backfill) : chacune reçoit ce que la précédente a produit.
+
+
+def download_month(
+    ctx: PipelineContext,
+    service: TripService,
+    year: int,
+    month: int,
+    manifest: JsonManifest | None = None,
+) -> dict:
+    """
+    One month of `service` into today's partition (or streamed to the bucket), recorded
+    in its download manifest. Returns: path (None when streamed without a local copy),
+    object_name, bytes, md5.
+    """
+    from de_pipeline.ingestion.batch import DownloadJob, download_with_retry
+    from de_pipeline.ingestion.incremental import manifest_entry
+
+    download_cfg = ctx.section("download")
+    store = ctx.object_store() if _streaming(ctx) else None
+    keep_local = bool(download_cfg.get("keep_local_copy", False)) if store is not None else True
+    filename = service.file_name(year, month)
+    job = DownloadJob(
+        url=_sources(ctx).trip_url(year, month, service.name),
+        dest_path=ctx.service_dir(service) / filename,
+        label=f"{service.name} {year:04d}-{month:02d}",
+        object_name=f"{ctx.service_gcs_prefix(service)}/{ctx.partition}/{filename}",
+    )
+    meta = download_with_retry(
+        job,
+        ctx.http(),
+        timeout_sec=int(ctx.runtime["request_timeout_sec"]),
+        chunk_size=int(ctx.runtime["chunk_size_bytes"]),
+        max_retries=int(download_cfg.get("max_retries", 3)),
+        backoff_sec=float(download_cfg.get("retry_backoff_sec", 2)),
+        split_parts=int(download_cfg.get("split_parts", 1)),
+        split_min_bytes=int(download_cfg.get("split_min_bytes", 0)),
+        store=store,
+        keep_local=keep_local,
+    )
+    if manifest is not None:
+        manifest.set(filename, manifest_entry(meta))
+        manifest.save()
+    ctx.metrics.file(
+        "download_trips",
+        filename,
+        wall_sec=meta["elapsed_sec"],
+        bytes=meta["bytes"],
+        retries=meta["attempts"] - 1,
+    )
+    _record_checksums(ctx, [meta])
+    if not _rewritten_later(ctx):
+        _adopt(ctx, [meta])
+    return {
+        "path": meta.get("path"),
+        "object_name": job.object_name,
+        "bytes": meta["bytes"],
+        "md5": meta["md5"],
+    }
+
+
+def normalize_month(
+    ctx: PipelineContext,
+    service: TripService,
+    path: str | None,
+    manifest: JsonManifest | None = None,
+) -> dict:
+    """normalize_trips for one downloaded file; a no-op when disabled or streamed."""
+    if not ctx.section("normalize").get("enabled", False) or _streaming(ctx) or path is None:
+        return {"skipped": True}
+    report = _normalize_file(ctx, service, Path(path))
+    if report is None:
+        return {"skipped": True}
+    if manifest is not None:
+        _record_normalized(manifest, [report])
+    _adopt(ctx, [report])
+    return {"rows": report["rows"], "bytes": report["bytes_out"], "md5": report["md5"]}
+
+
+def upload_month(ctx: PipelineContext, path: str | None, object_name: str) -> dict:
+    """Upload one local file to `object_name`; a no-op when it was streamed to the bucket."""
+    from de_pipeline.storage.uploader import UploadJob
+
+    if _streaming(ctx):
+        return {"skipped": True}
+    upload_cfg = ctx.section("upload")
+    checksums = ctx.checksums() if upload_cfg.get("skip_identical", True) else None
+    summary = ctx.object_store().upload_files(
+        [UploadJob(path=Path(path), blob_name=object_name)],
+        max_workers=int(upload_cfg.get("max_workers", 8)),
+        chunk_threshold=int(upload_cfg.get("chunk_threshold_bytes", 128 * 1024 * 1024)),
+        part_size=int(upload_cfg.get("part_size_bytes", 32 * 1024 * 1024)),
+        checksums=checksums,
+    )
+    if checksums is not None:
+        checksums.save()
+    if summary["failed"]:
+        raise RuntimeError(f"Upload failed for {path}: {summary['failed'][0]['error']}")
+    for f in summary["files"]:
+        ctx.metrics.file("upload", f["blob"], wall_sec=f["transfer_sec"], bytes=f["bytes"])
+    return {"bytes": summary["bytes"]}
+
+
+def load_trips_month(
+    ctx: PipelineContext,
+    service: TripService,
+    year: int,
+    month: int,
+    object_name: str,
+    ledger: JsonManifest | None = None,
+) -> dict:
+    """
+    Load one bucket object into its month partition of the service's raw table (the
+    table must exist); skipped when the ledger already holds the same checksum.
+    """
+    from de_pipeline.load.loader import MonthLoad, load_months
+
+    store = ctx.object_store()
+    found = [obj for obj in store.list_objects(object_name) if obj.name == object_name]
+    if not found:
+        raise FileNotFoundError(f"Object not found in bucket: {object_name}")
+    load = MonthLoad(
+        year=year,
+        month=month,
+        uri=store.uri(object_name),
+        checksum=found[0].md5_hash or found[0].crc32c,
+    )
+    table_ref = f"{ctx.project_id}.{ctx.dataset_raw}.{service.raw_table}"
+    result = load_months(
+        ctx.warehouse(), table_ref, [load], service.raw_columns, ledger=ledger, max_workers=1
+    )
+    if result["failed"]:
+        raise RuntimeError(f"Load failed for {object_name}: {result['failed'][0]['error']}")
+    _commit_fingerprints(ctx, service, [load.partition_id])
+    for report in result["loaded"]:
+        ctx.metrics.file(
+            "load_trips",
+            f"{service.raw_table}${report['partition']}",
+            wall_sec=report["elapsed_sec"],
+            rows=report["rows"],
+            bytes=report["bytes"],
+        )
+        return {"partition": report["partition"], "rows": report["rows"]}
+    return {"partition": load.partition_id, "skipped": True}
+
+
+def load_zones(ctx: PipelineContext) -> dict:
+    """Zones CSV of today's ingestion_date partition."""
+    from de_pipeline.common.schemas import TAXI_ZONE_COLUMNS
+
+    uri = ctx.object_store().uri(
+        f"{ctx.conventions['gcs_prefix']}/{ctx.partition}/taxi_zone_lookup.csv"
+    )
+    report = ctx.warehouse().load_csv(
+        uri, f"{ctx.project_id}.{ctx.dataset_raw}.taxi_zone_lookup", TAXI_ZONE_COLUMNS
+    )
+    ctx.metrics.add("load_zones", rows=report["rows"], bytes=report["bytes"])
+    return report
+
+
+def months_to_refresh(ctx: PipelineContext, service: TripService = GREEN) -> list[tuple[int, int]]:
+    """Mois touchés par le dernier téléchargement (manifest), sinon la fenêtre months_back."""
+    from de_pipeline.ingestion.incremental import months_in_partition
+    from de_pipeline.ingestion.source import month_start_n_months_back
+
+    manifest_path = ctx.download_manifest_path(service)
+    if manifest_path.exists():
+        return months_in_partition(JsonManifest(manifest_path).entries(), ctx.partition)
+    months_back = int(ctx.dataset_cfg["dataset"]["default_range"]["months_back"])
+    return month_start_n_months_back(date.today(), months_back)
+
+
+def _max_month_drift(ctx: PipelineContext) -> int:
+    return int(ctx.section("repartition").get("max_month_drift", 1))
+
+
+def pickup_months_to_refresh(
+    ctx: PipelineContext, service: TripService = GREEN
+) -> list[tuple[int, int]]:
+    """Mois de pickup que le refresh des faits réécrit : months_to_refresh élargis de la dérive."""
+    from de_pipeline.transform.fact import widen_months
+
+    return widen_months(months_to_refresh(ctx, service), _max_month_drift(ctx))
+
+
+def _add_query_bytes(ctx: PipelineContext, stage: str, report: dict) -> dict:
+    ctx.metrics.add(
+        stage,
+        bq_bytes_processed=report.get("bytes_processed"),
+        bq_bytes_billed=report.get("bytes_billed"),
+    )
+    return report
+
+
+def transform_dim_datetime(ctx: PipelineContext) -> dict | None:
+    """
+    Calendar (runtime.calendar) extended to the pickup dates of the fact tables: all of
+    them in full mode, else those of the months just refreshed.
+    """
+    from de_pipeline.transform.dimensions import extend_dim_datetime
+
+    calendar_cfg = ctx.section("calendar")
+    full = ctx.section("transform").get("mode", "full") != "incremental"
+    months = None
+    if not full:
+        months = sorted(
+            {m for service in ctx.services for m in pickup_months_to_refresh(ctx, service)}
+        )
+        if not months:
+            logger.info("⏭️  Aucun mois nouveau : dim_datetime inchangée")
+            return None
+    report = extend_dim_datetime(
+        ctx.warehouse(),
+        ctx.project_id,
+        ctx.dataset_curated,
+        [f"{ctx.project_id}.{ctx.dataset_curated}.{s.fact_table}" for s in ctx.services],
+        months,
+        grain=calendar_cfg.get("grain", "hour"),
+        build=calendar_cfg.get("build", "sql"),
+    )
+    return _add_query_bytes(ctx, "transform_dim_datetime", report)
+
+
+def transform_fact(ctx: PipelineContext) -> dict:
+    """Fact table of each service: rebuilt (full) or refreshed for the months just downloaded."""
+    from de_pipeline.transform.fact import create_fact_tripdata, refresh_fact_tripdata
+
+    client = ctx.warehouse()
+    reports: dict[str, dict | None] = {}
+    for service in ctx.services:
+        if ctx.section("transform").get("mode", "full") != "incremental":
+            report = create_fact_tripdata(
+                client, ctx.project_id, ctx.dataset_raw, ctx.dataset_curated, service
+            )
+            reports[service.name] = _add_query_bytes(ctx, "transform_fact", report)
+            continue
+        months = months_to_refresh(ctx, service)
+        if not months:
+            logger.info(f"⏭️  Aucun mois nouveau : {service.fact_table} inchangée")
+            reports[service.name] = None
+            continue
+        report = refresh_fact_tripdata(
+            client,
+            ctx.project_id,
+            ctx.dataset_raw,
+            ctx.dataset_curated,
+            months,
+            service,
+            max_month_drift=_max_month_drift(ctx),
+        )
+        reports[service.name] = _add_query_bytes(ctx, "transform_fact", report)
+    return reports
+
+
+def transform_aggregates(ctx: PipelineContext) -> dict:
+    """
+    Serving tables (zone x hour, borough x day) of each service (runtime.aggregates):
+    rebuilt in full mode, else only for the pickup dates of the months just refreshed.
+    """
+    from de_pipeline.transform.aggregates import refresh_aggregates
+
+    reports: dict[str, dict | None] = {}
+    if not ctx.section("aggregates").get("enabled", False):
+        return reports
+    full = ctx.section("transform").get("mode", "full") != "incremental"
+    for service in ctx.services:
+        months = None if full else pickup_months_to_refresh(ctx, service)
+        if months == []:
+            logger.info(f"⏭️  Aucun mois nouveau : agrégats {service.name} inchangés")
+            reports[service.name] = None
+            continue
+        report = refresh_aggregates(
+            ctx.warehouse(), ctx.project_id, ctx.dataset_curated, service, months
+        )
+        reports[service.name] = _add_query_bytes(ctx, "transform_aggregates", report)
+    return reports
+
+
+def transform_dim_location(ctx: PipelineContext) -> dict:
+    from de_pipeline.transform.dimensions import create_dim_location
+
+    report = create_dim_location(
+        ctx.warehouse(), ctx.project_id, ctx.dataset_raw, ctx.dataset_curated
+    )
+    return _add_query_bytes(ctx, "transform_dim_location", report)
+
+
+def dq_stage(table: str, table_ref: str, rules: list) -> Stage:
+    """DQ stage of one table (one aggregate query); fails when any rule fails."""
+    from de_pipeline.dq.warehouse import check_table
+
+    def run(ctx: PipelineContext) -> dict:
+        report = check_table(ctx.warehouse(), table_ref, rules)
+        ctx.metrics.add(f"dq_{table}", rows=report["rows"])
+        _add_query_bytes(ctx, f"dq_{table}", report)
+        if not report["passed"]:
+            failed = {r["rule"]: r["failed_rows"] for r in report["results"] if not r["passed"]}
+            raise RuntimeError(f"DQ failed on {table}: {failed}")
+        return report
+
+    if table in TABLE_STAGES:
+        deps = (TABLE_STAGES[table],)
+    else:
+        deps = tuple(dict.fromkeys(TABLE_STAGES.values()))
+    return Stage(f"dq_{table}", run, deps)
+
+
+def build_stages(ctx: PipelineContext) -> list[Stage]:
+    """
+    The end-to-end DAG: zones and trips branches run side by side from download to
+    transform, and each table's DQ check starts as soon as that table is built.
+    """
+    from de_pipeline.dq.rules import load_rules
+
+    stages = [
+        Stage("download_zones", download_zones),
+        Stage("download_trips", download_trips),
+        Stage("normalize_trips", normalize_trips, ("download_trips",)),
+        Stage("repartition_trips", repartition_trips, ("normalize_trips",)),
+        Stage("upload", upload, ("download_zones", "normalize_trips")),
+        Stage("ensure_datasets", ensure_datasets),
+        Stage("load_trips", load_trips, ("upload", "ensure_datasets")),
+        Stage("load_zones", load_zones, ("upload", "ensure_datasets")),
+        Stage("transform_dim_datetime", transform_dim_datetime, ("transform_fact",)),
+        Stage("transform_fact", transform_fact, ("load_trips",)),
+        Stage("transform_dim_location", transform_dim_location, ("load_zones",)),
+        Stage(
+            "transform_aggregates",
+            transform_aggregates,
+            ("transform_fact", "transform_dim_location"),
+        ),
+    ]
+    datasets = {"raw": ctx.dataset_raw, "curated": ctx.dataset_curated}
+    enabled = {service.name for service in ctx.services}
+    aggregates = ctx.section("aggregates").get("enabled", False)
+    for table, cfg in ctx.dq_cfg.get("tables", {}).items():
+        service = service_of_table(table)
+        if service is not None and service.name not in enabled:
+            continue
+        if TABLE_STAGES.get(table) == "transform_aggregates" and not aggregates:
+            continue
+        table_ref = f"{ctx.project_id}.{datasets[cfg['dataset']]}.{table}"
+        stages.append(dq_stage(table, table_ref, load_rules(cfg["rules"])))
+    return stages
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import threading
+import time
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import cached_property
+from pathlib import Path
+from typing import BinaryIO, Protocol
+
+from de_pipeline.common.logging import get_logger
+from de_pipeline.storage.uploader import TEMP_SUFFIXES, UploadJob, upload_files
+
+logger = get_logger(__name__)
+
+
+class ObjectStore(Protocol):
+    """Minimal object-storage surface used by ingestion, upload and load."""
+
+    def open_writer(self, name: str) -> BinaryIO:
+        """
+        Writable stream for object `name`, used as a context manager: the
+        object is published on a clean exit and discarded if the block raises.
+        """
+        ...
+
+    def uri(self, name: str) -> str: ...
+
+    def upload_files(self, jobs: list[UploadJob], max_workers: int = 8, **options) -> dict:
+        """Publish local files; same summary as uploader.upload_files."""
+        ...
+
+    def list_objects(self, prefix: str) -> Iterable:
+        """Objects under `prefix`, with `name`, `md5_hash` and `crc32c` (None when unknown)."""
+        ...
+
+
+class GCSObjectStore:
+    """Objects in a GCS bucket, written through resumable uploads of `chunk_size` bytes."""
+
+    def __init__(self, bucket, chunk_size: int = 8 * 1024 * 1024) -> None:
+        # Resumable upload chunks must be multiples of 256 KB.
+        self.bucket = bucket
+        self.chunk_size = max(256 * 1024, chunk_size - chunk_size % (256 * 1024))
+
+    def open_writer(self, name: str) -> BinaryIO:
+        # BlobWriter cancels the resumable session when its `with` block raises.
+        return self.bucket.blob(name, chunk_size=self.chunk_size).open("wb")
+
+    def uri(self, name: str) -> str:
+        return f"gs://{self.bucket.name}/{name}"
+
+    def upload_files(self, jobs: list[UploadJob], max_workers: int = 8, **options) -> dict:
+        return upload_files(self.bucket, jobs, max_workers=max_workers, **options)
+
+    def list_objects(self, prefix: str) -> Iterable:
+        return self.bucket.list_blobs(prefix=prefix)
+
+
+class _LocalWriter:
+    def __init__(self, dest: Path) -> None:
+        self.dest = dest
+        self.tmp_path = dest.with_name(f"{dest.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.tmp_path, "wb")  # noqa: SIM115 - closed in __exit__
+
+    def write(self, data: bytes) -> int:
+        return self._file.write(data)
+
+    def __enter__(self) -> _LocalWriter:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self._file.close()
+        if exc_type is None:
+            self.tmp_path.replace(self.dest)
+        else:
+            self.tmp_path.unlink(missing_ok=True)
+
+
+class LocalObject:
+    """One file of a LocalObjectStore; its md5 is only computed when read."""
+
+    def __init__(self, name: str, path: Path) -> None:
+        self.name = name
+        self.path = path
+        self.size = path.stat().st_size
+        self.crc32c = None
+
+    @cached_property
+    def md5_hash(self) -> str:
+        digest = hashlib.md5()
+        with open(self.path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+
+def _publish(src: Path, dest: Path) -> None:
+    """Hard link `src` at `dest` (copy across filesystems), replacing `dest` atomically."""
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(f"{dest.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    tmp.replace(dest)
+
+
+class LocalObjectStore:
+    """Directory-backed stand-in for a bucket: object `a/b.parquet` lives at `<root>/a/b.parquet`."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def open_writer(self, name: str) -> BinaryIO:
+        return _LocalWriter(self.root / name)
+
+    def uri(self, name: str) -> str:
+        return (self.root / name).as_posix()
+
+    def upload_files(self, jobs: list[UploadJob], max_workers: int = 8, **options) -> dict:
+        """
+        Link (or copy) files into the bucket directory; chunking options do not apply.
+        With `checksums`, objects already holding the same bytes are skipped.
+        """
+        checksums = options.get("checksums")
+        sizes = {job: job.path.stat().st_size for job in jobs}
+        ok: list[str] = []
+        skipped: list[str] = []
+        failed: list[dict] = []
+        files: list[dict] = []
+
+        def identical(job: UploadJob, dest: Path) -> bool:
+            if not dest.is_file() or dest.stat().st_size != sizes[job]:
+                return False
+            return (
+                dest.samefile(job.path)
+                or checksums.get(dest)["md5"] == checksums.get(job.path)["md5"]
+            )
+
+        def publish(job: UploadJob) -> float | None:
+            dest = self.root / job.blob_name
+            if checksums is not None and identical(job, dest):
+                return None
+            start = time.perf_counter()
+            _publish(job.path, dest)
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            futures = {pool.submit(publish, job): job for job in jobs}
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    transfer_sec = future.result()
+                except Exception as e:
+                    logger.warning(f"Upload failed for {job.path}: {e}")
+                    failed.append({"path": str(job.path), "error": str(e)})
+                    continue
+                if transfer_sec is None:
+                    skipped.append(job.blob_name)
+                    continue
+                ok.append(job.blob_name)
+                files.append(
+                    {"blob": job.blob_name, "bytes": sizes[job], "transfer_sec": transfer_sec}
+                )
+        elapsed = time.perf_counter() - start
+        total_bytes = sum(f["bytes"] for f in files)
+        logger.info(f"Published {len(ok)}/{len(jobs)} files to {self.root} in {elapsed:.2f}s")
+        return {
+            "ok": sorted(ok),
+            "skipped": sorted(skipped),
+            "failed": failed,
+            "bytes": total_bytes,
+            "skipped_bytes": sum(sizes[job] for job in jobs if job.blob_name in skipped),
+            "elapsed_sec": elapsed,
+            "throughput_mb_s": total_bytes / 1e6 / elapsed if elapsed > 0 else 0.0,
+            "files": sorted(files, key=lambda f: f["blob"]),
+        }
+
+    def list_objects(self, prefix: str) -> Iterable:
+        base = self.root / prefix if prefix else self.root
+        if not base.is_dir():
+            # A prefix may also end in a partial file name, as in GCS.
+            base = base.parent
+        for path in sorted(base.rglob("*")):
+            name = path.relative_to(self.root).as_posix()
+            if path.is_file() and name.startswith(prefix) and not name.endswith(TEMP_SUFFIXES):
+                yield LocalObject(name, path)
@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+
+from de_pipeline.common.checksums import (
+    ChecksumIndex,
+    Checksums,
+    file_checksums,
+    from_gcs,
+    to_gcs,
+)
+from de_pipeline.common.logging import get_logger
+
+logger = get_logger(__name__)
+
+# GCS refuses to compose more than 32 source objects in one call.
+MAX_COMPOSE_COMPONENTS = 32
+# In-flight download artefacts that must never be published.
+TEMP_SUFFIXES = (".part", ".part.json", ".split", ".tmp")
+
+
+@dataclass(frozen=True)
+class UploadJob:
+    path: Path
+    blob_name: str
+
+
+@dataclass(frozen=True)
+class _Chunk:
+    job: UploadJob
+    index: int
+    offset: int
+    length: int
+
+    @property
+    def blob_name(self) -> str:
+        return f"{self.job.blob_name}.part-{self.index:03d}"
+
+
+def iter_upload_jobs(
+    local_root: Path, prefix: str, partition: str | None = None
+) -> list[UploadJob]:
+    """
+    List files under `local_root` (or only its `partition` sub-folder, e.g.
+    "ingestion_date=2024-06-01") with their blob names: `<prefix>/<path relative to local_root>`.
+    """
+    if local_root.is_file():
+        return [UploadJob(path=local_root, blob_name=f"{prefix}/{local_root.name}")]
+    base = local_root / partition if partition else local_root
+    return [
+        UploadJob(path=file, blob_name=f"{prefix}/{file.relative_to(local_root).as_posix()}")
+        for file in sorted(base.rglob("*"))
+        if file.is_file() and not file.name.endswith(TEMP_SUFFIXES)
+    ]
+
+
+def _plan_chunks(job: UploadJob, size: int, chunk_threshold: int, part_size: int) -> list[_Chunk]:
+    if size <= chunk_threshold:
+        return [_Chunk(job, index=0, offset=0, length=size)]
+    part_size = max(part_size, -(-size // MAX_COMPOSE_COMPONENTS))
+    return [
+        _Chunk(job, index=i, offset=offset, length=min(part_size, size - offset))
+        for i, offset in enumerate(range(0, size, part_size))
+    ]
+
+
+def _same_object(remote, size: int, checksums: dict) -> bool:
+    """True when the bucket object `remote` holds exactly the bytes described by `checksums`."""
+    if remote is None or remote.size != size:
+        return False
+    # Les objets composés n'ont pas de md5 : crc32c d'abord.
+    if remote.crc32c:
+        return from_gcs(remote.crc32c) == checksums["crc32c"]
+    return from_gcs(remote.md5_hash) == checksums["md5"]
+
+
+class _HashingReader:
+    """
+    File wrapper hashing the bytes the upload reads, each byte once: a retry that seeks
+    back re-reads bytes already hashed, which are not hashed again.
+    """
+
+    def __init__(self, f, checksums: Checksums) -> None:
+        self._file = f
+        self.checksums = checksums
+        self.hashed_to = f.tell()
+
+    def read(self, size: int = -1) -> bytes:
+        pos = self._file.tell()
+        chunk = self._file.read(size)
+        if pos > self.hashed_to:
+            raise OSError("upload skipped bytes of the part, cannot hash it")
+        if pos + len(chunk) > self.hashed_to:
+            self.checksums.update(chunk[self.hashed_to - pos :])
+            self.hashed_to = pos + len(chunk)
+        return chunk
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+
+def _upload_chunk(
+    bucket, chunk: _Chunk, whole_file: bool, checksums: ChecksumIndex | None = None
+) -> tuple[int, float]:
+    """
+    Upload one chunk; returns the bytes sent (0 for a part kept) and the transfer time
+    in seconds. With `checksums`, a whole
+    file carries its crc32c and md5, which GCS checks against the bytes it received. A
+    part is hashed while it is read for the upload and its crc32c compared with the one
+    GCS computed; a part left by an interrupted upload with the same bytes is not resent
+    (only then is it read to be hashed).
+    """
+    start = time.perf_counter()
+    if whole_file:
+        blob = bucket.blob(chunk.job.blob_name)
+        if checksums is not None:
+            local = checksums.get(chunk.job.path)
+            blob.crc32c, blob.md5_hash = to_gcs(local["crc32c"]), to_gcs(local["md5"])
+        blob.upload_from_filename(str(chunk.job.path))
+        return chunk.length, time.perf_counter() - start
+    blob = bucket.blob(chunk.blob_name)
+    if checksums is not None:
+        remote = bucket.get_blob(chunk.blob_name)
+        if remote is not None and remote.size == chunk.length:
+            _, part = file_checksums(chunk.job.path, offset=chunk.offset, length=chunk.length)
+            if _same_object(remote, chunk.length, part.as_dict()):
+                return 0, 0.0
+    with open(chunk.job.path, "rb") as f:
+        f.seek(chunk.offset)
+        reader = _HashingReader(f, Checksums())
+        blob.upload_from_file(reader, size=chunk.length)
+    # GCS renvoie le crc32c des octets reçus : comparé à celui des octets lus.
+    if checksums is not None and from_gcs(blob.crc32c) != reader.checksums.crc32c:
+        blob.delete()
+        raise ValueError(f"crc32c mismatch after upload of {chunk.blob_name}")
+    return chunk.length, time.perf_counter() - start
+
+
+def _compose(
+    bucket, job: UploadJob, chunks: list[_Chunk], checksums: ChecksumIndex | None = None
+) -> None:
+    parts = [bucket.blob(c.blob_name) for c in sorted(chunks, key=lambda c: c.index)]
+    destination = bucket.blob(job.blob_name)
+    destination.compose(parts)
+    # compose renvoie le crc32c de l'objet final : comparé à celui du fichier local.
+    if checksums is not None:
+        expected = checksums.get(job.path)["crc32c"]
+        if from_gcs(destination.crc32c) != expected:
+            destination.delete()
+            raise ValueError(f"crc32c mismatch after compose of {job.blob_name}")
+    for part in parts:
+        part.delete()
+
+
+def upload_files(
+    bucket,
+    jobs: list[UploadJob],
+    max_workers: int = 8,
+    chunk_threshold: int = 128 * 1024 * 1024,
+    part_size: int = 32 * 1024 * 1024,
+    checksums: ChecksumIndex | None = None,
+) -> dict:
+    """
+    Upload files with a bounded pool of concurrent transfers.
+    Files larger than `chunk_threshold` are split into `part_size` slices
+    uploaded in parallel as temporary objects, then composed into the final
+    object. `bucket` is a google.cloud.storage Bucket (or any object with the
+    same blob/get_blob/upload/compose/delete surface).
+    With `checksums` (md5/crc32c of the local files), objects already in the bucket
+    with the same bytes are skipped, uploads are checked by GCS against their crc32c,
+    and the parts of an interrupted composite upload are not resent: a re-run only
+    moves the missing bytes.
+    Returns a summary: ok (blob names), skipped (identical in the bucket), failed,
+    bytes (actually sent, parts of failed files included), skipped_bytes (identical
+    files and parts kept), elapsed_sec, throughput_mb_s (of the bytes sent), files
+    (blob, bytes sent, transfer_sec summed over its chunks).
+    """
+    sizes = {job: job.path.stat().st_size for job in jobs}
+    start = time.perf_counter()
+    skipped: list[str] = []
+    if checksums is not None:
+
+        def identical(job: UploadJob) -> bool:
+            remote = bucket.get_blob(job.blob_name)
+            return _same_object(remote, sizes[job], checksums.get(job.path))
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            same = dict(zip(jobs, pool.map(identical, jobs), strict=True))
+        skipped = sorted(job.blob_name for job in jobs if same[job])
+        jobs = [job for job in jobs if not same[job]]
+        if skipped:
+            logger.info(f"⏭️  {len(skipped)} objet(s) déjà identique(s) dans le bucket")
+    plans = {job: _plan_chunks(job, sizes[job], chunk_threshold, part_size) for job in jobs}
+    remaining = {job: len(chunks) for job, chunks in plans.items()}
+    failed: dict[UploadJob, str] = {}
+    ok: list[str] = []
+    transfer_sec = dict.fromkeys(jobs, 0.0)
+    sent = dict.fromkeys(jobs, 0)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(_upload_chunk, bucket, chunk, len(chunks) == 1, checksums): chunk
+            for chunks in plans.values()
+            for chunk in chunks
+        }
+        for future in as_completed(futures):
+            job = futures[future].job
+            try:
+                chunk_bytes, chunk_sec = future.result()
+                sent[job] += chunk_bytes
+                transfer_sec[job] += chunk_sec
+            except Exception as e:
+                failed.setdefault(job, str(e))
+            remaining[job] -= 1
+            if remaining[job] or job in failed:
+                continue
+            try:
+                if len(plans[job]) > 1:
+                    _compose(bucket, job, plans[job], checksums)
+            except Exception as e:
+                failed[job] = str(e)
+                continue
+            ok.append(job.blob_name)
+            logger.info(f"Uploaded: {job.path.name} -> {job.blob_name} ({sent[job]} bytes sent)")
+    elapsed = time.perf_counter() - start
+
+    for job, error in failed.items():
+        logger.warning(f"Upload failed for {job.path}: {error}")
+    total_bytes = sum(sent.values())
+    # Fichiers identiques, et parts déjà présentes des fichiers envoyés.
+    skipped_bytes = sum(sizes[job] for job in sizes if job.blob_name in skipped) + sum(
+        sizes[job] - sent[job] for job in jobs if job.blob_name in ok
+    )
+    summary = {
+        "ok": sorted(ok),
+        "skipped": skipped,
+        "failed": [{"path": str(job.path), "error": error} for job, error in failed.items()],
+        "bytes": total_bytes,
+        "skipped_bytes": skipped_bytes,
+        "elapsed_sec": elapsed,
+        "throughput_mb_s": total_bytes / 1e6 / elapsed if elapsed > 0 else 0.0,
+        "files": [
+            {"blob": job.blob_name, "bytes": sent[job], "transfer_sec": transfer_sec[job]}
+            for job in jobs
+            if job.blob_name in ok
+        ],
+    }
+    logger.info(
+        f"Uploaded {len(ok)}/{len(jobs)} files, {total_bytes} bytes sent "
+        f"({skipped_bytes} skipped) in {elapsed:.2f}s "
+        f"({summary['throughput_mb_s']:.2f} MB/s, {max_workers} workers)"
+    )
+    return summary
@@ -0,0 +1,287 @@
+"""Pre-aggregated serving tables (zone x hour, borough x day) and the queries they answer."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+
+from de_pipeline.common.logging import get_logger
+from de_pipeline.common.profiling import profiled
+from de_pipeline.common.services import GREEN, TripService, get_service
+from de_pipeline.transform.fact import date_filter
+from de_pipeline.warehouse.base import as_warehouse
+from de_pipeline.warehouse.dialect import BIGQUERY, Dialect
+
+logger = get_logger(__name__)
+
+ZONE_HOUR_TABLE = "agg_zone_hour"
+BOROUGH_DAY_TABLE = "agg_borough_day"
+
+# Additive measures of each service's fact table (NULL when the feed has no such column).
+MEASURES: dict[str, dict[str, str | None]] = {
+    "green": {"revenue": "total_amount", "distance": "trip_distance", "tips": "tip_amount"},
+    "yellow": {"revenue": "total_amount", "distance": "trip_distance", "tips": "tip_amount"},
+    "fhv": {"revenue": None, "distance": None, "tips": None},
+    "fhvhv": {"revenue": "base_passenger_fare", "distance": "trip_miles", "tips": "tips"},
+}
+SUMS = ("trips", "revenue", "distance", "tips")
+# Ratios recomputed from the sums, so they stay exact at any grain.
+DERIVED = {
+    "avg_revenue": "SUM(revenue) / NULLIF(SUM(trips), 0)",
+    "avg_distance": "SUM(distance) / NULLIF(SUM(trips), 0)",
+    "tip_rate": "SUM(tips) / NULLIF(SUM(revenue), 0)",
+}
+
+ZONE_HOUR_GRAIN = (
+    "service",
+    "pickup_date",
+    "pickup_hour",
+    "PULocationID",
+    "Borough",
+    "Zone",
+    "service_zone",
+)
+BOROUGH_DAY_GRAIN = ("service", "pickup_date", "Borough")
+
+
+def _zone_hour_select(
+    fact_ref: str,
+    location_ref: str,
+    service: TripService,
+    where: str | None,
+    dialect: Dialect,
+) -> str:
+    double = dialect.column_type("FLOAT64")
+    measures = [
+        f"SUM(f.{column})" if column else f"CAST(NULL AS {double})"
+        for column in MEASURES[service.name].values()
+    ]
+    return (
+        "SELECT\n"
+        f"        '{service.name}' AS service,\n"
+        "        DATE(f.pickup_datetime) AS pickup_date,\n"
+        "        EXTRACT(HOUR FROM f.pickup_datetime) AS pickup_hour,\n"
+        f"        CAST(f.PULocationID AS {dialect.column_type('INT64')}) AS PULocationID,\n"
+        "        l.Borough,\n"
+        "        l.Zone,\n"
+        "        l.service_zone,\n"
+        "        COUNT(*) AS trips,\n"
+        + "".join(f"        {m} AS {name},\n" for m, name in zip(measures, SUMS[1:], strict=True))
+        + "        CURRENT_TIMESTAMP AS refreshed_at\n"
+        f"    FROM {dialect.table(fact_ref)} AS f\n"
+        f"    LEFT JOIN {dialect.table(location_ref)} AS l ON l.LocationID = f.PULocationID\n"
+        f"    WHERE {where or 'TRUE'}\n"
+        "    GROUP BY 1, 2, 3, 4, 5, 6, 7"
+    )
+
+
+def _borough_day_select(zone_hour_ref: str, where: str, dialect: Dialect) -> str:
+    return (
+        "SELECT\n"
+        "        service,\n"
+        "        pickup_date,\n"
+        "        Borough,\n"
+        + "".join(f"        SUM({name}) AS {name},\n" for name in SUMS)
+        + "        CURRENT_TIMESTAMP AS refreshed_at\n"
+        f"    FROM {dialect.table(zone_hour_ref)}\n"
+        f"    WHERE {where}\n"
+        "    GROUP BY 1, 2, 3"
+    )
+
+
+def create_aggregates_sql(
+    zone_hour_ref: str,
+    borough_day_ref: str,
+    fact_ref: str,
+    location_ref: str,
+    service: TripService = GREEN,
+    dialect: Dialect = BIGQUERY,
+) -> str:
+    """
+    DDL of both serving tables (created empty, with the column types of `service`'s
+    fact table, if missing), partitioned by pickup date.
+    """
+    zone_hour = _zone_hour_select(fact_ref, location_ref, service, "FALSE", dialect)
+    borough_day = _borough_day_select(zone_hour_ref, "FALSE", dialect)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {dialect.table(zone_hour_ref)}\n"
+        + dialect.table_options("pickup_date", ("service", "PULocationID"))
+        + f"AS\n    {zone_hour};\n"
+        f"CREATE TABLE IF NOT EXISTS {dialect.table(borough_day_ref)}\n"
+        + dialect.table_options("pickup_date", ("service", "Borough"))
+        + f"AS\n    {borough_day};"
+    )
+
+
+def refresh_aggregates_sql(
+    zone_hour_ref: str,
+    borough_day_ref: str,
+    fact_ref: str,
+    location_ref: str,
+    service: TripService = GREEN,
+    months: list[tuple[int, int]] | None = None,
+    dialect: Dialect = BIGQUERY,
+) -> str:
+    """
+    Script replacing the rows of `service` for the pickup dates of `months` (all of its
+    rows when None) in both tables, in one transaction: zone x hour from the fact table,
+    then borough x day rolled up from zone x hour. Re-running it is idempotent.
+    """
+    where = f"service = '{service.name}'"
+    fact_where = None
+    if months is not None:
+        if not months:
+            raise ValueError("months must not be empty")
+        where += f" AND ({date_filter('pickup_date', months)})"
+        fact_where = date_filter("DATE(f.pickup_datetime)", months)
+    zone_hour = dialect.table(zone_hour_ref)
+    borough_day = dialect.table(borough_day_ref)
+    zone_columns = ", ".join((*ZONE_HOUR_GRAIN, *SUMS, "refreshed_at"))
+    borough_columns = ", ".join((*BOROUGH_DAY_GRAIN, *SUMS, "refreshed_at"))
+    return (
+        "BEGIN TRANSACTION;\n"
+        f"DELETE FROM {zone_hour}\nWHERE {where};\n"
+        f"INSERT INTO {zone_hour} ({zone_columns})\n"
+        f"    {_zone_hour_select(fact_ref, location_ref, service, fact_where, dialect)};\n"
+        f"DELETE FROM {borough_day}\nWHERE {where};\n"
+        f"INSERT INTO {borough_day} ({borough_columns})\n"
+        f"    {_borough_day_select(zone_hour_ref, where, dialect)};\n"
+        "COMMIT TRANSACTION;"
+    )
+
+
+@profiled()
+def refresh_aggregates(
+    client,
+    project_id: str,
+    dataset_curated: str,
+    service: TripService = GREEN,
+    months: list[tuple[int, int]] | None = None,
+) -> dict:
+    """
+    Create the serving tables if needed, then rebuild the rows of `service` for the
+    pickup dates of `months` (every date when None, i.e. full mode).
+    """
+    warehouse = as_warehouse(client, project_id)
+    refs = (
+        f"{project_id}.{dataset_curated}.{ZONE_HOUR_TABLE}",
+        f"{project_id}.{dataset_curated}.{BOROUGH_DAY_TABLE}",
+        f"{project_id}.{dataset_curated}.{service.fact_table}",
+        f"{project_id}.{dataset_curated}.dim_location",
+    )
+    warehouse.run(create_aggregates_sql(*refs, service, warehouse.dialect))
+    stats = warehouse.run(refresh_aggregates_sql(*refs, service, months, warehouse.dialect))
+    scope = ", ".join(f"{y:04d}-{m:02d}" for y, m in sorted(months)) if months else "all dates"
+    logger.info(f"Refreshed {ZONE_HOUR_TABLE} / {BOROUGH_DAY_TABLE} ({service.name}: {scope})")
+    return {"service": service.name, "months": sorted(months) if months else None, **stats}
+
+
+@dataclass(frozen=True)
+class TripQuery:
+    """
+    A dashboard question: `measures` (SUMS or DERIVED names) by `dimensions`, over
+    pickup dates in [start, end) (ISO strings) and the given `service` / `boroughs`.
+    Dimensions outside ZONE_HOUR_GRAIN (e.g. DOLocationID) are read from the fact table.
+    """
+
+    measures: tuple[str, ...] = ("trips",)
+    dimensions: tuple[str, ...] = ()
+    start: str | None = None
+    end: str | None = None
+    service: str = GREEN.name
+    boroughs: tuple[str, ...] = ()
+
+
+def _string(value: str) -> str:
+    # Valeurs venant de dashboards : pas d'échappement, dont la syntaxe diffère entre moteurs.
+    if "'" in value or "\\" in value:
+        raise ValueError(f"Unsupported character in filter value: {value!r}")
+    return f"'{value}'"
+
+
+def _query_where(query: TripQuery, date_expr: str, borough_expr: str) -> list[str]:
+    where = []
+    if query.start:
+        where.append(f"{date_expr} >= '{date.fromisoformat(query.start).isoformat()}'")
+    if query.end:
+        where.append(f"{date_expr} < '{date.fromisoformat(query.end).isoformat()}'")
+    if query.boroughs:
+        where.append(f"{borough_expr} IN ({', '.join(_string(b) for b in query.boroughs)})")
+    return where
+
+
+def route_query(
+    query: TripQuery, project_id: str, dataset_curated: str, dialect: Dialect = BIGQUERY
+) -> tuple[str, str]:
+    """
+    (table, SQL) answering `query` from the smallest table whose grain covers it:
+    borough x day, then zone x hour, else the fact table of the service (joined to
+    dim_location). Results are ordered by the dimensions.
+    """
+    unknown = [m for m in query.measures if m not in SUMS and m not in DERIVED]
+    if unknown:
+        raise ValueError(f"Unknown measure(s): {unknown} (known: {[*SUMS, *DERIVED]})")
+    invalid = [d for d in query.dimensions if not d.isidentifier()]
+    if invalid:
+        raise ValueError(f"Invalid dimension name(s): {invalid}")
+    dims = list(query.dimensions)
+    needed = {*dims, "pickup_date", "service", *(("Borough",) if query.boroughs else ())}
+    select = [*dims]
+    select += [f"SUM({m}) AS {m}" if m in SUMS else f"{DERIVED[m]} AS {m}" for m in query.measures]
+    group_by = f"\nGROUP BY {', '.join(dims)}\nORDER BY {', '.join(dims)}" if dims else ""
+
+    for table, grain in (
+        (BOROUGH_DAY_TABLE, BOROUGH_DAY_GRAIN),
+        (ZONE_HOUR_TABLE, ZONE_HOUR_GRAIN),
+    ):
+        if needed <= set(grain):
+            where = [
+                f"service = {_string(query.service)}",
+                *_query_where(query, "pickup_date", "Borough"),
+            ]
+            ref = dialect.table(f"{project_id}.{dataset_curated}.{table}")
+            sql = f"SELECT {', '.join(select)}\nFROM {ref}\nWHERE {' AND '.join(where)}{group_by}"
+            return table, sql
+
+    # Repli : grain plus fin que les agrégats, lecture de la table de faits.
+    service = get_service(query.service)
+    columns = MEASURES[service.name]
+    double = dialect.column_type("FLOAT64")
+    per_trip = {
+        "trips": "1",
+        **{
+            name: f"f.{column}" if column else f"CAST(NULL AS {double})"
+            for name, column in columns.items()
+        },
+    }
+    expressions = {
+        "service": f"'{service.name}'",
+        "pickup_date": "DATE(f.pickup_datetime)",
+        "pickup_hour": "EXTRACT(HOUR FROM f.pickup_datetime)",
+        "Borough": "l.Borough",
+        "Zone": "l.Zone",
+        "service_zone": "l.service_zone",
+    }
+    inner = [f"{expressions.get(d, f'f.{d}')} AS {d}" for d in dims]
+    inner += [f"{expr} AS {name}" for name, expr in per_trip.items()]
+    where = _query_where(query, "DATE(f.pickup_datetime)", "l.Borough") or ["TRUE"]
+    fact_ref = dialect.table(f"{project_id}.{dataset_curated}.{service.fact_table}")
+    location_ref = dialect.table(f"{project_id}.{dataset_curated}.dim_location")
+    sql = (
+        f"SELECT {', '.join(select)}\nFROM (\n"
+        f"    SELECT {', '.join(inner)}\n"
+        f"    FROM {fact_ref} AS f\n"
+        f"    LEFT JOIN {location_ref} AS l ON l.LocationID = f.PULocationID\n"
+        f"    WHERE {' AND '.join(where)}\n"
+        f") AS t{group_by}"
+    )
+    return service.fact_table, sql
+
+
+def query_trips(client, project_id: str, dataset_curated: str, query: TripQuery) -> dict:
+    """Run `query` on the table route_query picks. Returns: table, rows, bytes_processed."""
+    warehouse = as_warehouse(client, project_id)
+    table, sql = route_query(query, project_id, dataset_curated, warehouse.dialect)
+    rows, stats = warehouse.fetch_all(sql)
+    logger.info(f"Query answered from {table}: {len(rows)} row(s)")
+    return {"table": table, "rows": rows, **stats}
@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+import tempfile
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from de_pipeline.common.logging import get_logger
+from de_pipeline.common.profiling import profiled
+from de_pipeline.transform.fact import FACT_PARTITION_EXPR, date_filter
+from de_pipeline.warehouse.base import as_warehouse
+from de_pipeline.warehouse.dialect import BIGQUERY, Dialect, DuckDBDialect
+
+logger = get_logger(__name__)
+
+
+# Colonnes de dim_datetime (clé unique : YYYYMMDDHH au grain heure, YYYYMMDD au grain jour).
+CALENDAR_COLUMNS: list[tuple[str, str]] = [
+    ("datetime_key", "INT64"),
+    ("datetime", "TIMESTAMP"),
+    ("date", "DATE"),
+    ("year", "INT64"),
+    ("quarter", "INT64"),
+    ("month", "INT64"),
+    ("day", "INT64"),
+    ("hour", "INT64"),
+    ("day_of_week", "INT64"),
+    ("day_name", "STRING"),
+    ("is_weekend", "BOOL"),
+    ("iso_week", "INT64"),
+]
+PERIODS_PER_DAY = {"hour": 24, "day": 1}
+# Premiers trips publiés par la TLC : les dates antérieures sont des erreurs de saisie.
+CALENDAR_MIN_DATE = date(2009, 1, 1)
+
+
+def calendar_ddl(table_ref: str, dialect: Dialect = BIGQUERY, replace: bool = False) -> str:
+    head = "CREATE OR REPLACE TABLE" if replace else "CREATE TABLE IF NOT EXISTS"
+    columns = ",\n    ".join(f"{name} {dialect.column_type(t)}" for name, t in CALENDAR_COLUMNS)
+    return f"{head} {dialect.table(table_ref)} (\n    {columns}\n)"
+
+
+def calendar_insert_sql(
+    table_ref: str, start: date, end: date, grain: str = "hour", dialect: Dialect = BIGQUERY
+) -> str:
+    """INSERT of every `grain` period from `start` to `end` (inclusive dates)."""
+    if grain not in PERIODS_PER_DAY:
+        raise ValueError(f"Unknown calendar grain: {grain} (hour or day)")
+    last_hour = PERIODS_PER_DAY[grain] - 1
+    names = ", ".join(name for name, _ in CALENDAR_COLUMNS)
+    if isinstance(dialect, DuckDBDialect):
+        key = "%Y%m%d%H" if grain == "hour" else "%Y%m%d"
+        hour = "hour(ts)" if grain == "hour" else "CAST(NULL AS BIGINT)"
+        return f"""
+    INSERT INTO {dialect.table(table_ref)} ({names})
+    SELECT
+        CAST(strftime(ts, '{key}') AS BIGINT),
+        ts,
+        CAST(ts AS DATE),
+        year(ts),
+        quarter(ts),
+        month(ts),
+        day(ts),
+        {hour},
+        isodow(ts),
+        strftime(ts, '%A'),
+        isodow(ts) >= 6,
+        weekofyear(ts)
+    FROM (
+        SELECT CAST(d AS TIMESTAMP) + h * INTERVAL 1 HOUR AS ts
+        FROM range(DATE '{start.isoformat()}', DATE '{end.isoformat()}' + INTERVAL 1 DAY,
+                   INTERVAL 1 DAY) AS days(d), range(0, {last_hour + 1}) AS hours(h)
+    )
+    """
+    key = "%Y%m%d%H" if grain == "hour" else "%Y%m%d"
+    hour = "EXTRACT(HOUR FROM ts)" if grain == "hour" else "CAST(NULL AS INT64)"
+    return f"""
+    INSERT INTO {dialect.table(table_ref)} ({names})
+    SELECT
+        CAST(FORMAT_TIMESTAMP('{key}', ts) AS INT64),
+        ts,
+        DATE(ts),
+        EXTRACT(YEAR FROM ts),
+        EXTRACT(QUARTER FROM ts),
+        EXTRACT(MONTH FROM ts),
+        EXTRACT(DAY FROM ts),
+        {hour},
+        MOD(EXTRACT(DAYOFWEEK FROM ts) + 5, 7) + 1,
+        FORMAT_TIMESTAMP('%A', ts),
+        EXTRACT(DAYOFWEEK FROM ts) IN (1, 7),
+        EXTRACT(ISOWEEK FROM ts)
+    FROM (
+        SELECT TIMESTAMP_ADD(TIMESTAMP(d), INTERVAL h HOUR) AS ts
+        FROM UNNEST(GENERATE_DATE_ARRAY('{start.isoformat()}', '{end.isoformat()}')) AS d
+        CROSS JOIN UNNEST(GENERATE_ARRAY(0, {last_hour})) AS h
+    )
+    """
+
+
+def calendar_table(start: date, end: date, grain: str = "hour") -> pa.Table:
+    """dim_datetime rows from `start` to `end` (inclusive), built with vectorized Arrow kernels."""
+    if grain not in PERIODS_PER_DAY:
+        raise ValueError(f"Unknown calendar grain: {grain} (hour or day)")
+    step = np.timedelta64(3600 if grain == "hour" else 86400, "s")
+    stop = np.datetime64(end, "s") + np.timedelta64(1, "D")
+    ts = pc.cast(pa.array(np.arange(np.datetime64(start, "s"), stop, step)), pa.timestamp("us"))
+    year, month, day = pc.year(ts), pc.month(ts), pc.day(ts)
+    key = pc.add(pc.multiply(year, 10_000), pc.add(pc.multiply(month, 100), day))
+    hour = pc.hour(ts) if grain == "hour" else pa.nulls(len(ts), pa.int64())
+    if grain == "hour":
+        key = pc.add(pc.multiply(key, 100), hour)
+    day_of_week = pc.day_of_week(ts, count_from_zero=False, week_start=1)
+    return pa.table(
+        {
+            "datetime_key": key,
+            "datetime": ts,
+            "date": pc.cast(ts, pa.date32()),
+            "year": year,
+            "quarter": pc.quarter(ts),
+            "month": month,
+            "day": day,
+            "hour": hour,
+            "day_of_week": day_of_week,
+            "day_name": pc.strftime(ts, format="%A"),
+            "is_weekend": pc.greater_equal(day_of_week, 6),
+            "iso_week": pc.iso_week(ts),
+        }
+    )
+
+
+def _missing_ranges(
+    current: tuple[date, date] | None, wanted: tuple[date, date]
+) -> list[tuple[date, date]]:
+    """Date ranges of `wanted` not covered by `current` (before it, then after it)."""
+    if current is None:
+        return [wanted]
+    ranges = []
+    if wanted[0] < current[0]:
+        ranges.append((wanted[0], current[0] - timedelta(days=1)))
+    if wanted[1] > current[1]:
+        ranges.append((current[1] + timedelta(days=1), wanted[1]))
+    return ranges
+
+
+def pickup_date_range(
+    warehouse,
+    fact_refs: list[str],
+    months: list[tuple[int, int]] | None = None,
+    until: date | None = None,
+) -> tuple[tuple[date, date] | None, dict]:
+    """
+    Min/max pickup date of the fact tables between 2009 and `until`, restricted to the
+    partitions of `months` when given (an incremental run only looks at what it just
+    loaded). Dates out of these bounds are entry errors and do not stretch the calendar.
+    Returns the range (None without any trip) and the summed job stats.
+    """
+    conditions = [f"{FACT_PARTITION_EXPR} >= '{CALENDAR_MIN_DATE.isoformat()}'"]
+    if until is not None:
+        conditions.append(f"{FACT_PARTITION_EXPR} <= '{until.isoformat()}'")
+    if months:
+        conditions.append(f"({date_filter(FACT_PARTITION_EXPR, months)})")
+    bounds = []
+    stats = {"bytes_processed": 0, "bytes_billed": 0}
+    for ref in fact_refs:
+        row, job = warehouse.fetch_one(
+            f"SELECT MIN({FACT_PARTITION_EXPR}) AS lo, MAX({FACT_PARTITION_EXPR}) AS hi\n"
+            f"FROM {warehouse.dialect.table(ref)}\nWHERE {' AND '.join(conditions)}"
+        )
+        for k in stats:
+            stats[k] += job.get(k) or 0
+        if row["lo"] is not None:
+            bounds.append((_as_date(row["lo"]), _as_date(row["hi"])))
+    if not bounds:
+        return None, stats
+    return (min(lo for lo, _ in bounds), max(hi for _, hi in bounds)), stats
+
+
+def _whole_months(start: date, end: date) -> tuple[date, date]:
+    """[start, end] widened to the first and last day of their months."""
+    next_month = date(end.year + end.month // 12, end.month % 12 + 1, 1)
+    return start.replace(day=1), next_month - timedelta(days=1)
+
+
+def _as_date(value) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def dim_location_sql(raw_ref: str, table_ref: str, dialect: Dialect = BIGQUERY) -> str:
+    return f"""
+    CREATE OR REPLACE TABLE {dialect.table(table_ref)} AS
+    SELECT
+        LocationID,
+        Borough,
+        Zone,
+        service_zone,
+    FROM {dialect.table(raw_ref)}
+    """
+
+
+@profiled()
+def extend_dim_datetime(
+    client,
+    project_id: str,
+    dataset_id: str,
+    fact_refs: list[str],
+    months: list[tuple[int, int]] | None = None,
+    grain: str = "hour",
+    build: str = "sql",
+    rebuild: bool = False,
+    today: date | None = None,
+) -> dict:
+    """
+    Make dim_datetime cover the pickup dates loaded in `fact_refs` (of `months`, or
+    all), at the `grain` ("hour" or "day"), appending only the periods it lacks.
+    The table is rebuilt when `rebuild`, or when it does not hold exactly one row per
+    period of its range (other grain, or the former minute-grain table).
+    Pickup dates before 2009 or after `today` are ignored; the range is padded to whole
+    months.
+    `build` "sql" generates the rows in
+    the warehouse; "arrow" builds them locally and appends them as one parquet load.
+    Returns: table, grain, start, end, appended (rows), rebuilt, bytes_processed.
+    """
+    warehouse = as_warehouse(client, project_id)
+    table_ref = f"{project_id}.{dataset_id}.dim_datetime"
+    table = warehouse.dialect.table(table_ref)
+    report = {"table": table_ref, "grain": grain, "appended": 0, "rebuilt": False}
+    stats = {"bytes_processed": 0, "bytes_billed": 0}
+
+    def add(job: dict) -> None:
+        for k in stats:
+            stats[k] += job.get(k) or 0
+
+    add(warehouse.run(calendar_ddl(table_ref, warehouse.dialect)))
+    row, job = warehouse.fetch_one(
+        f"SELECT MIN(date) AS lo, MAX(date) AS hi, COUNT(*) AS n FROM {table}"
+    )
+    add(job)
+    current = None
+    if row["lo"] is not None:
+        current = (_as_date(row["lo"]), _as_date(row["hi"]))
+        periods = ((current[1] - current[0]).days + 1) * PERIODS_PER_DAY[grain]
+        if rebuild or row["n"] != periods:
+            # Reconstruite pour toutes les dates des faits, pas seulement les mois rechargés.
+            logger.info(f"♻️  dim_datetime reconstruite (grain {grain})")
+            add(warehouse.run(calendar_ddl(table_ref, warehouse.dialect, replace=True)))
+            report["rebuilt"] = True
+            current, months = None, None
+
+    wanted, job = pickup_date_range(warehouse, fact_refs, months, until=today or date.today())
+    add(job)
+    if wanted is not None:
+        wanted = _whole_months(*wanted)
+    if wanted is None:
+        logger.info("⏭️  Aucune date de pickup chargée : dim_datetime inchangée")
+        return {**report, **stats}
+    for start, end in _missing_ranges(current, wanted):
+        if build == "arrow":
+            rows = calendar_table(start, end, grain)
+            with tempfile.TemporaryDirectory(prefix="dim_datetime_") as tmp:
+                path = Path(tmp) / "calendar.parquet"
+                pq.write_table(rows, path)
+                warehouse.append_parquet(path, table_ref, CALENDAR_COLUMNS)
+        else:
+            add(warehouse.run(calendar_insert_sql(table_ref, start, end, grain, warehouse.dialect)))
+        report["appended"] += ((end - start).days + 1) * PERIODS_PER_DAY[grain]
+    start, end = (
+        (wanted[0], wanted[1])
+        if current is None
+        else (min(wanted[0], current[0]), max(wanted[1], current[1]))
+    )
+    logger.info(
+        f"✅ dim_datetime : {start} -> {end} (grain {grain}), {report['appended']} période(s) ajoutée(s)"
+    )
+    return {**report, "start": start.isoformat(), "end": end.isoformat(), **stats}
+
+
+@profiled()
+def create_dim_location(
+    client,
+    project_id: str,
+    dataset_raw: str,
+    dataset_curated: str,
+) -> dict:
+    """Créer dimension location."""
+    warehouse = as_warehouse(client, project_id)
+    stats = warehouse.run(
+        dim_location_sql(
+            f"{project_id}.{dataset_raw}.taxi_zone_lookup",
+            f"{project_id}.{dataset_curated}.dim_location",
+            warehouse.dialect,
+        )
+    )
+    logger.info("✅ Table dim_location créée")
+    return stats
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+from datetime import date
+
+from de_pipeline.common.logging import get_logger
+from de_pipeline.common.profiling import profiled
+from de_pipeline.common.services import GREEN, TripService
+from de_pipeline.warehouse.base import as_warehouse
+from de_pipeline.warehouse.dialect import BIGQUERY, Dialect
+
+logger = get_logger(__name__)
+
+# Raw green columns carried into the fact table (raw name, fact name).
+FACT_GREEN_COLUMNS: list[tuple[str, str]] = GREEN.fact_columns
+
+FACT_PARTITION_EXPR = "DATE(pickup_datetime)"
+FACT_CLUSTER_COLUMNS = ("PULocationID", "DOLocationID")
+
+
+def trip_id_expr(
+    columns: list[tuple[str, str]] = FACT_GREEN_COLUMNS, dialect: Dialect = BIGQUERY
+) -> str:
+    """
+    Deterministic trip key, stable across rebuilds and reloads: the raw trip_id written by
+    normalize (the dedup fingerprint of the row), else a hash of the raw row for the rows
+    loaded without normalize (streaming, normalize disabled).
+    """
+    fallback = dialect.md5_hex(dialect.struct([raw for raw, _ in columns]))
+    return f"COALESCE(CAST(trip_id AS STRING), {fallback})"
+
+
+def month_date_ranges(months: list[tuple[int, int]]) -> list[tuple[date, date]]:
+    """Merge (year, month) pairs into [start, end) date ranges of consecutive months."""
+    ranges: list[tuple[date, date]] = []
+    for y, m in sorted(set(months)):
+        start = date(y, m, 1)
+        end = date(y + m // 12, m % 12 + 1, 1)
+        if ranges and ranges[-1][1] == start:
+            ranges[-1] = (ranges[-1][0], end)
+        else:
+            ranges.append((start, end))
+    return ranges
+
+
+def widen_months(months: list[tuple[int, int]], drift: int) -> list[tuple[int, int]]:
+    """`months` plus the `drift` months before and after each one, sorted."""
+    widened = set()
+    for y, m in months:
+        for shift in range(-drift, drift + 1):
+            index = y * 12 + m - 1 + shift
+            widened.add((index // 12, index % 12 + 1))
+    return sorted(widened)
+
+
+def date_filter(expr: str, months: list[tuple[int, int]]) -> str:
+    """SQL condition keeping the dates `expr` that fall in `months`."""
+    return " OR ".join(
+        f"({expr} >= '{start.isoformat()}' AND {expr} < '{end.isoformat()}')"
+        for start, end in month_date_ranges(months)
+    )
+
+
+def fact_select_sql(
+    raw_ref: str,
+    where_extra: str | None = None,
+    dialect: Dialect = BIGQUERY,
+    service: TripService = GREEN,
+) -> str:
+    """Cleaned, deduplicated SELECT feeding the fact table of `service`."""
+    trip_id = trip_id_expr(service.fact_columns, dialect)
+    select = [f"{trip_id} AS trip_id"]
+    select += [raw if raw == fact else f"{raw} AS {fact}" for raw, fact in service.fact_columns]
+    select.append("CURRENT_TIMESTAMP AS load_timestamp")
+    where = [
+        f"{service.pickup_column} IS NOT NULL",
+        f"{service.dropoff_column} IS NOT NULL",
+        *service.fact_filters,
+    ]
+    if where_extra:
+        where.append(f"({where_extra})")
+    return (
+        "SELECT\n        "
+        + ",\n        ".join(select)
+        + f"\n    FROM {dialect.table(raw_ref)}"
+        + "\n    WHERE\n        "
+        + "\n        AND ".join(where)
+        # Identical raw rows share a trip_id: keep one.
+        + f"\n    QUALIFY ROW_NUMBER() OVER (PARTITION BY {trip_id}) = 1"
+    )
+
+
+def create_fact_sql(
+    fact_ref: str,
+    raw_ref: str,
+    replace: bool = False,
+    dialect: Dialect = BIGQUERY,
+    service: TripService = GREEN,
+) -> str:
+    """
+    DDL of the fact table, partitioned by pickup date and clustered by location ids.
+    With `replace`, rebuild it from all raw data; otherwise only create it (empty) if missing.
+    """
+    head = "CREATE OR REPLACE TABLE" if replace else "CREATE TABLE IF NOT EXISTS"
+    select = fact_select_sql(raw_ref, None if replace else "FALSE", dialect, service)
+    return (
+        f"{head} {dialect.table(fact_ref)}\n"
+        + dialect.table_options(FACT_PARTITION_EXPR, FACT_CLUSTER_COLUMNS)
+        + f"AS\n    {select}"
+    )
+
+
+def refresh_fact_sql(
+    fact_ref: str,
+    raw_ref: str,
+    months: list[tuple[int, int]],
+    dialect: Dialect = BIGQUERY,
+    service: TripService = GREEN,
+    max_month_drift: int = 1,
+) -> str:
+    """
+    Multi-statement script replacing the facts of the reloaded file `months`, in one
+    transaction; re-running it is idempotent. A file holds pickups up to `max_month_drift`
+    months away from its month, so the pickup dates of `months` widened by the drift are
+    deleted, then re-inserted from the raw partitions (`_PARTITIONTIME`) that can hold
+    them: the file months widened twice. The scan follows the reloaded months, not the
+    whole raw history.
+    """
+    if not months:
+        raise ValueError("months must not be empty")
+    columns = ["trip_id"] + [fact for _, fact in service.fact_columns] + ["load_timestamp"]
+    fact = dialect.table(fact_ref)
+    pickup_months = widen_months(months, max_month_drift)
+    where = date_filter(f"DATE({service.pickup_column})", pickup_months)
+    partitions = dialect.ingestion_month_filter(
+        month_date_ranges(widen_months(months, 2 * max_month_drift))
+    )
+    if partitions:
+        where = f"({where}) AND ({partitions})"
+    select = fact_select_sql(raw_ref, where, dialect, service)
+    return (
+        "BEGIN TRANSACTION;\n"
+        f"DELETE FROM {fact}\nWHERE {date_filter(FACT_PARTITION_EXPR, pickup_months)};\n"
+        f"INSERT INTO {fact} ({', '.join(columns)})\n"
+        f"    {select};\n"
+        "COMMIT TRANSACTION;"
+    )
+
+
+@profiled()
+def refresh_fact_tripdata(
+    client,
+    project_id: str,
+    dataset_raw: str,
+    dataset_curated: str,
+    months: list[tuple[int, int]],
+    service: TripService = GREEN,
+    max_month_drift: int = 1,
+) -> dict:
+    """
+    Create the fact table of `service` if needed, then rebuild only the pickup-date
+    partitions the reloaded file `months` can reach (see refresh_fact_sql).
+    `client` is a BigQuery client or a Warehouse (e.g. the local DuckDB one).
+    """
+    warehouse = as_warehouse(client, project_id)
+    fact_ref = f"{project_id}.{dataset_curated}.{service.fact_table}"
+    raw_ref = f"{project_id}.{dataset_raw}.{service.raw_table}"
+
+    warehouse.run(create_fact_sql(fact_ref, raw_ref, dialect=warehouse.dialect, service=service))
+    stats = warehouse.run(
+        refresh_fact_sql(fact_ref, raw_ref, months, warehouse.dialect, service, max_month_drift)
+    )
+    labels = ", ".join(f"{y:04d}-{m:02d}" for y, m in sorted(months))
+    logger.info(f"Refreshed {fact_ref} for {labels}")
+    return {
+        "table": fact_ref,
+        "months": sorted(months),
+        "pickup_months": widen_months(months, max_month_drift),
+        **stats,
+    }
+
+
+@profiled()
+def create_fact_tripdata(
+    client,
+    project_id: str,
+    dataset_raw: str,
+    dataset_curated: str,
+    service: TripService = GREEN,
+) -> dict:
+    """Rebuild the whole fact table of `service` (full mode)."""
+    warehouse = as_warehouse(client, project_id)
+    query = create_fact_sql(
+        f"{project_id}.{dataset_curated}.{service.fact_table}",
+        f"{project_id}.{dataset_raw}.{service.raw_table}",
+        replace=True,
+        dialect=warehouse.dialect,
+        service=service,
+    )
+    stats = warehouse.run(query)
+    logger.info(f"✅ Table {service.fact_table} créée")
+    return stats
+
+
+def refresh_fact_green_tripdata(
+    client,
+    project_id: str,
+    dataset_raw: str,
+    dataset_curated: str,
+    months: list[tuple[int, int]],
+) -> dict:
+    return refresh_fact_tripdata(client, project_id, dataset_raw, dataset_curated, months)
+
+
+def create_fact_green_tripdata(
+    client,
+    project_id: str,
+    dataset_raw: str,
+    dataset_curated: str,
+) -> dict:
+    return create_fact_tripdata(client, project_id, dataset_raw, dataset_curated)
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import Any
+
+from de_pipeline.warehouse.dialect import BIGQUERY, Dialect
+
+
+class Warehouse(ABC):
+    """
+    Where raw tables are loaded and transforms/DQ queries run: BigQuery, or a
+    local engine for offline runs. Table refs are `project.dataset.table` strings;
+    `columns` are (name, BigQuery type) pairs as in common.schemas.
+    A backend missing one of the abstract methods fails when instantiated.
+    """
+
+    dialect: Dialect = BIGQUERY
+
+    @abstractmethod
+    def ensure_dataset(self, dataset_id: str) -> None: ...
+
+    @abstractmethod
+    def ensure_month_partitioned_table(self, table_ref: str, columns: list) -> None: ...
+
+    @abstractmethod
+    def load_month(self, table_ref: str, load, columns: list) -> dict:
+        """Replace the month partition of `load` (a loader.MonthLoad) with its source file."""
+        ...
+
+    @abstractmethod
+    def load_csv(self, uri: str, table_ref: str, columns: list) -> dict: ...
+
+    @abstractmethod
+    def append_parquet(self, path, table_ref: str, columns: list) -> dict:
+        """Append the rows of a local parquet file to an existing table, in bulk."""
+        ...
+
+    @abstractmethod
+    def run(self, sql: str) -> dict:
+        """Execute a statement or script; returns bytes_processed / bytes_billed (None if unknown)."""
+        ...
+
+    @abstractmethod
+    def fetch_one(self, sql: str) -> tuple[Any, dict]:
+        """First row of a query (mapping by column name) and its job bytes."""
+        ...
+
+    @abstractmethod
+    def fetch_all(self, sql: str) -> tuple[list[dict], dict]:
+        """Every row of a query (mappings by column name) and its job bytes."""
+        ...
+
+    def dry_run_bytes(self, sql: str) -> int | None:
+        """Bytes `sql` would scan, without running it; None when the engine cannot tell."""
+        return None
+
+
+def as_warehouse(client, project_id: str | None = None) -> Warehouse:
+    """`client` itself if it is a Warehouse, else a BigQuery client wrapped as one."""
+    if isinstance(client, Warehouse):
+        return client
+    from de_pipeline.warehouse.bigquery import BigQueryWarehouse
+
+    return BigQueryWarehouse(client, project_id)
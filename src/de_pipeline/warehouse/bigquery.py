@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from typing import Any
+
+from de_pipeline.common.metrics import job_bytes
+from de_pipeline.load import loader
+from de_pipeline.warehouse.base import Warehouse
+
+
+class BigQueryWarehouse(Warehouse):
+    """BigQuery through one shared client (jobs are submitted concurrently over it)."""
+
+    def __init__(self, client, project_id: str | None = None, location: str = "EU") -> None:
+        self.client = client
+        self.project_id = project_id or getattr(client, "project", None)
+        self.location = location
+
+    def ensure_dataset(self, dataset_id: str) -> None:
+        loader.create_dataset_if_not_exists(
+            self.client, self.project_id, dataset_id, location=self.location
+        )
+
+    def ensure_month_partitioned_table(self, table_ref: str, columns: list) -> None:
+        loader.ensure_month_partitioned_table(
+            self.client, table_ref, loader.bigquery_schema(columns)
+        )
+
+    def load_month(self, table_ref: str, load, columns: list) -> dict:
+        return loader.load_month(self.client, table_ref, load, loader.bigquery_schema(columns))
+
+    def load_csv(self, uri: str, table_ref: str, columns: list) -> dict:
+        return loader.load_csv(self.client, uri, table_ref, loader.bigquery_schema(columns))
+
+    def append_parquet(self, path, table_ref: str, columns: list) -> dict:
+        return loader.append_parquet(self.client, path, table_ref, loader.bigquery_schema(columns))
+
+    def run(self, sql: str) -> dict:
+        job = self.client.query(sql)
+        job.result()
+        return job_bytes(job)
+
+    def fetch_one(self, sql: str) -> tuple[Any, dict]:
+        job = self.client.query(sql)
+        row = next(iter(job.result()))
+        return row, job_bytes(job)
+
+    def fetch_all(self, sql: str) -> tuple[list[dict], dict]:
+        job = self.client.query(sql)
+        rows = [dict(row.items()) for row in job.result()]
+        return rows, job_bytes(job)
+
+    def dry_run_bytes(self, sql: str) -> int | None:
+        from google.cloud import bigquery
+
+        job_config = bigquery.QueryJobConfig(dry_run=True, use_query_cache=False)
+        return self.client.query(sql, job_config=job_config).total_bytes_processed
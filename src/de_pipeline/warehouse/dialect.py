@@ -0,0 +1,96 @@
+"""SQL differences between BigQuery and the local DuckDB engine, kept to what the pipeline emits."""
+
+from __future__ import annotations
+
+from datetime import date
+
+# BigQuery column types -> DuckDB column types (config/schemas use BigQuery names).
+DUCKDB_TYPES = {
+    "INT64": "BIGINT",
+    "INTEGER": "BIGINT",
+    "FLOAT64": "DOUBLE",
+    "FLOAT": "DOUBLE",
+    "NUMERIC": "DECIMAL(38, 9)",
+    "STRING": "VARCHAR",
+    "BOOL": "BOOLEAN",
+    "BOOLEAN": "BOOLEAN",
+    "TIMESTAMP": "TIMESTAMP",
+    "DATETIME": "TIMESTAMP",
+    "DATE": "DATE",
+}
+
+
+class Dialect:
+    """BigQuery Standard SQL (the default everywhere SQL is generated)."""
+
+    name = "bigquery"
+
+    def table(self, table_ref: str) -> str:
+        """Quoted reference of `project.dataset.table`."""
+        return f"`{table_ref}`"
+
+    def struct(self, fields: list[str]) -> str:
+        return f"STRUCT({', '.join(fields)})"
+
+    def md5_hex(self, expr: str) -> str:
+        """Hex md5 of the JSON text of `expr` (a row or a struct)."""
+        return f"TO_HEX(MD5(TO_JSON_STRING({expr})))"
+
+    def fingerprint(self, expr: str) -> str:
+        """Integer hash of `expr`, for COUNT(DISTINCT ...) over whole rows."""
+        return f"FARM_FINGERPRINT(TO_JSON_STRING({expr}))"
+
+    def ingestion_month_filter(self, ranges: list[tuple[date, date]]) -> str | None:
+        """
+        Condition on the ingestion-time partitions (one per file month, `table$YYYYMM`) of
+        a raw table keeping the [start, end) date `ranges`: BigQuery then scans only those.
+        """
+        return " OR ".join(
+            f"(_PARTITIONTIME >= TIMESTAMP('{start.isoformat()}') "
+            f"AND _PARTITIONTIME < TIMESTAMP('{end.isoformat()}'))"
+            for start, end in ranges
+        )
+
+    def table_options(self, partition_expr: str | None, cluster_columns: tuple[str, ...]) -> str:
+        clauses = []
+        if partition_expr:
+            clauses.append(f"PARTITION BY {partition_expr}\n")
+        if cluster_columns:
+            clauses.append(f"CLUSTER BY {', '.join(cluster_columns)}\n")
+        return "".join(clauses)
+
+    def column_type(self, bq_type: str) -> str:
+        return bq_type
+
+
+class DuckDBDialect(Dialect):
+    """DuckDB: no project level, double-quoted names, no partitioning/clustering DDL."""
+
+    name = "duckdb"
+
+    def table(self, table_ref: str) -> str:
+        dataset, table = table_ref.split(".")[-2:]
+        return f'"{dataset}"."{table}"'
+
+    def struct(self, fields: list[str]) -> str:
+        return f"struct_pack({', '.join(fields)})"
+
+    def md5_hex(self, expr: str) -> str:
+        return f"md5(to_json({expr}))"
+
+    def fingerprint(self, expr: str) -> str:
+        return f"hash({expr})"
+
+    def ingestion_month_filter(self, ranges: list[tuple[date, date]]) -> str | None:
+        # Pas de pseudo-colonne _PARTITIONTIME : la vue lit tous les fichiers mensuels.
+        return None
+
+    def table_options(self, partition_expr: str | None, cluster_columns: tuple[str, ...]) -> str:
+        return ""
+
+    def column_type(self, bq_type: str) -> str:
+        return DUCKDB_TYPES.get(bq_type.upper(), bq_type)
+
+
+BIGQUERY = Dialect()
+DUCKDB = DuckDBDialect()
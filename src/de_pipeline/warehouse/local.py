@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from de_pipeline.common.logging import get_logger
+from de_pipeline.warehouse.base import Warehouse
+from de_pipeline.warehouse.dialect import DUCKDB
+
+logger = get_logger(__name__)
+
+_NO_STATS = {"bytes_processed": None, "bytes_billed": None}
+
+
+def _literal(path: Path | str) -> str:
+    return "'" + str(path).replace("'", "''") + "'"
+
+
+def _quoted(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+class LocalWarehouse(Warehouse):
+    """
+    Offline stand-in for BigQuery on DuckDB (optional dependency, extra `local`).
+    Month-partitioned raw tables are one parquet file per month under
+    `<root>/<dataset>/<table>/YYYYMM.parquet`, exposed as a view: replacing a month
+    replaces its file. Other tables live in `<root>/warehouse.duckdb`.
+    """
+
+    dialect = DUCKDB
+
+    def __init__(self, root: Path) -> None:
+        try:
+            import duckdb
+        except ImportError as e:
+            raise ImportError(
+                "Le backend local requiert duckdb : pip install 'de-gcp-tlc-pipeline[local]'"
+            ) from e
+
+        # Absolute: views keep the parquet glob as written.
+        self.root = Path(root).resolve()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._conn = duckdb.connect(str(self.root / "warehouse.duckdb"))
+        # One statement at a time: the DAG runs stages from several threads.
+        self._lock = threading.RLock()
+        self._partitioned: dict[str, list[tuple[str, str]]] = {}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _execute(self, sql: str):
+        with self._lock:
+            return self._conn.cursor().execute(sql)
+
+    def _partition_dir(self, table_ref: str) -> Path:
+        dataset, table = table_ref.split(".")[-2:]
+        return self.root / dataset / table
+
+    def _refresh_view(self, table_ref: str) -> None:
+        columns = self._partitioned[table_ref]
+        files = self._partition_dir(table_ref) / "*.parquet"
+        present: set = set()
+        source = "WHERE FALSE"
+        if any(self._partition_dir(table_ref).glob("*.parquet")):
+            # union_by_name: months loaded before a column was added read it as NULL.
+            scan = f"read_parquet({_literal(files.as_posix())}, union_by_name = true)"
+            present = {row[0] for row in self._execute(f"DESCRIBE SELECT * FROM {scan}").fetchall()}
+            source = f"FROM {scan}"
+        select = ", ".join(
+            (
+                _quoted(name)
+                if name in present
+                else f"CAST(NULL AS {self.dialect.column_type(t)}) AS {_quoted(name)}"
+            )
+            for name, t in columns
+        )
+        self._execute(
+            f"CREATE OR REPLACE VIEW {self.dialect.table(table_ref)} AS SELECT {select} {source}"
+        )
+
+    def ensure_dataset(self, dataset_id: str) -> None:
+        self._execute(f'CREATE SCHEMA IF NOT EXISTS "{dataset_id}"')
+
+    def ensure_month_partitioned_table(self, table_ref: str, columns: list) -> None:
+        self._partition_dir(table_ref).mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            self._partitioned[table_ref] = list(columns)
+            self._refresh_view(table_ref)
+
+    def load_month(self, table_ref: str, load, columns: list) -> dict:
+        """Rewrite the month file with the pinned schema (missing columns are NULL)."""
+        start = time.perf_counter()
+        source = f"read_parquet({_literal(load.uri)})"
+        present = {row[0] for row in self._execute(f"DESCRIBE SELECT * FROM {source}").fetchall()}
+        select = ", ".join(
+            f'CAST({_quoted(name) if name in present else "NULL"} '
+            f"AS {self.dialect.column_type(t)}) AS {_quoted(name)}"
+            for name, t in columns
+        )
+        dest = self._partition_dir(table_ref) / f"{load.partition_id}.parquet"
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_name(f"{dest.name}.tmp")
+        rows = self._execute(
+            f"COPY (SELECT {select} FROM {source}) TO {_literal(tmp)} "
+            "(FORMAT PARQUET, COMPRESSION ZSTD)"
+        ).fetchone()[0]
+        with self._lock:
+            tmp.replace(dest)
+            self._partitioned.setdefault(table_ref, list(columns))
+            self._refresh_view(table_ref)
+        logger.info(f"Loaded {load.uri} -> {dest} ({rows} rows)")
+        return {
+            "partition": load.partition_id,
+            "uri": load.uri,
+            "rows": rows,
+            "bytes": dest.stat().st_size,
+            "elapsed_sec": time.perf_counter() - start,
+        }
+
+    def load_csv(self, uri: str, table_ref: str, columns: list) -> dict:
+        types = ", ".join(f"'{name}': '{self.dialect.column_type(t)}'" for name, t in columns)
+        self._execute(
+            f"CREATE OR REPLACE TABLE {self.dialect.table(table_ref)} AS "
+            f"SELECT * FROM read_csv({_literal(uri)}, header = true, columns = {{{types}}})"
+        )
+        rows = self._execute(f"SELECT COUNT(*) FROM {self.dialect.table(table_ref)}").fetchone()[0]
+        logger.info(f"Loaded {uri} -> {table_ref}")
+        return {"uri": uri, "rows": rows, "bytes": Path(uri).stat().st_size}
+
+    def append_parquet(self, path, table_ref: str, columns: list) -> dict:
+        names = ", ".join(_quoted(name) for name, _ in columns)
+        with self._lock:
+            rows = self._execute(
+                f"INSERT INTO {self.dialect.table(table_ref)} ({names}) "
+                f"SELECT {names} FROM read_parquet({_literal(path)})"
+            ).fetchone()[0]
+        logger.info(f"Appended {path} -> {table_ref} ({rows} rows)")
+        return {"rows": rows, "bytes": Path(path).stat().st_size}
+
+    def run(self, sql: str) -> dict:
+        self._execute(sql)
+        return dict(_NO_STATS)
+
+    def fetch_one(self, sql: str) -> tuple[Any, dict]:
+        with self._lock:
+            cursor = self._execute(sql)
+            row = cursor.fetchone()
+            names = [d[0] for d in cursor.description]
+        return dict(zip(names, row, strict=True)), dict(_NO_STATS)
+
+    def fetch_all(self, sql: str) -> tuple[list[dict], dict]:
+        with self._lock:
+            cursor = self._execute(sql)
+            rows = cursor.fetchall()
+            names = [d[0] for d in cursor.description]
+        return [dict(zip(names, row, strict=True)) for row in rows], dict(_NO_STATS)
@@ -0,0 +1,123 @@
+"""Tests pour les tables d'agrégats (zone x heure, borough x jour) et le routage des requêtes."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+
+from de_pipeline.transform.aggregates import (
+    BOROUGH_DAY_TABLE,
+    ZONE_HOUR_TABLE,
+    TripQuery,
+    refresh_aggregates_sql,
+    route_query,
+)
+
+
+def test_routes_to_the_smallest_table_covering_the_query():
+    by_borough = TripQuery(measures=("trips", "avg_distance"), dimensions=("Borough",))
+    by_zone = TripQuery(dimensions=("Zone", "pickup_hour"), boroughs=("Queens",))
+    by_dropoff = TripQuery(measures=("revenue",), dimensions=("DOLocationID",))
+
+    assert route_query(by_borough, "p", "cur")[0] == BOROUGH_DAY_TABLE
+    table, sql = route_query(by_zone, "p", "cur")
+    assert table == ZONE_HOUR_TABLE and "Borough IN ('Queens')" in sql
+    table, sql = route_query(by_dropoff, "p", "cur")
+    assert table == "fact_green_tripdata" and "f.total_amount AS revenue" in sql
+    with pytest.raises(ValueError, match="Unknown measure"):
+        route_query(TripQuery(measures=("median_fare",)), "p", "cur")
+    with pytest.raises(ValueError):
+        route_query(TripQuery(boroughs=("Queen's",)), "p", "cur")
+
+
+def test_refresh_only_touches_the_service_and_months():
+    sql = refresh_aggregates_sql("p.c.zh", "p.c.bd", "p.c.fact", "p.c.loc", months=[(2024, 5)])
+
+    assert "WHERE service = 'green' AND ((pickup_date >= '2024-05-01'" in sql
+    assert "DATE(f.pickup_datetime) >= '2024-05-01'" in sql
+    assert sql.startswith("BEGIN TRANSACTION;") and sql.endswith("COMMIT TRANSACTION;")
+
+
+def _load_month(wh, month, fares):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    from de_pipeline.common.services import GREEN
+    from de_pipeline.load.loader import MonthLoad
+
+    path = wh.root.parent / f"green_tripdata_2024-0{month}.parquet"
+    pickups = [datetime(2024, month, 1 + i % 2, 8 + i % 2) for i in range(len(fares))]
+    pq.write_table(
+        pa.table(
+            {
+                "VendorID": list(range(len(fares))),
+                "lpep_pickup_datetime": pickups,
+                "lpep_dropoff_datetime": [p.replace(minute=30) for p in pickups],
+                "PULocationID": [1 + i % 2 for i in range(len(fares))],
+                "DOLocationID": [1] * len(fares),
+                "trip_distance": [2.0] * len(fares),
+                "fare_amount": fares,
+                "total_amount": fares,
+                "tip_amount": [1.0] * len(fares),
+            }
+        ),
+        path,
+    )
+    wh.load_month("p.raw.green_tripdata_raw", MonthLoad(2024, month, str(path)), GREEN.raw_columns)
+
+
+def test_incremental_aggregates_match_the_fact_table_on_duckdb(tmp_path):
+    pytest.importorskip("duckdb")
+    from de_pipeline.common.schemas import TAXI_ZONE_COLUMNS
+    from de_pipeline.common.services import GREEN
+    from de_pipeline.transform.aggregates import query_trips, refresh_aggregates
+    from de_pipeline.transform.dimensions import create_dim_location
+    from de_pipeline.transform.fact import refresh_fact_green_tripdata
+    from de_pipeline.warehouse.local import LocalWarehouse
+
+    wh = LocalWarehouse(tmp_path / "wh")
+    for dataset in ("raw", "cur"):
+        wh.ensure_dataset(dataset)
+    wh.ensure_month_partitioned_table("p.raw.green_tripdata_raw", GREEN.raw_columns)
+    zones = tmp_path / "zones.csv"
+    zones.write_text(
+        '"LocationID","Borough","Zone","service_zone"\n'
+        '1,"Manhattan","Midtown","Yellow Zone"\n2,"Queens","Astoria","Boro Zone"\n'
+    )
+    wh.load_csv(str(zones), "p.raw.taxi_zone_lookup", TAXI_ZONE_COLUMNS)
+    create_dim_location(wh, "p", "raw", "cur")
+    _load_month(wh, 4, [10.0, 20.0, 30.0, 40.0])
+    _load_month(wh, 5, [5.0, 15.0])
+    refresh_fact_green_tripdata(wh, "p", "raw", "cur", [(2024, 4), (2024, 5)])
+    refresh_aggregates(wh, "p", "cur", months=[(2024, 4), (2024, 5)])
+
+    # Mai rechargé : seul mai est recalculé.
+    _load_month(wh, 5, [5.0, 15.0, 25.0])
+    refresh_fact_green_tripdata(wh, "p", "raw", "cur", [(2024, 5)])
+    refresh_aggregates(wh, "p", "cur", months=[(2024, 5)])
+
+    question = TripQuery(measures=("trips", "revenue", "avg_revenue"), dimensions=("Borough",))
+    answer = query_trips(wh, "p", "cur", question)
+    from_fact = wh.fetch_all(
+        route_query(
+            TripQuery(question.measures, ("Borough", "DOLocationID")), "p", "cur", wh.dialect
+        )[1]
+    )[0]
+    may = query_trips(
+        wh,
+        "p",
+        "cur",
+        TripQuery(("trips",), ("pickup_hour",), start="2024-05-01", end="2024-06-01"),
+    )
+
+    assert answer["table"] == BOROUGH_DAY_TABLE
+    assert answer["rows"] == [
+        {"Borough": "Manhattan", "trips": 4, "revenue": 70.0, "avg_revenue": 17.5},
+        {"Borough": "Queens", "trips": 3, "revenue": 75.0, "avg_revenue": 25.0},
+    ]
+    assert [(r["Borough"], r["trips"], r["revenue"]) for r in from_fact] == [
+        (r["Borough"], r["trips"], r["revenue"]) for r in answer["rows"]
+    ]
+    assert may["table"] == ZONE_HOUR_TABLE
+    assert may["rows"] == [{"pickup_hour": 8, "trips": 2}, {"pickup_hour": 9, "trips": 1}]
@@ -0,0 +1,171 @@
+"""Tests pour le backfill par mois (étapes en pipeline, checkpoint par mois, reprise)."""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+
+import pytest
+
+from de_pipeline.common.manifest import JsonManifest
+from de_pipeline.orchestration.backfill import MonthCheckpoint, run_pipelined
+
+
+@dataclass(frozen=True)
+class _Item:
+    key: str
+
+
+def _items(n):
+    return [_Item(f"m{i}") for i in range(n)]
+
+
+def test_next_month_downloads_while_previous_one_loads():
+    second_downloaded = threading.Event()
+    overlapped = []
+
+    def download(item, state):
+        if item.key == "m1":
+            second_downloaded.set()
+        return {"path": item.key}
+
+    def load(item, state):
+        if item.key == "m0":
+            # Barrière entre étapes : m1 ne serait téléchargé qu'après ce chargement.
+            overlapped.append(second_downloaded.wait(timeout=5))
+        return {"rows": 1, "from": state["download"]["path"]}
+
+    summary = run_pipelined(
+        _items(3), {"download": download, "load": load}, {"download": 1, "load": 1}
+    )
+
+    assert overlapped == [True]
+    assert sorted(summary["done"]) == ["m0", "m1", "m2"]
+    assert summary["results"]["m2"]["load"] == {"rows": 1, "from": "m2"}
+
+
+def test_max_in_flight_bounds_started_months():
+    active, peak = set(), []
+    lock = threading.Lock()
+
+    def step(item, state):
+        with lock:
+            active.add(item.key)
+            peak.append(len(active))
+        return {}
+
+    def last(item, state):
+        with lock:
+            active.discard(item.key)
+        return {}
+
+    run_pipelined(
+        _items(6),
+        {"download": step, "load": last},
+        {"download": 4, "load": 4},
+        max_in_flight=2,
+    )
+
+    assert max(peak) <= 2
+
+
+def test_failed_month_resumes_at_its_failed_stage(tmp_path):
+    checkpoint = MonthCheckpoint(JsonManifest(tmp_path / "backfill.json"))
+    calls = []
+
+    def download(item, state):
+        calls.append((item.key, "download"))
+        return {"path": f"/{item.key}"}
+
+    def flaky_load(item, state):
+        if item.key == "m1":
+            raise RuntimeError("quota")
+        return {}
+
+    steps = {"download": download, "load": flaky_load}
+    first = run_pipelined(_items(3), steps, {"download": 2, "load": 2}, checkpoint)
+
+    assert first["failed"] == {"m1": "load: quota"}
+    assert sorted(first["done"]) == ["m0", "m2"]
+
+    calls.clear()
+    steps["load"] = lambda item, state: {"from": state["download"]["path"]}
+    again = run_pipelined(_items(3), steps, {"download": 2, "load": 2}, checkpoint)
+
+    assert calls == []
+    assert again["done"] == ["m1"] and sorted(again["resumed"]) == ["m0", "m2"]
+    assert again["results"]["m1"]["load"] == {"from": "/m1"}
+    assert "error" not in JsonManifest(tmp_path / "backfill.json").get("m1")
+
+
+def test_backfill_loads_each_month_offline(tmp_path, monkeypatch):
+    pytest.importorskip("duckdb")
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    from de_pipeline.bench.server import serve_directory
+    from de_pipeline.orchestration.backfill import run_backfill
+    from de_pipeline.orchestration.context import PipelineContext
+
+    for name in ("GCP_PROJECT_ID", "GCS_RAW_BUCKET", "BQ_DATASET_RAW", "BQ_DATASET_CURATED"):
+        monkeypatch.delenv(name, raising=False)
+    cdn = tmp_path / "cdn" / "trip-data"
+    cdn.mkdir(parents=True)
+    for month in (11, 12):
+        pickups = [datetime(2023, month, day, 8) for day in (1, 2, 3)]
+        pq.write_table(
+            pa.table(
+                {
+                    "VendorID": [2, 2, 2],
+                    "lpep_pickup_datetime": pickups,
+                    "lpep_dropoff_datetime": [p.replace(hour=9) for p in pickups],
+                    "trip_distance": [1.5, 2.0, 3.0],
+                }
+            ),
+            cdn / f"green_tripdata_2023-{month}.parquet",
+        )
+
+    with serve_directory(tmp_path / "cdn") as base_url:
+        config = tmp_path / "config"
+        config.mkdir()
+        (config / "dataset.yml").write_text(
+            "dataset:\n"
+            f"  source: {{base_url: '{base_url}', zones_path: zones.csv,"
+            " trips_path_template: 'trip-data/{service}_tripdata_{yyyy}-{mm}.parquet'}\n"
+            "raw_conventions: {local_prefix: green_taxi, gcs_prefix: raw/green_taxi,"
+            " partition_key: ingestion_date}\n"
+        )
+        (config / "runtime.yml").write_text(
+            "runtime:\n"
+            f"  local_raw_dir: {tmp_path / 'raw'}\n"
+            "  ingestion_date_format: '%Y-%m-%d'\n"
+            "  request_timeout_sec: 10\n"
+            "  chunk_size_bytes: 65536\n"
+            "  cache: {enabled: true}\n"
+            "  normalize: {enabled: true}\n"
+            f"  dedup: {{enabled: true, dir: {tmp_path / 'fingerprints'}}}\n"
+            "  backfill: {max_workers: {download: 2, load: 1}, max_in_flight: 2}\n"
+            f"  local: {{bucket_dir: {tmp_path / 'bucket'}, warehouse_dir: {tmp_path / 'wh'}}}\n"
+        )
+        ctx = PipelineContext.from_config(config, backend="local")
+        checkpoint = MonthCheckpoint(JsonManifest(ctx.manifests_dir / "backfill.json"))
+        summary = run_backfill(ctx, [(2023, 11), (2023, 12), (2024, 1)], checkpoint=checkpoint)
+        again = run_backfill(ctx, [(2023, 11), (2023, 12)], checkpoint=checkpoint)
+
+    row, _ = ctx.warehouse().fetch_one('SELECT COUNT(*) AS n FROM "raw"."green_tripdata_raw"')
+    assert sorted(summary["done"]) == ["green 2023-11", "green 2023-12"]
+    assert list(summary["failed"]) == ["green 2024-01"]
+    assert summary["results"]["green 2023-12"]["load"]["rows"] == 3
+    assert row == {"n": 6}
+    assert sorted(again["resumed"]) == ["green 2023-11", "green 2023-12"]
+    downloads = JsonManifest(ctx.download_manifest_path(ctx.services[0])).entries()
+    assert downloads["green_tripdata_2023-11.parquet"]["normalized_md5"]
+    # Empreintes enregistrées une fois chaque mois chargé.
+    sources = JsonManifest(tmp_path / "fingerprints" / "green_taxi" / "sources.json").entries()
+    assert sorted(sources) == ["202311", "202312"]
+    assert not list((tmp_path / "fingerprints" / "green_taxi" / "pending").iterdir())
+    # Seuls les fichiers normalisés sont dans le cache : pas de blob brut sans lien.
+    assert [md5 for md5, _ in ctx.blob_cache().blobs()] == sorted(
+        entry["normalized_md5"] for entry in downloads.values()
+    )
@@ -0,0 +1,109 @@
+import threading
+
+import pytest
+import requests
+
+from de_pipeline.ingestion.batch import DownloadJob, download_many, download_with_retry
+
+
+class DummyResponse:
+    def __init__(self, content_chunks, status_code=200):
+        self._chunks = content_chunks
+        self.status_code = status_code
+        self.headers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code}", response=self)
+
+    def iter_content(self, chunk_size=1):
+        yield from self._chunks
+
+
+class FakeSession:
+    """Serve fixed bodies per URL; `failures` maps URL -> errors raised before success."""
+
+    def __init__(self, bodies, failures=None):
+        self.bodies = bodies
+        self.failures = dict(failures or {})
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def get(self, url, stream=True, timeout=60):
+        with self._lock:
+            self.calls.append(url)
+            pending = self.failures.get(url)
+            if pending:
+                self.failures[url] = pending[1:]
+                raise pending[0]
+        body = self.bodies[url]
+        if isinstance(body, int):
+            return DummyResponse([], status_code=body)
+        return DummyResponse([body])
+
+
+def test_download_many_isolates_failed_month(tmp_path):
+    session = FakeSession(
+        {"http://x/a": b"aaa", "http://x/b": 404, "http://x/c": b"cc"},
+    )
+    jobs = [
+        DownloadJob(url=f"http://x/{name}", dest_path=tmp_path / f"{name}.bin", label=name)
+        for name in ("a", "b", "c")
+    ]
+
+    summary = download_many(jobs, max_workers=3, timeout_sec=5, chunk_size=4, session=session)
+
+    assert [m["label"] for m in summary["ok"]] == ["a", "c"]
+    assert [f["label"] for f in summary["failed"]] == ["b"]
+    assert summary["bytes"] == 5
+    assert (tmp_path / "a.bin").read_bytes() == b"aaa"
+    # A 404 is not retried.
+    assert session.calls.count("http://x/b") == 1
+
+
+def test_download_with_retry_backs_off_on_transient_errors(tmp_path):
+    session = FakeSession(
+        {"http://x/a": b"abc"},
+        failures={"http://x/a": [requests.ConnectionError("reset"), requests.Timeout("slow")]},
+    )
+    delays = []
+    job = DownloadJob(url="http://x/a", dest_path=tmp_path / "a.bin", label="a")
+
+    meta = download_with_retry(
+        job,
+        session,
+        timeout_sec=5,
+        chunk_size=4,
+        max_retries=3,
+        backoff_sec=0.5,
+        sleep=delays.append,
+    )
+
+    assert meta["attempts"] == 3
+    assert delays == [0.5, 1.0]
+    assert (tmp_path / "a.bin").read_bytes() == b"abc"
+
+
+def test_download_with_retry_gives_up(tmp_path):
+    session = FakeSession(
+        {"http://x/a": b"abc"},
+        failures={"http://x/a": [requests.ConnectionError("reset")] * 3},
+    )
+    job = DownloadJob(url="http://x/a", dest_path=tmp_path / "a.bin", label="a")
+
+    with pytest.raises(requests.ConnectionError):
+        download_with_retry(
+            job,
+            session,
+            timeout_sec=5,
+            chunk_size=4,
+            max_retries=2,
+            backoff_sec=0,
+            sleep=lambda s: None,
+        )
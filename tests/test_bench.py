@@ -0,0 +1,76 @@
+"""Tests pour la suite de benchmarks : générateur synthétique, serveur HTTP, régressions."""
+
+from __future__ import annotations
+
+import pyarrow.parquet as pq
+import pytest
+import requests
+
+from de_pipeline.bench.server import serve_directory
+from de_pipeline.bench.suite import compare
+from de_pipeline.bench.synthetic import write_green_month, write_zone_lookup
+from de_pipeline.common.schemas import GREEN_TRIPDATA_COLUMNS
+
+
+def test_generator_writes_real_columns_in_bounded_row_groups(tmp_path):
+    path = write_green_month(tmp_path / "g.parquet", 2025, 2, rows=2_500, row_group_size=1_000)
+    again = write_green_month(tmp_path / "h.parquet", 2025, 2, rows=2_500, row_group_size=1_000)
+
+    meta = pq.ParquetFile(path).metadata
+    table = pq.read_table(path)
+    pickup = table.column("lpep_pickup_datetime")
+    assert table.column_names == [name for name, _ in GREEN_TRIPDATA_COLUMNS]
+    assert (meta.num_rows, meta.num_row_groups) == (2_500, 3)
+    assert str(pickup.type) == "timestamp[us]"
+    assert pickup.to_pylist()[0].month == 2
+    assert table.equals(pq.read_table(again))
+    old = pq.read_schema(write_green_month(tmp_path / "o.parquet", 2024, 5, rows=10))
+    assert "cbd_congestion_fee" not in old.names
+
+
+def test_server_honours_head_range_and_if_range(tmp_path):
+    write_zone_lookup(tmp_path / "misc" / "zones.csv")
+    data = (tmp_path / "misc" / "zones.csv").read_bytes()
+
+    with serve_directory(tmp_path) as base_url:
+        url = f"{base_url}/misc/zones.csv"
+        head = requests.head(url, timeout=5)
+        part = requests.get(url, headers={"Range": "bytes=10-19"}, timeout=5)
+        stale = requests.get(url, headers={"Range": "bytes=10-", "If-Range": '"x"'}, timeout=5)
+
+    assert head.headers["Accept-Ranges"] == "bytes"
+    assert int(head.headers["Content-Length"]) == len(data)
+    assert part.status_code == 206 and part.content == data[10:20]
+    assert stale.status_code == 200 and stale.content == data
+
+
+def test_compare_flags_tracked_metrics_past_threshold():
+    params = {"rows_per_month": 10, "months": 1, "seed": 0, "row_group_size": 10}
+    baseline = {
+        "params": params,
+        "results": {"download": {"throughput_mb_s": 100.0}, "e2e": {"wall_sec": 10.0}},
+    }
+    report = {
+        "params": params,
+        "results": {"download": {"throughput_mb_s": 90.0}, "e2e": {"wall_sec": 14.0}},
+    }
+
+    (regression,) = compare(report, baseline, threshold=0.25)
+
+    assert regression["benchmark"] == "e2e" and regression["change"] == pytest.approx(0.4)
+    with pytest.raises(ValueError):
+        compare({**report, "params": {**params, "months": 2}}, baseline)
+
+
+def test_run_suite_reports_median_runs(tmp_path):
+    from de_pipeline.bench.suite import BenchConfig, run_suite
+
+    config = BenchConfig(rows_per_month=200, months=1, repeat=3)
+
+    report = run_suite(tmp_path, config, only=["download", "upload", "dq_local"])
+
+    assert report["dataset"]["rows"] == 200
+    assert set(report["results"]) == {"download", "upload", "dq_local"}
+    download = report["results"]["download"]
+    assert sorted(download["runs_wall_sec"])[1] == download["wall_sec"]
+    assert report["results"]["dq_local"]["rows"] == 200
@@ -0,0 +1,83 @@
+"""Tests pour le cache raw adressé par contenu (liens physiques, GC LRU)."""
+
+from __future__ import annotations
+
+import os
+from datetime import UTC, datetime, timedelta
+
+from de_pipeline.ingestion.cache import BlobCache, collect_garbage, file_md5
+
+
+def _partition(root, day, files):
+    folder = root / "green_taxi" / f"ingestion_date={day}"
+    folder.mkdir(parents=True, exist_ok=True)
+    for name, data in files.items():
+        (folder / name).write_bytes(data)
+    return folder
+
+
+def test_identical_downloads_share_one_blob(tmp_path):
+    cache = BlobCache(tmp_path / "_blobs")
+    first = _partition(tmp_path, "2024-06-01", {"g_2024-04.parquet": b"april"})
+    second = _partition(tmp_path, "2024-06-02", {"g_2024-04.parquet": b"april"})
+
+    assert cache.adopt(first / "g_2024-04.parquet") is False
+    assert cache.adopt(second / "g_2024-04.parquet", file_md5(second / "g_2024-04.parquet"))
+
+    blob = cache.blob_path(file_md5(first / "g_2024-04.parquet"))
+    assert os.path.samefile(first / "g_2024-04.parquet", second / "g_2024-04.parquet")
+    assert blob.stat().st_nlink == 3
+    assert (second / "g_2024-04.parquet").read_bytes() == b"april"
+
+
+def test_gc_adopts_copies_then_evicts_least_recently_used(tmp_path):
+    cache = BlobCache(tmp_path / "_blobs")
+    old = _partition(tmp_path, "2024-06-01", {"a.parquet": b"a" * 100, "b.parquet": b"b" * 100})
+    new = _partition(tmp_path, "2024-06-02", {"a.parquet": b"a" * 100, "c.parquet": b"c" * 100})
+    (tmp_path / "_manifests").mkdir()
+    (tmp_path / "_manifests" / "green_taxi.json").write_text("{}")
+
+    summary = collect_garbage(cache, tmp_path, exclude=(tmp_path / "_manifests",))
+    assert summary["adopted"] == 4
+    assert summary["deduplicated_bytes"] == 100
+    assert summary["kept_bytes"] == 300
+
+    md5 = {name: file_md5(new / name) for name in ("a.parquet", "c.parquet")}
+    md5["b.parquet"] = file_md5(old / "b.parquet")
+    long_ago = (datetime.now(UTC) - timedelta(days=30)).isoformat()
+    cache.index.set(md5["b.parquet"], {"last_used": long_ago, "bytes": 100})
+
+    dry = collect_garbage(cache, tmp_path, max_bytes=200, dry_run=True)
+    assert dry["evicted"] == [md5["b.parquet"]] and (old / "b.parquet").exists()
+
+    summary = collect_garbage(
+        cache,
+        tmp_path,
+        max_bytes=100,
+        protect={md5["c.parquet"]},
+        exclude=(tmp_path / "_manifests",),
+    )
+
+    assert summary["evicted"][0] == md5["b.parquet"]
+    assert set(summary["evicted"]) == {md5["a.parquet"], md5["b.parquet"]}
+    assert not old.exists()
+    assert (new / "c.parquet").exists() and not (new / "a.parquet").exists()
+    assert not cache.blob_path(md5["b.parquet"]).exists()
+    assert (tmp_path / "_manifests" / "green_taxi.json").exists()
+
+
+def test_gc_drops_orphans_and_old_blobs(tmp_path):
+    cache = BlobCache(tmp_path / "_blobs")
+    folder = _partition(tmp_path, "2024-06-01", {"a.parquet": b"a", "b.parquet": b"b"})
+    for path in folder.iterdir():
+        cache.adopt(path)
+    orphan, stale = file_md5(folder / "a.parquet"), file_md5(folder / "b.parquet")
+    (folder / "a.parquet").unlink()
+    cache.index.set(stale, {"last_used": (datetime.now(UTC) - timedelta(days=10)).isoformat()})
+
+    summary = collect_garbage(cache, tmp_path, max_age_days=7)
+
+    assert summary["orphans"] == [orphan]
+    assert summary["evicted"] == [stale]
+    assert not folder.exists()
+    assert cache.blobs() == []
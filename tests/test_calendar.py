@@ -0,0 +1,78 @@
+"""Tests pour la dimension calendrier (plage suivant les faits, extension incrémentale)."""
+
+from __future__ import annotations
+
+from datetime import date, datetime
+
+import pytest
+
+from de_pipeline.transform.dimensions import calendar_insert_sql, calendar_table
+
+
+def test_arrow_calendar_columns():
+    hours = calendar_table(date(2024, 2, 28), date(2024, 3, 1), "hour").to_pylist()
+    days = calendar_table(date(2024, 12, 29), date(2025, 1, 1), "day").to_pylist()
+
+    assert len(hours) == 3 * 24
+    assert hours[-1]["datetime_key"] == 2024030123
+    assert hours[24]["date"] == date(2024, 2, 29)
+    assert hours[0]["day_name"] == "Wednesday" and hours[0]["day_of_week"] == 3
+    assert [d["datetime_key"] for d in days] == [20241229, 20241230, 20241231, 20250101]
+    assert [d["iso_week"] for d in days] == [52, 1, 1, 1]
+    assert [d["is_weekend"] for d in days] == [True, False, False, False]
+    assert days[0]["hour"] is None
+
+
+def test_bigquery_calendar_sql():
+    sql = calendar_insert_sql("p.cur.dim_datetime", date(2024, 1, 1), date(2024, 1, 31))
+
+    assert "GENERATE_DATE_ARRAY('2024-01-01', '2024-01-31')" in sql
+    assert "GENERATE_ARRAY(0, 23)" in sql
+    with pytest.raises(ValueError, match="grain"):
+        calendar_insert_sql("p.cur.dim_datetime", date(2024, 1, 1), date(2024, 1, 2), "minute")
+
+
+def _fact(wh, pickups):
+    wh.run('CREATE TABLE IF NOT EXISTS "cur"."fact" (pickup_datetime TIMESTAMP)')
+    for p in pickups:
+        wh.run(f'INSERT INTO "cur"."fact" VALUES (TIMESTAMP \'{p.isoformat(sep=" ")}\')')
+
+
+def test_calendar_grows_with_the_fact_table_on_duckdb(tmp_path):
+    pytest.importorskip("duckdb")
+    from de_pipeline.transform.dimensions import extend_dim_datetime
+    from de_pipeline.warehouse.local import LocalWarehouse
+
+    wh = LocalWarehouse(tmp_path / "wh")
+    wh.ensure_dataset("cur")
+    # Ancienne table à la minute : reconstruite au premier run.
+    wh.run('CREATE TABLE "cur"."dim_datetime" AS SELECT DATE \'2020-01-01\' AS date, 0 AS minute')
+    _fact(wh, [datetime(2024, 5, 3, 8), datetime(2001, 1, 1), datetime(2024, 4, 30, 23)])
+
+    def extend(**kwargs):
+        return extend_dim_datetime(
+            wh, "p", "cur", ["p.cur.fact"], today=date(2024, 12, 31), **kwargs
+        )
+
+    first = extend()
+    _fact(wh, [datetime(2024, 6, 10, 12), datetime(2031, 1, 1)])
+    second = extend(months=[(2024, 6)], build="arrow")
+    third = extend(months=[(2024, 6)])
+    stats, _ = wh.fetch_one(
+        "SELECT COUNT(*) AS n, COUNT(DISTINCT datetime_key) AS keys, MIN(date) AS lo, "
+        'MAX(date) AS hi FROM "cur"."dim_datetime"'
+    )
+    sql_rows = wh.fetch_all(
+        'SELECT * FROM "cur"."dim_datetime" WHERE date = \'2024-05-31\' ORDER BY datetime_key'
+    )[0]
+
+    assert first["rebuilt"] and first["appended"] == (30 + 31) * 24
+    assert (first["start"], first["end"]) == ("2024-04-01", "2024-05-31")
+    assert not second["rebuilt"] and second["appended"] == 30 * 24
+    assert third["appended"] == 0
+    assert stats["n"] == stats["keys"] == (30 + 31 + 30) * 24
+    assert (stats["lo"], stats["hi"]) == (date(2024, 4, 1), date(2024, 6, 30))
+    assert sql_rows == calendar_table(date(2024, 5, 31), date(2024, 5, 31)).to_pylist()
+
+    day = extend(grain="day")
+    assert day["rebuilt"] and day["appended"] == 30 + 31 + 30
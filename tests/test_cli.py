@@ -0,0 +1,51 @@
+"""Tests pour la CLI `de-pipeline` (sous-commandes, imports paresseux)."""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from de_pipeline.cli import build_parser, main
+
+ROOT = Path(__file__).resolve().parents[1]
+
+HEAVY_MODULES = ("google.cloud.bigquery", "google.cloud.storage", "pandas", "pyarrow", "rich")
+
+
+def _imported_after(code: str) -> list[str]:
+    probe = (
+        f"import sys\n{code}\n"
+        f"print('heavy=' + ','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", probe], cwd=ROOT, check=True, capture_output=True, text=True
+    )
+    heavy = out.stdout.strip().splitlines()[-1].removeprefix("heavy=")
+    return [m for m in heavy.split(",") if m]
+
+
+def test_cli_import_and_preview_stay_light():
+    assert _imported_after("import de_pipeline.cli") == []
+    assert _imported_after("from de_pipeline.cli import main; main(['preview'])") == []
+
+
+@pytest.mark.parametrize(
+    "command", ["preview", "download", "upload", "load", "transform", "dq", "run"]
+)
+def test_every_stage_has_a_subcommand(command):
+    args = build_parser().parse_args([command, "--config-dir", "cfg"])
+
+    assert args.command == command
+    assert args.config_dir == "cfg"
+    assert callable(args.func)
+
+
+def test_preview_prints_source_urls(capsys):
+    assert main(["preview", "--config-dir", str(ROOT / "config")]) == 0
+
+    out = capsys.readouterr().out
+    assert "taxi_zone_lookup.csv" in out
+    assert out.count("green_tripdata_") == 3
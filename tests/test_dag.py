@@ -0,0 +1,129 @@
+"""Tests pour l'orchestrateur DAG en process (parallélisme, blocage, reprise)."""
+
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+
+import pytest
+import yaml
+
+from de_pipeline.common.manifest import JsonManifest
+from de_pipeline.orchestration.context import PipelineContext
+from de_pipeline.orchestration.dag import Stage, StageCheckpoint, run_dag, validate_stages
+from de_pipeline.orchestration.pipeline import build_stages
+
+
+def _recorder(calls, name, fail=False, barrier=None):
+    def run(ctx):
+        if barrier is not None:
+            barrier.wait(timeout=5)
+        calls.append(name)
+        if fail:
+            raise RuntimeError(f"{name} boom")
+        return name.upper()
+
+    return run
+
+
+def test_independent_stages_run_in_parallel_and_dependents_after():
+    calls = []
+    barrier = threading.Barrier(2)
+    stages = [
+        Stage("zones", _recorder(calls, "zones", barrier=barrier)),
+        Stage("trips", _recorder(calls, "trips", barrier=barrier)),
+        Stage("upload", _recorder(calls, "upload"), ("zones", "trips")),
+    ]
+
+    summary = run_dag(stages, context=None, max_workers=2)
+
+    # The barrier only releases if both downloads are running at the same time
+    assert sorted(calls[:2]) == ["trips", "zones"]
+    assert calls[2] == "upload"
+    assert summary["results"]["upload"] == "UPLOAD"
+    assert summary["failed"] == {}
+
+
+def test_failure_blocks_only_its_dependents():
+    calls = []
+    stages = [
+        Stage("a", _recorder(calls, "a", fail=True)),
+        Stage("b", _recorder(calls, "b"), ("a",)),
+        Stage("c", _recorder(calls, "c"), ("b",)),
+        Stage("d", _recorder(calls, "d")),
+    ]
+
+    summary = run_dag(stages, context=None)
+
+    assert summary["failed"] == {"a": "a boom"}
+    assert sorted(summary["blocked"]) == ["b", "c"]
+    assert summary["done"] == ["d"]
+
+
+def test_resume_restarts_from_the_failed_stage(tmp_path):
+    path = tmp_path / "run_pipeline.json"
+    calls = []
+    flaky = {"fail": True}
+
+    def load(ctx):
+        calls.append("load")
+        if flaky["fail"]:
+            raise RuntimeError("quota")
+
+    stages = [
+        Stage("download", _recorder(calls, "download")),
+        Stage("load", load, ("download",)),
+        Stage("transform", _recorder(calls, "transform"), ("load",)),
+    ]
+
+    first = run_dag(stages, None, checkpoint=StageCheckpoint(JsonManifest(path), "2024-06-02"))
+    assert first["failed"] and calls == ["download", "load"]
+
+    flaky["fail"] = False
+    calls.clear()
+    second = run_dag(stages, None, checkpoint=StageCheckpoint(JsonManifest(path), "2024-06-02"))
+    assert second["resumed"] == ["download"]
+    assert calls == ["load", "transform"]
+
+    # A checkpoint of another day does not skip anything
+    calls.clear()
+    run_dag(stages, None, checkpoint=StageCheckpoint(JsonManifest(path), "2024-06-03"))
+    assert calls == ["download", "load", "transform"]
+
+
+def test_invalid_graphs_are_rejected():
+    noop = _recorder([], "x")
+    with pytest.raises(ValueError, match="unknown"):
+        validate_stages([Stage("a", noop, ("missing",))])
+    with pytest.raises(ValueError, match="cycle"):
+        validate_stages([Stage("a", noop, ("b",)), Stage("b", noop, ("a",))])
+
+
+def test_pipeline_includes_transform_and_dq_per_table():
+    root = Path(__file__).resolve().parents[1]
+    with open(root / "config" / "dq.yml", encoding="utf-8") as f:
+        dq_cfg = yaml.safe_load(f)["dq"]
+    ctx = PipelineContext(
+        dataset_cfg={}, runtime_cfg={"runtime": {}}, dq_cfg=dq_cfg, project_id="p"
+    )
+
+    stages = validate_stages(build_stages(ctx))
+
+    assert {"transform_fact", "transform_dim_location", "transform_dim_datetime"} <= set(stages)
+    assert stages["dq_fact_green_tripdata"].deps == ("transform_fact",)
+    assert stages["dq_taxi_zone_lookup"].deps == ("load_zones",)
+    # Zones and trips branches do not wait on each other after upload
+    assert "load_trips" not in stages["load_zones"].deps
+
+
+def test_context_builds_each_client_once():
+    ctx = PipelineContext(dataset_cfg={}, runtime_cfg={"runtime": {}})
+    built = []
+
+    def factory():
+        built.append(1)
+        return object()
+
+    clients = {ctx.client("bq", factory) for _ in range(3)}
+
+    assert len(clients) == 1 and built == [1]
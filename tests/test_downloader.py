@@ -1,3 +1,4 @@
+import google_crc32c
 import requests
 
 from de_pipeline.ingestion.downloader import download_file
@@ -6,6 +7,7 @@ from de_pipeline.ingestion.downloader import download_file
 class DummyResponse:
     def __init__(self, content_chunks):
         self._chunks = content_chunks
+        self.headers = {}
 
     def __enter__(self):
         return self
@@ -35,3 +37,4 @@ def test_download_file_writes_bytes(tmp_path, monkeypatch):
     assert dest.read_bytes() == b"abcdef"
     assert meta["bytes"] == 6
     assert "md5" in meta
+    assert meta["crc32c"] == google_crc32c.Checksum(b"abcdef").digest().hex()
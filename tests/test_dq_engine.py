@@ -0,0 +1,95 @@
+"""Tests pour le moteur DQ local (une passe par fichier Parquet)."""
+
+from __future__ import annotations
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from de_pipeline.dq.engine import evaluate_file, evaluate_files
+from de_pipeline.dq.rules import NoDuplicates, NotNull, Range, RowCount, load_rules
+
+RULES = load_rules(
+    [
+        {"type": "row_count", "min": 1},
+        {"type": "not_null", "name": "no_null_keys", "columns": ["pickup", "fare_amount"]},
+        {"type": "range", "column": "trip_distance", "min": 0, "min_inclusive": False},
+        {"type": "duplicates"},
+    ]
+)
+
+
+def _write(path, **columns):
+    pq.write_table(pa.table(columns), path)
+    return path
+
+
+def _by_rule(report):
+    return {r["rule"]: r for r in report["results"]}
+
+
+def test_single_pass_counts_failures_across_batches(tmp_path):
+    path = _write(
+        tmp_path / "trips.parquet",
+        pickup=[1, 2, None, 4, 1],
+        fare_amount=[10.0, None, 5.0, 7.0, 10.0],
+        trip_distance=[1.0, 0.0, -2.0, None, 1.0],
+    )
+
+    report = evaluate_file(path, RULES, batch_size=2)
+    results = _by_rule(report)
+
+    assert report["rows"] == 5
+    assert results["row_count"]["passed"]
+    assert results["no_null_keys"]["failed_rows"] == 2
+    assert results["range_trip_distance"]["failed_rows"] == 2
+    # Rows 0 and 4 are identical but land in different batches.
+    assert results["no_duplicates"]["failed_rows"] == 1
+    assert not report["passed"]
+
+
+def test_tolerance_and_missing_columns(tmp_path):
+    path = _write(tmp_path / "trips.parquet", trip_distance=[1.0, 2.0, 0.0, 3.0])
+    rules = [
+        Range(name="distance", column="trip_distance", min=0, min_inclusive=False, tolerance=0.25),
+        NotNull(name="keys", columns=("pickup",)),
+    ]
+
+    results = _by_rule(evaluate_file(path, rules))
+
+    assert results["distance"]["passed"]
+    assert not results["keys"]["passed"]
+    assert results["keys"]["missing"] == ["pickup"]
+
+
+def test_files_are_evaluated_in_parallel_processes(tmp_path):
+    good = _write(
+        tmp_path / "a.parquet", pickup=[1, 2], fare_amount=[1.0, 2.0], trip_distance=[1.0, 2.0]
+    )
+    empty = _write(
+        tmp_path / "b.parquet",
+        pickup=pa.array([], pa.int64()),
+        fare_amount=pa.array([], pa.float64()),
+        trip_distance=pa.array([], pa.float64()),
+    )
+    rules = [RowCount(name="rows"), NoDuplicates(name="dups", columns=("pickup",))]
+
+    reports = evaluate_files([good, empty], rules, max_workers=2)
+
+    assert [r["passed"] for r in reports] == [True, False]
+
+
+def test_unknown_rule_type():
+    with pytest.raises(ValueError):
+        load_rules([{"type": "regex", "column": "x"}])
+
+
+def test_duplicate_hashes_spill_to_disk_past_memory_limit(tmp_path):
+    values = [i % 7 for i in range(50)]
+    path = _write(tmp_path / "trips.parquet", pickup=values, fare_amount=values)
+    rules = load_rules([{"type": "duplicates"}])
+
+    in_memory = evaluate_file(path, rules, batch_size=8)
+    spilled = evaluate_file(path, rules, batch_size=8, max_hashes=10)
+
+    assert in_memory["results"][0]["failed_rows"] == spilled["results"][0]["failed_rows"] == 43
@@ -0,0 +1,85 @@
+"""Tests pour la DQ entrepôt : une requête agrégée par table."""
+
+from __future__ import annotations
+
+import threading
+
+from de_pipeline.dq.rules import load_rules
+from de_pipeline.dq.warehouse import check_tables, compile_rules_sql
+
+RULES = load_rules(
+    [
+        {"type": "row_count", "name": "has_data", "min": 1},
+        {"type": "not_null", "name": "no_null_keys", "columns": ["pickup", "fare_amount"]},
+        {"type": "range", "column": "trip_distance", "min": 0, "min_inclusive": False},
+        {"type": "duplicates", "name": "no_duplicates"},
+        {"type": "duplicates", "name": "unique_ids", "columns": ["trip_id"]},
+    ]
+)
+
+
+class FakeJob:
+    def __init__(self, row, bytes_processed=1000):
+        self._row = row
+        self.total_bytes_processed = bytes_processed
+        self.total_bytes_billed = bytes_processed
+
+    def result(self):
+        return iter([self._row])
+
+
+class FakeClient:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+        self._lock = threading.Lock()
+
+    def query(self, sql, job_config=None):
+        with self._lock:
+            self.queries.append((sql, job_config))
+        table = sql.split("FROM `")[1].split("`")[0]
+        if isinstance(self.rows[table], Exception):
+            raise self.rows[table]
+        return FakeJob(self.rows[table])
+
+
+def test_compile_rules_sql_is_a_single_aggregate():
+    sql = compile_rules_sql("p.raw.trips", RULES)
+
+    assert sql.count("FROM") == 1
+    assert "COUNTIF(pickup IS NULL OR fare_amount IS NULL) AS r1" in sql
+    assert "COUNTIF(trip_distance <= 0) AS r2" in sql
+    assert "COUNT(DISTINCT FARM_FINGERPRINT(TO_JSON_STRING(t))) AS r3" in sql
+    assert "TO_JSON_STRING(STRUCT(t.trip_id))" in sql
+    assert "DISTINCT *" not in sql
+
+
+def test_check_tables_runs_one_job_per_table_concurrently():
+    client = FakeClient(
+        {
+            "p.raw.trips": {"row_count": 10, "r0": 0, "r1": 0, "r2": 3, "r3": 1, "r4": 0},
+            "p.raw.zones": RuntimeError("Not found: Table p.raw.zones"),
+        }
+    )
+
+    reports = {
+        r["table"]: r for r in check_tables(client, {"p.raw.trips": RULES, "p.raw.zones": RULES})
+    }
+
+    assert len(client.queries) == 2
+    trips = {r["rule"]: r for r in reports["p.raw.trips"]["results"]}
+    assert trips["has_data"]["passed"]
+    assert trips["range_trip_distance"]["failed_rows"] == 3
+    assert not trips["no_duplicates"]["passed"]
+    assert reports["p.raw.trips"]["bytes_processed"] == 1000
+    assert reports["p.raw.zones"]["passed"] is False
+    assert "Not found" in reports["p.raw.zones"]["error"]
+
+
+def test_dry_run_reports_bytes_without_reading_rows():
+    client = FakeClient({"p.raw.trips": {}})
+
+    (report,) = check_tables(client, {"p.raw.trips": RULES}, dry_run=True)
+
+    assert report == {"table": "p.raw.trips", "dry_run": True, "bytes_processed": 1000}
+    assert client.queries[0][1].dry_run
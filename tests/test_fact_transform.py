@@ -0,0 +1,101 @@
+"""Tests pour la construction incrémentale de fact_green_tripdata."""
+
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+
+from de_pipeline.ingestion.incremental import months_in_partition
+from de_pipeline.transform.fact import (
+    create_fact_sql,
+    month_date_ranges,
+    refresh_fact_green_tripdata,
+    refresh_fact_sql,
+    widen_months,
+)
+from de_pipeline.warehouse.dialect import DUCKDB
+
+
+class FakeJob:
+    total_bytes_processed = 42
+    total_bytes_billed = 10485760
+
+    def result(self):
+        return []
+
+
+class FakeClient:
+    def __init__(self):
+        self.queries = []
+
+    def query(self, sql, job_config=None):
+        self.queries.append(sql)
+        return FakeJob()
+
+
+def test_month_date_ranges_merges_consecutive_months():
+    ranges = month_date_ranges([(2024, 5), (2023, 12), (2024, 1), (2024, 5)])
+
+    assert ranges == [(date(2023, 12, 1), date(2024, 2, 1)), (date(2024, 5, 1), date(2024, 6, 1))]
+
+
+def test_fact_ddl_is_partitioned_clustered_and_deterministic():
+    sql = create_fact_sql("p.cur.fact", "p.raw.trips", replace=True)
+
+    assert "PARTITION BY DATE(pickup_datetime)" in sql
+    assert "CLUSTER BY PULocationID, DOLocationID" in sql
+    assert "GENERATE_UUID" not in sql
+    assert "TO_HEX(MD5(TO_JSON_STRING(STRUCT(VendorID, lpep_pickup_datetime" in sql
+    assert "CREATE TABLE IF NOT EXISTS" in create_fact_sql("p.cur.fact", "p.raw.trips")
+
+
+def test_refresh_replaces_only_touched_partitions():
+    sql = refresh_fact_sql("p.cur.fact", "p.raw.trips", [(2024, 4), (2024, 5)])
+
+    assert sql.startswith("BEGIN TRANSACTION;")
+    # Dérive d'un mois : mars..juin réécrits, depuis les partitions brutes février..juillet.
+    assert (
+        "DELETE FROM `p.cur.fact`\n"
+        "WHERE (DATE(pickup_datetime) >= '2024-03-01' AND DATE(pickup_datetime) < '2024-07-01');"
+    ) in sql
+    assert "DATE(lpep_pickup_datetime) >= '2024-03-01'" in sql
+    assert (
+        "(_PARTITIONTIME >= TIMESTAMP('2024-02-01') AND _PARTITIONTIME < TIMESTAMP('2024-08-01'))"
+    ) in sql
+    assert sql.rstrip().endswith("COMMIT TRANSACTION;")
+    exact = refresh_fact_sql("p.cur.fact", "p.raw.trips", [(2024, 1)], max_month_drift=0)
+    assert "_PARTITIONTIME < TIMESTAMP('2024-02-01')" in exact
+    assert "_PARTITIONTIME" not in refresh_fact_sql(
+        "p.cur.fact", "p.raw.trips", [(2024, 1)], DUCKDB
+    )
+    with pytest.raises(ValueError):
+        refresh_fact_sql("p.cur.fact", "p.raw.trips", [])
+
+
+def test_widen_months_crosses_years():
+    assert widen_months([(2024, 1)], 1) == [(2023, 12), (2024, 1), (2024, 2)]
+    assert widen_months([(2024, 5), (2024, 6)], 0) == [(2024, 5), (2024, 6)]
+
+
+def test_refresh_fact_creates_table_then_runs_one_script():
+    client = FakeClient()
+
+    report = refresh_fact_green_tripdata(client, "p", "raw", "cur", [(2024, 5)])
+
+    assert len(client.queries) == 2
+    assert "CREATE TABLE IF NOT EXISTS `p.cur.fact_green_tripdata`" in client.queries[0]
+    assert report["bytes_billed"] == 10485760
+
+
+def test_months_in_partition_reads_the_ingestion_manifest():
+    entries = {
+        "green_tripdata_2024-04.parquet": {"path": "data/raw/g/ingestion_date=2024-06-01/x"},
+        "green_tripdata_2024-05.parquet": {"path": "data/raw/g/ingestion_date=2024-06-02/x"},
+        "green_tripdata_2024-03.parquet": {
+            "path": None,
+            "uri": "gs://b/raw/g/ingestion_date=2024-06-02/x",
+        },
+    }
+
+    assert months_in_partition(entries, "ingestion_date=2024-06-02") == [(2024, 3), (2024, 5)]
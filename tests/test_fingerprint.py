@@ -0,0 +1,152 @@
+"""Tests pour les empreintes de trips et l'index des trips déjà chargés."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from de_pipeline.ingestion.fingerprint import FingerprintIndex, dedup_file, trip_fingerprints
+
+
+def _trips(pickups, fares, vendor_type=None, time_unit="us"):
+    vendor_type = vendor_type or pa.int64()
+    return pa.table(
+        {
+            "VendorID": pa.array([2] * len(pickups), vendor_type),
+            "lpep_pickup_datetime": pa.array(pickups, pa.timestamp(time_unit)),
+            "lpep_dropoff_datetime": pa.array(
+                [p + timedelta(minutes=10) if p else None for p in pickups], pa.timestamp(time_unit)
+            ),
+            "fare_amount": pa.array(fares, pa.float64()),
+        }
+    )
+
+
+def _write(path, table):
+    pq.write_table(table, path, row_group_size=2)
+    return path
+
+
+def test_fingerprints_ignore_physical_type_drift():
+    pickups = [datetime(2024, 5, 1, 8), datetime(2024, 5, 1, 9), None]
+    canonical = _trips(pickups, [10.0, 10.0, None]).to_batches()[0]
+    drifted = _trips(pickups, [10.0, 10.0, None], pa.float64(), "ns").to_batches()[0]
+    zero_fare = _trips(pickups, [10.0, 10.0, 0.0]).to_batches()[0]
+
+    a, b, c = (trip_fingerprints(batch) for batch in (canonical, drifted, zero_fare))
+
+    assert list(a) == list(b)
+    assert len(set(a)) == 3
+    assert a[2] != c[2]
+
+
+def test_dedup_drops_repeats_and_trips_loaded_by_another_month(tmp_path):
+    late_april = datetime(2024, 4, 30, 23)
+    may = [datetime(2024, 5, 2, 8), datetime(2024, 5, 2, 8), datetime(2024, 5, 3, 9), late_april]
+    april = [datetime(2024, 4, 10, 7), late_april]
+    index_root = tmp_path / "fingerprints"
+    may_file = _write(
+        tmp_path / "green_tripdata_2024-05.parquet", _trips(may, [5.0, 5.0, 7.0, 9.0])
+    )
+    april_file = _write(tmp_path / "green_tripdata_2024-04.parquet", _trips(april, [3.0, 9.0]))
+
+    first = dedup_file(may_file, FingerprintIndex(index_root), 202405, batch_size=3)
+    # Chargement de mai réussi ; nouvelle instance : l'index est relu depuis le disque.
+    FingerprintIndex(index_root).commit(202405, may_file.name)
+    second = dedup_file(april_file, FingerprintIndex(index_root), 202404)
+    again = dedup_file(may_file, FingerprintIndex(index_root), 202405)
+
+    assert (first["rows"], first["duplicates"], first["already_loaded"]) == (3, 1, 0)
+    assert pq.read_table(may_file).num_rows == 3
+    assert pq.ParquetFile(may_file).metadata.row_group(0).num_rows == 2
+    assert (second["rows"], second["already_loaded"]) == (1, 1)
+    assert pq.read_table(april_file).column("fare_amount").to_pylist() == [3.0]
+    assert (again["rows"], again["duplicates"], again["already_loaded"]) == (3, 0, 0)
+    assert sorted(p.name for p in index_root.glob("*.npz")) == [
+        "pickup_month=2024-04.npz",
+        "pickup_month=2024-05.npz",
+    ]
+    assert not list(tmp_path.glob("*.tmp"))
+    assert not list(index_root.glob("pending/*.tmp"))
+
+
+def test_reloaded_month_replaces_its_own_fingerprints(tmp_path):
+    index = FingerprintIndex(tmp_path / "fingerprints")
+    path = tmp_path / "green_tripdata_2024-05.parquet"
+    _write(path, _trips([datetime(2024, 5, 2, 8)], [5.0]))
+    dedup_file(path, index, 202405)
+    index.commit(202405)
+    # Mois republié : l'ancien trip n'est plus chargé par 2024-05, un autre mois peut le garder.
+    _write(path, _trips([datetime(2024, 5, 3, 8)], [6.0]))
+    dedup_file(path, index, 202405)
+    index.commit(202405)
+    june = _write(
+        tmp_path / "green_tripdata_2024-06.parquet", _trips([datetime(2024, 5, 2, 8)], [5.0])
+    )
+
+    assert dedup_file(june, index, 202406)["rows"] == 1
+
+
+def test_trips_count_as_loaded_only_once_committed(tmp_path):
+    index_root = tmp_path / "fingerprints"
+    trip = [datetime(2024, 5, 2, 8)]
+    may = _write(tmp_path / "green_tripdata_2024-05.parquet", _trips(trip, [5.0]))
+    june = _write(tmp_path / "green_tripdata_2024-06.parquet", _trips(trip, [5.0]))
+
+    dedup_file(may, FingerprintIndex(index_root), 202405)
+    # Chargement de mai en échec : juin garde le trip.
+    assert dedup_file(june, FingerprintIndex(index_root), 202406)["rows"] == 1
+    assert not list(index_root.glob("*.npz"))
+
+    index = FingerprintIndex(index_root)
+    assert index.commit(202406) == {"source": 202406, "rows": 1, "overlap": 0}
+    assert index.commit(202405) == {"source": 202405, "rows": 1, "overlap": 1}
+    assert index.commit(202405)["rows"] == 0
+    # Chaque mois écrit est libéré : rien ne reste en mémoire entre deux commits.
+    assert index._months == {}
+    assert not (index_root / "pending").exists() or not any((index_root / "pending").iterdir())
+
+
+def test_spilled_dedup_keeps_the_first_of_each_trip(tmp_path):
+    pickups = [datetime(2024, 5, 1) + timedelta(minutes=i % 50) for i in range(200)]
+    path = _write(tmp_path / "green_tripdata_2024-05.parquet", _trips(pickups, [1.0] * 200))
+
+    report = dedup_file(path, FingerprintIndex(tmp_path / "fp"), 202405, batch_size=16, buckets=4)
+
+    assert (report["rows"], report["duplicates"]) == (50, 150)
+    assert pq.read_table(path).column("lpep_pickup_datetime").to_pylist() == pickups[:50]
+
+
+def test_resumed_normalize_still_deduplicates(tmp_path):
+    from de_pipeline.ingestion.normalize import normalize_parquet
+    from de_pipeline.orchestration.context import PipelineContext
+    from de_pipeline.orchestration.pipeline import normalize_trips
+
+    ctx = PipelineContext(
+        dataset_cfg={
+            "raw_conventions": {"local_prefix": "green_taxi", "partition_key": "ingestion_date"}
+        },
+        runtime_cfg={
+            "runtime": {
+                "local_raw_dir": str(tmp_path / "raw"),
+                "ingestion_date_format": "%Y-%m-%d",
+                "normalize": {"enabled": True},
+                "dedup": {"enabled": True, "dir": str(tmp_path / "fingerprints")},
+            }
+        },
+    )
+    ctx.partition_dir.mkdir(parents=True)
+    trips = [datetime(2024, 5, 2, 8)] * 3
+    path = _write(ctx.partition_dir / "green_tripdata_2024-05.parquet", _trips(trips, [5.0] * 3))
+    # Arrêt du DAG entre la normalisation et la dédup.
+    normalize_parquet(path)
+
+    resumed = normalize_trips(ctx)
+    again = normalize_trips(ctx)
+
+    assert [r["rows"] for r in resumed["ok"]] == [1]
+    assert resumed["ok"][0]["dedup"]["duplicates"] == 2
+    assert FingerprintIndex(tmp_path / "fingerprints" / "green_taxi").recorded(202405)
+    assert again["ok"] == [] and again["skipped"] == ["green_tripdata_2024-05.parquet"]
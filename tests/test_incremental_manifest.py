@@ -0,0 +1,105 @@
+import requests
+
+from de_pipeline.common.manifest import JsonManifest
+from de_pipeline.ingestion.batch import DownloadJob, download_many
+from de_pipeline.ingestion.incremental import is_unchanged
+
+
+class FakeResponse:
+    def __init__(self, body, headers, status_code=200):
+        self._body = body
+        self.headers = headers
+        self.status_code = status_code
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code}", response=self)
+
+    def iter_content(self, chunk_size=1):
+        yield self._body
+
+
+class FakeCDN:
+    def __init__(self, objects):
+        self.objects = objects  # url -> (body, etag)
+        self.gets = []
+
+    def _headers(self, url):
+        body, etag = self.objects[url]
+        return {"ETag": etag, "Content-Length": str(len(body))}
+
+    def head(self, url, timeout=60, allow_redirects=True):
+        return FakeResponse(b"", self._headers(url))
+
+    def get(self, url, stream=True, timeout=60, headers=None):
+        self.gets.append(url)
+        return FakeResponse(self.objects[url][0], self._headers(url))
+
+
+def _jobs(root, ingestion_date):
+    return [
+        DownloadJob(
+            url=f"http://cdn/{m}.parquet",
+            dest_path=root / f"ingestion_date={ingestion_date}" / f"{m}.parquet",
+            label=m,
+        )
+        for m in ("2024-04", "2024-05")
+    ]
+
+
+def test_second_run_only_fetches_changed_months(tmp_path):
+    cdn = FakeCDN(
+        {
+            "http://cdn/2024-04.parquet": (b"april", '"e1"'),
+            "http://cdn/2024-05.parquet": (b"may", '"e2"'),
+        }
+    )
+    manifest_path = tmp_path / "_manifests" / "green_taxi.json"
+
+    first = download_many(
+        _jobs(tmp_path, "2024-06-01"), 2, 5, 1024, session=cdn, manifest=JsonManifest(manifest_path)
+    )
+    assert len(first["ok"]) == 2
+    entry = JsonManifest(manifest_path).get("2024-05.parquet")
+    assert entry["etag"] == '"e2"'
+    assert entry["bytes"] == 3
+
+    cdn.gets.clear()
+    cdn.objects["http://cdn/2024-05.parquet"] = (b"may v2", '"e3"')
+    second = download_many(
+        _jobs(tmp_path, "2024-06-02"), 2, 5, 1024, session=cdn, manifest=JsonManifest(manifest_path)
+    )
+
+    assert second["skipped"] == ["2024-04"]
+    assert [m["label"] for m in second["ok"]] == ["2024-05"]
+    assert cdn.gets == ["http://cdn/2024-05.parquet"]
+    assert JsonManifest(manifest_path).get("2024-05.parquet")["etag"] == '"e3"'
+
+
+def test_is_unchanged_requires_a_matching_validator():
+    entry = {"bytes": 10, "etag": '"a"', "last_modified": None}
+    assert is_unchanged(entry, {"bytes": 10, "etag": '"a"', "last_modified": None})
+    assert not is_unchanged(entry, {"bytes": 11, "etag": '"a"', "last_modified": None})
+    assert not is_unchanged(entry, {"bytes": 10, "etag": None, "last_modified": None})
+    assert not is_unchanged(entry, None)
+
+
+def test_concurrent_saves_keep_every_entry(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    manifest = JsonManifest(tmp_path / "m.json")
+
+    def record(i):
+        manifest.set(f"k{i}", {"i": i})
+        manifest.save()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(record, range(200)))
+
+    assert len(JsonManifest(tmp_path / "m.json").entries()) == 200
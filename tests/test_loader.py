@@ -0,0 +1,113 @@
+"""Tests pour le chargement BigQuery par mois (partition remplacée, idempotent)."""
+
+from __future__ import annotations
+
+import threading
+from types import SimpleNamespace
+
+from de_pipeline.common.manifest import JsonManifest
+from de_pipeline.common.schemas import GREEN_TRIPDATA_COLUMNS
+from de_pipeline.load.loader import MonthLoad, bigquery_schema, latest_month_objects, load_months
+
+
+class FakeLoadJob:
+    output_rows = 100
+    output_bytes = 2048
+
+    def result(self):
+        return self
+
+
+class FakeClient:
+    def __init__(self, fail_on=()):
+        self.jobs = []
+        self.fail_on = fail_on
+        self._lock = threading.Lock()
+
+    def load_table_from_uri(self, uri, destination, job_config=None):
+        with self._lock:
+            self.jobs.append((uri, destination, job_config))
+        if uri in self.fail_on:
+            raise RuntimeError("Provided Schema does not match")
+        return FakeLoadJob()
+
+
+def _blob(name, md5):
+    return SimpleNamespace(name=name, md5_hash=md5, crc32c=None)
+
+
+def test_latest_month_objects_keeps_the_newest_ingestion_date():
+    blobs = [
+        _blob("raw/g/ingestion_date=2024-06-01/green_tripdata_2024-04.parquet", "a"),
+        _blob("raw/g/ingestion_date=2024-06-02/green_tripdata_2024-04.parquet", "b"),
+        _blob("raw/g/ingestion_date=2024-06-01/green_tripdata_2024-05.parquet", "c"),
+        _blob("raw/g/ingestion_date=2024-06-02/green_tripdata_2024-05.parquet.part-000", "d"),
+        _blob("raw/g/ingestion_date=2024-06-02/taxi_zone_lookup.csv", "e"),
+    ]
+
+    loads = latest_month_objects(blobs, "bucket", name_prefix="green_tripdata_")
+
+    assert loads == [
+        MonthLoad(
+            2024,
+            4,
+            "gs://bucket/raw/g/ingestion_date=2024-06-02/green_tripdata_2024-04.parquet",
+            "b",
+        ),
+        MonthLoad(
+            2024,
+            5,
+            "gs://bucket/raw/g/ingestion_date=2024-06-01/green_tripdata_2024-05.parquet",
+            "c",
+        ),
+    ]
+
+
+def test_one_truncating_job_per_month_partition_with_pinned_schema(tmp_path):
+    client = FakeClient()
+    schema = bigquery_schema(GREEN_TRIPDATA_COLUMNS)
+    loads = [
+        MonthLoad(2024, 4, "gs://b/04.parquet", "x"),
+        MonthLoad(2024, 5, "gs://b/05.parquet", "y"),
+    ]
+
+    summary = load_months(client, "p.raw.green", loads, schema, max_workers=2)
+
+    destinations = sorted(dest for _, dest, _ in client.jobs)
+    assert destinations == ["p.raw.green$202404", "p.raw.green$202405"]
+    job_config = client.jobs[0][2]
+    assert job_config.write_disposition == "WRITE_TRUNCATE"
+    assert not job_config.autodetect
+    assert [f.name for f in job_config.schema][:3] == [
+        "VendorID",
+        "lpep_pickup_datetime",
+        "lpep_dropoff_datetime",
+    ]
+    assert [r["partition"] for r in summary["loaded"]] == ["202404", "202405"]
+
+
+def test_rerun_is_a_no_op_and_failures_are_retried(tmp_path):
+    ledger_path = tmp_path / "bigquery_loads.json"
+    loads = [
+        MonthLoad(2024, 4, "gs://b/04.parquet", "x"),
+        MonthLoad(2024, 5, "gs://b/05.parquet", "y"),
+    ]
+
+    first = load_months(
+        FakeClient(fail_on={"gs://b/05.parquet"}),
+        "p.raw.green",
+        loads,
+        [],
+        ledger=JsonManifest(ledger_path),
+    )
+    assert [f["partition"] for f in first["failed"]] == ["202405"]
+
+    client = FakeClient()
+    second = load_months(client, "p.raw.green", loads, [], ledger=JsonManifest(ledger_path))
+    assert second["skipped"] == ["202404"]
+    assert [uri for uri, _, _ in client.jobs] == ["gs://b/05.parquet"]
+
+    client = FakeClient()
+    third = load_months(client, "p.raw.green", loads, [], ledger=JsonManifest(ledger_path))
+    assert third["skipped"] == ["202404", "202405"]
+    assert client.jobs == []
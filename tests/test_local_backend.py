@@ -0,0 +1,241 @@
+"""Tests pour le backend local : dossier bucket + DuckDB, pipeline complète hors ligne."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("duckdb")
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+from de_pipeline.dq.rules import load_rules  # noqa: E402
+from de_pipeline.dq.warehouse import check_table, compile_rules_sql  # noqa: E402
+from de_pipeline.load.loader import MonthLoad  # noqa: E402
+from de_pipeline.orchestration import pipeline  # noqa: E402
+from de_pipeline.orchestration.context import PipelineContext  # noqa: E402
+from de_pipeline.storage.backends import LocalObjectStore  # noqa: E402
+from de_pipeline.storage.uploader import UploadJob  # noqa: E402
+from de_pipeline.transform.fact import create_fact_sql, refresh_fact_green_tripdata  # noqa: E402
+from de_pipeline.warehouse.dialect import DUCKDB  # noqa: E402
+from de_pipeline.warehouse.local import LocalWarehouse  # noqa: E402
+
+DQ_CFG = {
+    "tables": {
+        "green_tripdata_raw": {
+            "dataset": "raw",
+            "rules": [
+                {"type": "row_count", "name": "has_data", "min": 1},
+                {"type": "range", "column": "trip_distance", "min": 0, "min_inclusive": False},
+                {"type": "duplicates", "name": "no_duplicates"},
+            ],
+        },
+        "fact_green_tripdata": {
+            "dataset": "curated",
+            "rules": [
+                {"type": "row_count", "name": "has_data", "min": 1},
+                {"type": "duplicates", "name": "no_duplicates", "columns": ["trip_id"]},
+            ],
+        },
+        "dim_location": {
+            "dataset": "curated",
+            "rules": [{"type": "not_null", "name": "no_null_keys", "columns": ["LocationID"]}],
+        },
+    }
+}
+
+
+def _write_month(path, year, month, rows=3, duplicate_last=False):
+    pickups = [datetime(year, month, 1 + i, 8) for i in range(rows)]
+    table = pa.table(
+        {
+            "VendorID": [2] * rows,
+            "lpep_pickup_datetime": pickups,
+            "lpep_dropoff_datetime": [p.replace(hour=9) for p in pickups],
+            "PULocationID": list(range(1, rows + 1)),
+            "DOLocationID": [2] * rows,
+            "trip_distance": [1.5] * rows,
+            "fare_amount": [10.0] * rows,
+        }
+    )
+    if duplicate_last:
+        table = pa.concat_tables([table, table.slice(rows - 1)])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pq.write_table(table, path)
+
+
+def test_local_store_publishes_and_lists_objects(tmp_path):
+    src = tmp_path / "src.parquet"
+    src.write_bytes(b"data")
+    store = LocalObjectStore(tmp_path / "bucket")
+
+    summary = store.upload_files([UploadJob(src, "raw/g/ingestion_date=2024-06-01/x.parquet")])
+    (obj,) = list(store.list_objects("raw/"))
+
+    assert summary["ok"] == ["raw/g/ingestion_date=2024-06-01/x.parquet"]
+    assert obj.name == "raw/g/ingestion_date=2024-06-01/x.parquet"
+    assert obj.md5_hash == "8d777f385d3dfec8815d20f7496026dc"
+    assert store.uri(obj.name) == (tmp_path / "bucket" / obj.name).as_posix()
+
+
+def test_local_store_skips_identical_objects(tmp_path):
+    from de_pipeline.common.checksums import ChecksumIndex
+    from de_pipeline.common.manifest import JsonManifest
+
+    src = tmp_path / "src.parquet"
+    src.write_bytes(b"data")
+    copy = tmp_path / "copy.parquet"
+    copy.write_bytes(b"data")
+    store = LocalObjectStore(tmp_path / "bucket")
+    checksums = ChecksumIndex(JsonManifest(tmp_path / "checksums.json"))
+    name = "raw/g/ingestion_date=2024-06-01/x.parquet"
+
+    first = store.upload_files([UploadJob(src, name)], checksums=checksums)
+    again = store.upload_files([UploadJob(copy, name)], checksums=checksums)
+    copy.write_bytes(b"DATA")
+    changed = store.upload_files([UploadJob(copy, name)], checksums=checksums)
+
+    assert first["ok"] == [name] and first["skipped"] == []
+    assert again["skipped"] == [name] and again["bytes"] == 0
+    assert changed["ok"] == [name]
+    assert (tmp_path / "bucket" / name).read_bytes() == b"DATA"
+
+
+def test_incomplete_warehouse_backend_fails_when_instantiated():
+    from de_pipeline.warehouse.base import Warehouse
+
+    class NoQueries(Warehouse):
+        def ensure_dataset(self, dataset_id):
+            pass
+
+    with pytest.raises(TypeError, match="abstract"):
+        NoQueries()
+
+
+def test_duckdb_dialect_compiles_portable_sql():
+    rules = load_rules([{"type": "duplicates", "columns": ["a"]}])
+    sql = compile_rules_sql("p.raw.trips", rules, DUCKDB)
+
+    assert 'FROM "raw"."trips" AS t' in sql
+    assert "COUNT(DISTINCT hash(struct_pack(t.a)))" in sql
+    ddl = create_fact_sql("p.cur.fact", "p.raw.trips", dialect=DUCKDB)
+    assert "PARTITION BY DATE" not in ddl and "md5(to_json(struct_pack(VendorID" in ddl
+
+
+def test_month_reload_replaces_partition_and_fills_missing_columns(tmp_path):
+    from de_pipeline.common.schemas import GREEN_TRIPDATA_COLUMNS
+
+    wh = LocalWarehouse(tmp_path / "wh")
+    wh.ensure_dataset("raw")
+    wh.ensure_month_partitioned_table("p.raw.trips", GREEN_TRIPDATA_COLUMNS)
+    src = tmp_path / "green_tripdata_2024-04.parquet"
+    _write_month(src, 2024, 4)
+
+    for _ in range(2):
+        report = wh.load_month("p.raw.trips", MonthLoad(2024, 4, str(src)), GREEN_TRIPDATA_COLUMNS)
+    row, _ = wh.fetch_one(
+        'SELECT COUNT(*) AS n, COUNT(cbd_congestion_fee) AS cbd FROM "raw"."trips"'
+    )
+
+    assert report["rows"] == 3
+    assert row == {"n": 3, "cbd": 0}
+
+
+def test_fact_trip_id_is_the_normalize_fingerprint(tmp_path):
+    from de_pipeline.common.schemas import GREEN_TRIPDATA_COLUMNS
+    from de_pipeline.common.services import GREEN
+    from de_pipeline.ingestion.normalize import normalize_parquet
+
+    wh = LocalWarehouse(tmp_path / "wh")
+    for dataset in ("raw", "cur"):
+        wh.ensure_dataset(dataset)
+    # Avril chargé avant la colonne trip_id, mai normalisé.
+    wh.ensure_month_partitioned_table("p.raw.green_tripdata_raw", GREEN_TRIPDATA_COLUMNS)
+    old = tmp_path / "green_tripdata_2024-04.parquet"
+    _write_month(old, 2024, 4)
+    wh.load_month("p.raw.green_tripdata_raw", MonthLoad(2024, 4, str(old)), GREEN_TRIPDATA_COLUMNS)
+    src = tmp_path / "green_tripdata_2024-05.parquet"
+    _write_month(src, 2024, 5)
+    normalize_parquet(src)
+    wh.ensure_month_partitioned_table("p.raw.green_tripdata_raw", GREEN.raw_columns)
+    wh.load_month("p.raw.green_tripdata_raw", MonthLoad(2024, 5, str(src)), GREEN.raw_columns)
+
+    refresh_fact_green_tripdata(wh, "p", "raw", "cur", [(2024, 4), (2024, 5)])
+    rows, _ = wh.fetch_all(
+        'SELECT MONTH(pickup_datetime) AS m, trip_id FROM "cur"."fact_green_tripdata"'
+    )
+    ids = {m: sorted(r["trip_id"] for r in rows if r["m"] == m) for m in (4, 5)}
+
+    expected = pq.read_table(src, columns=["trip_id"]).column("trip_id").to_pylist()
+    assert ids[5] == sorted(str(i) for i in expected)
+    # Sans trip_id (non normalisé) : hash md5 de la ligne.
+    assert len(ids[4]) == 3 and all(len(i) == 32 for i in ids[4])
+
+
+def test_incremental_refresh_and_dq_run_on_duckdb(tmp_path):
+    from de_pipeline.common.services import GREEN
+
+    wh = LocalWarehouse(tmp_path / "wh")
+    for dataset in ("raw", "cur"):
+        wh.ensure_dataset(dataset)
+    wh.ensure_month_partitioned_table("p.raw.green_tripdata_raw", GREEN.raw_columns)
+    for month in (4, 5):
+        src = tmp_path / f"green_tripdata_2024-0{month}.parquet"
+        _write_month(src, 2024, month, duplicate_last=True)
+        wh.load_month(
+            "p.raw.green_tripdata_raw", MonthLoad(2024, month, str(src)), GREEN.raw_columns
+        )
+
+    refresh_fact_green_tripdata(wh, "p", "raw", "cur", [(2024, 4)])
+    refresh_fact_green_tripdata(wh, "p", "raw", "cur", [(2024, 4), (2024, 5)])
+    rules = load_rules(DQ_CFG["tables"]["fact_green_tripdata"]["rules"])
+    report = check_table(wh, "p.cur.fact_green_tripdata", rules)
+    raw = check_table(
+        wh, "p.raw.green_tripdata_raw", load_rules(DQ_CFG["tables"]["green_tripdata_raw"]["rules"])
+    )
+
+    assert report["rows"] == 6 and report["passed"]
+    assert raw["rows"] == 8
+    assert {r["rule"]: r["failed_rows"] for r in raw["results"]}["no_duplicates"] == 2
+
+
+def test_pipeline_stages_run_offline_end_to_end(tmp_path, monkeypatch):
+    for name in ("GCP_PROJECT_ID", "GCS_RAW_BUCKET", "BQ_DATASET_RAW", "BQ_DATASET_CURATED"):
+        monkeypatch.delenv(name, raising=False)
+    config = tmp_path / "config"
+    config.mkdir()
+    (config / "dataset.yml").write_text(
+        "dataset: {default_range: {months_back: 2}}\n"
+        "raw_conventions: {local_prefix: green_taxi, gcs_prefix: raw/green_taxi,"
+        " partition_key: ingestion_date}\n"
+    )
+    (config / "runtime.yml").write_text(
+        "runtime:\n"
+        f"  local_raw_dir: {tmp_path / 'raw'}\n"
+        "  ingestion_date_format: '%Y-%m-%d'\n"
+        "  transform: {mode: full}\n"
+        f"  local: {{bucket_dir: {tmp_path / 'bucket'}, warehouse_dir: {tmp_path / 'wh'}}}\n"
+    )
+    ctx = PipelineContext.from_config(config, backend="local")
+    ctx.dq_cfg = DQ_CFG
+    for month in (4, 5):
+        _write_month(ctx.partition_dir / f"green_tripdata_2024-0{month}.parquet", 2024, month)
+    (ctx.partition_dir / "taxi_zone_lookup.csv").write_text(
+        '"LocationID","Borough","Zone","service_zone"\n1,"EWR","Newark Airport","EWR"\n'
+    )
+
+    pipeline.upload(ctx)
+    pipeline.ensure_datasets(ctx)
+    loaded = pipeline.load_trips(ctx)
+    pipeline.load_zones(ctx)
+    pipeline.transform_fact(ctx)
+    pipeline.transform_dim_location(ctx)
+    stages = {s.name: s for s in pipeline.build_stages(ctx)}
+    reports = [stages[f"dq_{table}"].func(ctx) for table in DQ_CFG["tables"]]
+
+    assert (ctx.project_id, ctx.dataset_raw, ctx.dataset_curated) == ("local", "raw", "curated")
+    assert [r["partition"] for r in loaded["loaded"]] == ["202404", "202405"]
+    assert pipeline.load_trips(ctx)["skipped"] == ["202404", "202405"]
+    assert all(r["passed"] for r in reports)
+    assert ctx.metrics.report()["stages"]
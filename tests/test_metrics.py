@@ -0,0 +1,76 @@
+"""Tests pour les métriques de run (spans par étape/fichier, rapport JSON, Prometheus)."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from de_pipeline.common.metrics import RunMetrics, prometheus_text
+from de_pipeline.orchestration.dag import Stage, run_dag
+
+
+def test_stage_totals_include_files_and_bigquery_bytes():
+    metrics = RunMetrics("run-1")
+    with metrics.stage("download_trips"):
+        metrics.file("download_trips", "green_tripdata_2024-04.parquet", wall_sec=1.5, bytes=100)
+        metrics.file(
+            "download_trips", "green_tripdata_2024-05.parquet", wall_sec=2.0, bytes=50, retries=2
+        )
+    with metrics.stage("transform_fact"):
+        metrics.add("transform_fact", bq_bytes_processed=4096, bq_bytes_billed=10485760)
+
+    report = metrics.report()
+    stages = {s["stage"]: s for s in report["stages"]}
+
+    assert stages["download_trips"]["bytes"] == 150
+    assert stages["download_trips"]["retries"] == 2
+    assert [f["name"] for f in stages["download_trips"]["files"]] == [
+        "green_tripdata_2024-04.parquet",
+        "green_tripdata_2024-05.parquet",
+    ]
+    assert stages["transform_fact"]["bq_bytes_billed"] == 10485760
+    assert report["totals"]["bytes"] == 150
+    assert report["status"] == "ok"
+
+
+def test_unknown_counter_is_rejected():
+    with pytest.raises(ValueError):
+        RunMetrics("r").add("s", megabytes=1)
+
+
+def test_dag_spans_mark_failed_stages(tmp_path):
+    metrics = RunMetrics("run-2")
+
+    def load(ctx):
+        raise RuntimeError("quota exceeded")
+
+    run_dag(
+        [Stage("download", lambda ctx: None), Stage("load", load, ("download",))],
+        None,
+        metrics=metrics,
+    )
+    report = metrics.write_json(tmp_path / "run_report.json", blocked=[])
+
+    stages = {s["stage"]: s for s in report["stages"]}
+    assert stages["download"]["status"] == "ok"
+    assert stages["load"] == {**stages["load"], "status": "failed", "error": "quota exceeded"}
+    assert report["status"] == "failed"
+    assert json.loads((tmp_path / "run_report.json").read_text())["run_id"] == "run-2"
+
+
+def test_prometheus_textfile_has_stage_and_file_series(tmp_path):
+    metrics = RunMetrics("run-3")
+    with metrics.stage("upload"):
+        metrics.file("upload", 'raw/"odd".parquet', wall_sec=0.5, bytes=10)
+
+    text = prometheus_text(metrics.report())
+    metrics.write_prometheus(tmp_path / "de_pipeline.prom")
+
+    assert "# TYPE de_pipeline_stage_duration_seconds gauge" in text
+    assert 'de_pipeline_stage_bytes{stage="upload"} 10' in text
+    assert 'de_pipeline_file_bytes{stage="upload",file="raw/\\"odd\\".parquet"} 10' in text
+    assert "de_pipeline_run_success 1" in text
+    assert (
+        'de_pipeline_stage_bytes{stage="upload"} 10' in (tmp_path / "de_pipeline.prom").read_text()
+    )
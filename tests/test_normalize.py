@@ -0,0 +1,95 @@
+"""Tests pour la normalisation des parquet raw : schéma canonique, tri par pickup, zstd."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from de_pipeline.common.schemas import GREEN_TRIPDATA_COLUMNS
+from de_pipeline.ingestion.fingerprint import trip_fingerprints, trip_ids
+from de_pipeline.ingestion.normalize import is_normalized, normalize_parquet, normalized_schema
+
+
+def _drifted_month(path, rows):
+    # Types d'un fichier ancien : ids en double, ehail_fee de type null, timestamps en ns.
+    start = datetime(2024, 5, 1)
+    pickups = [start + timedelta(minutes=(i * 7919) % rows) for i in range(rows)]
+    pickups[3] = None
+    table = pa.table(
+        {
+            "VendorID": pa.array([2.0] * rows),
+            "lpep_pickup_datetime": pa.array(pickups, pa.timestamp("ns")),
+            "passenger_count": pa.array([1] * rows, pa.int64()),
+            "ehail_fee": pa.nulls(rows),
+            "trip_distance": pa.array([float(i) for i in range(rows)]),
+            "legacy_column": pa.array(["x"] * rows),
+        }
+    )
+    pq.write_table(table, path, row_group_size=7)
+    return table
+
+
+@pytest.mark.parametrize("sort_run_rows", [1_000, 9])
+def test_rewrites_to_canonical_schema_sorted_by_pickup(tmp_path, sort_run_rows):
+    src = tmp_path / "green_tripdata_2024-05.parquet"
+    original = _drifted_month(src, rows=40)
+
+    report = normalize_parquet(src, row_group_size=16, sort_run_rows=sort_run_rows, batch_size=5)
+
+    table = pq.read_table(src)
+    pickups = table.column("lpep_pickup_datetime").to_pylist()
+    meta = pq.ParquetFile(src).metadata
+    assert is_normalized(src)
+    assert table.schema.equals(normalized_schema(GREEN_TRIPDATA_COLUMNS))
+    assert (report["rows"], report["row_groups"], meta.num_row_groups) == (40, 3, 3)
+    assert meta.row_group(0).column(0).compression == "ZSTD"
+    assert pickups[-1] is None and pickups[:-1] == sorted(pickups[:-1])
+    assert sorted(table.column("trip_distance").to_pylist()) == sorted(
+        original.column("trip_distance").to_pylist()
+    )
+    assert table.column("cbd_congestion_fee").null_count == 40
+    assert str(table.column("VendorID").type) == "int64"
+    # trip_id = empreinte de la ligne canonique (même définition que la dédup).
+    batch = table.combine_chunks().to_batches()[0]
+    expected = trip_ids(trip_fingerprints(batch, GREEN_TRIPDATA_COLUMNS))
+    assert table.column("trip_id").to_pylist() == expected.tolist()
+
+
+def test_fractional_ids_fail_instead_of_being_truncated(tmp_path):
+    src = tmp_path / "bad.parquet"
+    pq.write_table(pa.table({"VendorID": [1.5]}), src)
+
+    with pytest.raises(pa.ArrowInvalid):
+        normalize_parquet(src)
+
+    assert pq.read_table(src).column("VendorID").to_pylist() == [1.5]
+    assert [p.name for p in tmp_path.iterdir()] == ["bad.parquet"]
+
+
+def test_stage_normalizes_partition_once(tmp_path):
+    from de_pipeline.orchestration.context import PipelineContext
+    from de_pipeline.orchestration.pipeline import normalize_trips
+
+    ctx = PipelineContext(
+        dataset_cfg={
+            "raw_conventions": {"local_prefix": "green_taxi", "partition_key": "ingestion_date"}
+        },
+        runtime_cfg={
+            "runtime": {
+                "local_raw_dir": str(tmp_path),
+                "ingestion_date_format": "%Y-%m-%d",
+                "normalize": {"enabled": True, "row_group_size": 8},
+            }
+        },
+    )
+    ctx.partition_dir.mkdir(parents=True)
+    _drifted_month(ctx.partition_dir / "green_tripdata_2024-05.parquet", rows=20)
+
+    first = normalize_trips(ctx)
+    again = normalize_trips(ctx)
+
+    assert [r["rows"] for r in first["ok"]] == [20]
+    assert again["ok"] == [] and again["skipped"] == ["green_tripdata_2024-05.parquet"]
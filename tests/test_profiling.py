@@ -0,0 +1,79 @@
+"""Tests pour le mode profiling opt-in (cProfile + pic mémoire par étape)."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from de_pipeline.common.profiling import (
+    PROFILE_ENV,
+    disable_profiling,
+    enable_profiling,
+    profiled,
+    profiling_dir,
+)
+
+
+@pytest.fixture(autouse=True)
+def _reset_profiling(monkeypatch):
+    monkeypatch.delenv(PROFILE_ENV, raising=False)
+    disable_profiling()
+    yield
+    disable_profiling()
+
+
+@profiled()
+def allocate(n_bytes):
+    return len(bytearray(n_bytes))
+
+
+@profiled("outer_stage")
+def outer():
+    return allocate(1024)
+
+
+def _records(path):
+    return [json.loads(line) for line in (path / "profiles.jsonl").read_text().splitlines()]
+
+
+def test_off_by_default(tmp_path):
+    assert profiling_dir() is None
+    assert allocate(10) == 10
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_profile_and_peak_memory_are_written(tmp_path):
+    enable_profiling(tmp_path)
+
+    allocate(8 * 1024 * 1024)
+    allocate(16)
+
+    records = _records(tmp_path)
+    assert [r["name"] for r in records] == ["allocate", "allocate-2"]
+    assert records[0]["peak_memory_bytes"] >= 8 * 1024 * 1024
+    assert records[1]["peak_memory_bytes"] < 8 * 1024 * 1024
+    assert (tmp_path / "allocate.prof").exists()
+    assert "allocate" in (tmp_path / "allocate.txt").read_text()
+
+
+def test_nested_calls_belong_to_the_enclosing_profile(tmp_path):
+    enable_profiling(tmp_path)
+
+    outer()
+
+    assert [r["name"] for r in _records(tmp_path)] == ["outer_stage"]
+
+
+def test_env_var_enables_profiling_and_failures_are_recorded(tmp_path, monkeypatch):
+    monkeypatch.setenv(PROFILE_ENV, "1")
+    monkeypatch.setenv("DE_PIPELINE_PROFILE_DIR", str(tmp_path))
+
+    @profiled("boom")
+    def boom():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        boom()
+
+    assert _records(tmp_path)[0]["status"] == "failed"
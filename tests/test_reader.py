@@ -0,0 +1,94 @@
+"""Tests pour le lecteur de trips locaux (pyarrow datasets, pushdown)."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from de_pipeline.ingestion.normalize import normalize_parquet
+from de_pipeline.ingestion.reader import (
+    iter_trip_batches,
+    latest_month_files,
+    read_trips,
+    trips_dataset,
+)
+
+
+def _month(path, year, month, rows, distance=1.0, vendor_type=None):
+    start = datetime(year, month, 1)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pq.write_table(
+        pa.table(
+            {
+                "VendorID": pa.array([2] * rows, vendor_type or pa.int32()),
+                "lpep_pickup_datetime": [start + timedelta(hours=i) for i in range(rows)],
+                "trip_distance": [distance] * rows,
+            }
+        ),
+        path,
+    )
+    return path
+
+
+def test_reads_latest_ingestion_of_requested_months(tmp_path):
+    root = tmp_path / "green_taxi"
+    _month(root / "ingestion_date=2024-06-01" / "green_tripdata_2024-04.parquet", 2024, 4, 3)
+    _month(
+        root / "ingestion_date=2024-06-02" / "green_tripdata_2024-04.parquet",
+        2024,
+        4,
+        5,
+        distance=2.0,
+        vendor_type=pa.float64(),
+    )
+    _month(root / "ingestion_date=2024-06-01" / "green_tripdata_2024-05.parquet", 2024, 5, 4)
+    (root / "ingestion_date=2024-06-02" / "taxi_zone_lookup.csv").write_text("x")
+
+    files = latest_month_files(root)
+    table = read_trips(root, months=["2024-04"], columns=["VendorID", "trip_distance"])
+    batches = list(
+        iter_trip_batches(
+            root,
+            columns=["lpep_pickup_datetime"],
+            filter=ds.field("lpep_pickup_datetime") >= datetime(2024, 5, 1, 2),
+            batch_size=2,
+        )
+    )
+
+    assert [p.parent.name for p in files.values()] == [
+        "ingestion_date=2024-06-02",
+        "ingestion_date=2024-06-01",
+    ]
+    assert table.num_rows == 5 and set(table.column("trip_distance").to_pylist()) == {2.0}
+    assert str(table.schema.field("VendorID").type) == "int64"
+    assert sum(b.num_rows for b in batches) == 2
+    assert all(b.schema.names == ["lpep_pickup_datetime"] for b in batches)
+
+
+def test_filter_skips_row_groups_by_statistics(tmp_path):
+    root = tmp_path / "green_taxi"
+    path = _month(
+        root / "ingestion_date=2024-06-01" / "green_tripdata_2024-04.parquet", 2024, 4, 40
+    )
+    normalize_parquet(path, row_group_size=10)
+    dataset = trips_dataset(root)
+    late = ds.field("lpep_pickup_datetime") >= datetime(2024, 4, 2, 8)
+
+    (fragment,) = dataset.get_fragments()
+    kept = fragment.split_by_row_group(filter=late, schema=dataset.schema)
+
+    assert len(kept) == 1
+    assert read_trips(root, filter=late).num_rows == 8
+
+
+def test_pickup_month_layout_prunes_partitions_and_quarantine(tmp_path):
+    root = tmp_path / "partitioned"
+    _month(root / "pickup_month=2024-04" / "green_tripdata_2024-05.parquet", 2024, 4, 1)
+    _month(root / "pickup_month=2024-05" / "green_tripdata_2024-05.parquet", 2024, 5, 6)
+    _month(root / "pickup_month=quarantine" / "green_tripdata_2024-05.parquet", 2008, 1, 2)
+
+    assert read_trips(root, layout="pickup_month").num_rows == 7
+    assert read_trips(root, months=[(2024, 4)], layout="pickup_month").num_rows == 1
@@ -0,0 +1,93 @@
+"""Tests pour le repartitionnement par mois de pickup et la quarantaine."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from de_pipeline.ingestion.repartition import repartition_file
+
+
+def _month_file(path, pickups, dropoffs=None):
+    dropoffs = dropoffs or [p + timedelta(minutes=10) if p else None for p in pickups]
+    table = pa.table(
+        {
+            "lpep_pickup_datetime": pa.array(pickups, pa.timestamp("us")),
+            "lpep_dropoff_datetime": pa.array(dropoffs, pa.timestamp("us")),
+            "fare_amount": [float(i) for i in range(len(pickups))],
+        }
+    )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pq.write_table(table, path)
+    return path
+
+
+def test_rows_go_to_their_pickup_month_or_quarantine(tmp_path):
+    may = datetime(2024, 5, 10, 8)
+    pickups = [may, may, datetime(2024, 4, 30, 23, 50), datetime(2008, 12, 31), None, may]
+    dropoffs = [None, may + timedelta(hours=1), datetime(2024, 5, 1, 0, 5), None, None, may]
+    dropoffs[5] = may - timedelta(hours=1)
+    src = _month_file(tmp_path / "raw" / "green_tripdata_2024-05.parquet", pickups, dropoffs)
+    out = tmp_path / "partitioned"
+
+    report = repartition_file(src, out, batch_size=4, now=datetime(2024, 6, 2))
+
+    assert report["partitions"] == {"2024-04": 1, "2024-05": 2}
+    assert report["quarantined"] == {
+        "dropoff_before_pickup": 1,
+        "null_pickup": 1,
+        "out_of_range": 1,
+    }
+    quarantine = pq.read_table(out / "pickup_month=quarantine" / src.name)
+    assert sorted(quarantine.column("quarantine_reason").to_pylist()) == sorted(
+        report["quarantined"]
+    )
+    assert pq.read_table(out / "pickup_month=2024-05" / src.name).num_rows == 2
+    assert not list(out.rglob("*.tmp"))
+
+
+def test_rerun_replaces_previous_outputs(tmp_path):
+    out = tmp_path / "partitioned"
+    src = tmp_path / "green_tripdata_2024-05.parquet"
+    _month_file(src, [datetime(2024, 5, 1), datetime(2024, 4, 30)])
+    repartition_file(src, out)
+    _month_file(src, [datetime(2024, 5, 1)])
+
+    report = repartition_file(src, out)
+
+    assert report["partitions"] == {"2024-05": 1}
+    assert sorted(p.name for p in out.iterdir()) == ["pickup_month=2024-05"]
+
+
+def test_stage_records_counts_and_skips_unchanged_files(tmp_path):
+    from de_pipeline.common.manifest import JsonManifest
+    from de_pipeline.orchestration.context import PipelineContext
+    from de_pipeline.orchestration.pipeline import repartition_trips
+
+    ctx = PipelineContext(
+        dataset_cfg={
+            "raw_conventions": {"local_prefix": "green_taxi", "partition_key": "ingestion_date"}
+        },
+        runtime_cfg={
+            "runtime": {
+                "local_raw_dir": str(tmp_path / "raw"),
+                "ingestion_date_format": "%Y-%m-%d",
+                "repartition": {"enabled": True, "dir": str(tmp_path / "partitioned")},
+            }
+        },
+    )
+    _month_file(ctx.partition_dir / "green_tripdata_2024-05.parquet", [datetime(2024, 5, 1), None])
+
+    first = repartition_trips(ctx)
+    again = repartition_trips(ctx)
+
+    counts = JsonManifest(ctx.manifests_dir / "repartition.json").get(
+        "green_tripdata_2024-05.parquet"
+    )
+    assert first["quarantined_rows"] == 1
+    assert counts["partitions"] == {"2024-05": 1} and counts["quarantined"] == {"null_pickup": 1}
+    assert again["skipped"] == ["green_tripdata_2024-05.parquet"]
+    assert (tmp_path / "partitioned" / "green_taxi" / "pickup_month=2024-05").is_dir()
+    assert ctx.metrics.report()["totals"]["quarantined_rows"] == 1
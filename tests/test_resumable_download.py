@@ -0,0 +1,177 @@
+import hashlib
+import json
+import threading
+
+import pytest
+import requests
+
+from de_pipeline.ingestion.downloader import download_file, download_file_split
+
+BODY = bytes(range(256)) * 40  # 10 KB
+
+
+class RangeResponse:
+    def __init__(self, body, status_code=200, headers=None, fail_after=None):
+        self._body = body
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._fail_after = fail_after
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code}", response=self)
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self._body), chunk_size):
+            if self._fail_after is not None and i >= self._fail_after:
+                raise requests.exceptions.ChunkedEncodingError("connection dropped")
+            yield self._body[i : i + chunk_size]
+
+
+class RangeServer:
+    """
+    Fake session honouring Range and If-Range headers; the first `drops` GETs die after
+    `fail_after` bytes.
+    """
+
+    def __init__(self, body, drops=0, fail_after=None, honour_ranges=True, etag='"v1"'):
+        self.body = body
+        self.drops = drops
+        self.fail_after = fail_after
+        self.honour_ranges = honour_ranges
+        self.etag = etag
+        self.ranges = []
+        self.if_ranges = []
+        self._lock = threading.Lock()
+
+    def head(self, url, timeout=60, allow_redirects=True):
+        headers = {"Content-Length": str(len(self.body)), "Accept-Ranges": "bytes"}
+        return RangeResponse(b"", headers=headers)
+
+    def get(self, url, stream=True, timeout=60, headers=None):
+        with self._lock:
+            byte_range = (headers or {}).get("Range")
+            if_range = (headers or {}).get("If-Range")
+            self.ranges.append(byte_range)
+            self.if_ranges.append(if_range)
+            fail_after = None
+            if self.drops:
+                self.drops -= 1
+                fail_after = self.fail_after
+        etag = {"ETag": self.etag}
+        # If-Range d'une autre version : le serveur renvoie tout le nouvel objet (200).
+        if not byte_range or not self.honour_ranges or (if_range and if_range != self.etag):
+            return RangeResponse(self.body, headers=etag, fail_after=fail_after)
+        start, _, end = byte_range.removeprefix("bytes=").partition("-")
+        end = int(end) if end else len(self.body) - 1
+        return RangeResponse(
+            self.body[int(start) : end + 1], status_code=206, headers=etag, fail_after=fail_after
+        )
+
+
+def test_download_resumes_after_dropped_connection(tmp_path):
+    server = RangeServer(BODY, drops=1, fail_after=4096)
+    dest = tmp_path / "out.parquet"
+
+    meta = download_file("http://x/f", dest, timeout_sec=5, chunk_size=1024, session=server)
+
+    assert server.ranges == [None, "bytes=4096-"]
+    assert dest.read_bytes() == BODY
+    assert meta["bytes"] == len(BODY)
+    assert meta["md5"] == hashlib.md5(BODY).hexdigest()
+    assert not (tmp_path / "out.parquet.part").exists()
+
+
+def test_download_continues_leftover_part_file(tmp_path):
+    dest = tmp_path / "out.parquet"
+    (tmp_path / "out.parquet.part").write_bytes(BODY[:3000])
+    (tmp_path / "out.parquet.part.json").write_text(json.dumps({"etag": '"v1"'}))
+    server = RangeServer(BODY)
+
+    meta = download_file("http://x/f", dest, timeout_sec=5, chunk_size=1024, session=server)
+
+    assert server.ranges == ["bytes=3000-"] and server.if_ranges == ['"v1"']
+    assert dest.read_bytes() == BODY
+    assert meta["md5"] == hashlib.md5(BODY).hexdigest()
+    assert not (tmp_path / "out.parquet.part.json").exists()
+
+
+def test_leftover_part_without_validator_is_discarded(tmp_path):
+    dest = tmp_path / "out.parquet"
+    (tmp_path / "out.parquet.part").write_bytes(b"bytes of an unknown version")
+    server = RangeServer(BODY)
+
+    meta = download_file("http://x/f", dest, timeout_sec=5, chunk_size=1024, session=server)
+
+    assert server.ranges == [None]
+    assert dest.read_bytes() == BODY and meta["md5"] == hashlib.md5(BODY).hexdigest()
+
+
+def test_object_changed_between_processes_restarts_download(tmp_path):
+    dest = tmp_path / "out.parquet"
+    server = RangeServer(BODY, drops=1, fail_after=4096)
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        download_file(
+            "http://x/f", dest, timeout_sec=5, chunk_size=1024, session=server, max_resumes=0
+        )
+    # L'objet est republié avant la reprise (nouveau processus) : .part de l'ancienne version.
+    new_body = bytes(reversed(BODY))
+    server.body, server.etag = new_body, '"v2"'
+
+    meta = download_file("http://x/f", dest, timeout_sec=5, chunk_size=1024, session=server)
+
+    assert server.ranges[-1] == "bytes=4096-" and server.if_ranges[-1] == '"v1"'
+    assert dest.read_bytes() == new_body
+    assert meta["md5"] == hashlib.md5(new_body).hexdigest() and meta["etag"] == '"v2"'
+
+
+def test_download_restarts_when_range_ignored(tmp_path):
+    dest = tmp_path / "out.parquet"
+    (tmp_path / "out.parquet.part").write_bytes(b"stale bytes")
+    (tmp_path / "out.parquet.part.json").write_text(json.dumps({"etag": '"v1"'}))
+    server = RangeServer(BODY, honour_ranges=False)
+
+    meta = download_file("http://x/f", dest, timeout_sec=5, chunk_size=1024, session=server)
+
+    assert dest.read_bytes() == BODY
+    assert meta["bytes"] == len(BODY)
+    assert meta["md5"] == hashlib.md5(BODY).hexdigest()
+
+
+def test_split_download_reassembles_ranges(tmp_path):
+    server = RangeServer(BODY, drops=1, fail_after=512)
+    dest = tmp_path / "out.parquet"
+
+    meta = download_file_split(
+        "http://x/f", dest, timeout_sec=5, chunk_size=256, parts=4, session=server
+    )
+
+    assert len([r for r in server.ranges if r]) == 5  # 4 ranges + 1 resumed
+    assert dest.read_bytes() == BODY
+    assert meta["bytes"] == len(BODY)
+    assert meta["md5"] == hashlib.md5(BODY).hexdigest()
+    assert not (tmp_path / "out.parquet.split").exists()
+
+
+def test_split_download_falls_back_for_small_files(tmp_path):
+    server = RangeServer(BODY)
+    dest = tmp_path / "out.parquet"
+
+    meta = download_file_split(
+        "http://x/f",
+        dest,
+        timeout_sec=5,
+        chunk_size=256,
+        parts=4,
+        session=server,
+        min_bytes=1 << 20,
+    )
+
+    assert server.ranges == [None]
+    assert meta["md5"] == hashlib.md5(BODY).hexdigest()
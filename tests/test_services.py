@@ -0,0 +1,72 @@
+"""Tests pour les services TLC (green, yellow, FHV, HVFHV) : chemins, URLs, SQL des faits."""
+
+from __future__ import annotations
+
+import pytest
+
+from de_pipeline.common.services import FHV, FHVHV, GREEN, YELLOW, get_service, service_of_table
+from de_pipeline.ingestion.source import TLCSources
+from de_pipeline.orchestration.context import PipelineContext
+from de_pipeline.transform.fact import fact_select_sql
+
+
+def _ctx(tmp_path, services=None):
+    return PipelineContext(
+        dataset_cfg={
+            "dataset": {"services": services},
+            "raw_conventions": {
+                "local_prefix": "green_taxi",
+                "gcs_prefix": "raw/green_taxi",
+                "partition_key": "ingestion_date",
+            },
+        },
+        runtime_cfg={
+            "runtime": {"local_raw_dir": str(tmp_path), "ingestion_date_format": "%Y-%m-%d"}
+        },
+    )
+
+
+def test_registry_names_files_and_tables():
+    assert get_service("fhvhv") is FHVHV
+    assert YELLOW.file_name(2024, 5) == "yellow_tripdata_2024-05.parquet"
+    assert (FHV.raw_table, FHV.fact_table) == ("fhv_tripdata_raw", "fact_fhv_tripdata")
+    assert service_of_table("fact_green_tripdata") is GREEN
+    assert service_of_table("taxi_zone_lookup") is None
+    with pytest.raises(ValueError, match="Unknown TLC service"):
+        get_service("limousine")
+
+
+def test_trip_url_fills_service():
+    source = TLCSources(
+        base_url="https://example.com/",
+        trips_path_template="trip-data/{service}_tripdata_{yyyy}-{mm}.parquet",
+        zones_path="misc/zones.csv",
+    )
+
+    assert source.trip_url(2024, 5, "fhvhv") == (
+        "https://example.com/trip-data/fhvhv_tripdata_2024-05.parquet"
+    )
+    assert source.trip_url(2024, 5).endswith("/green_tripdata_2024-05.parquet")
+
+
+def test_context_places_services_side_by_side(tmp_path):
+    ctx = _ctx(tmp_path, ["green", "yellow"])
+
+    assert [s.name for s in ctx.services] == ["green", "yellow"]
+    assert ctx.service_dir(GREEN) == ctx.partition_dir
+    assert ctx.service_dir(YELLOW) == tmp_path / "yellow_taxi" / ctx.partition
+    assert ctx.service_gcs_prefix(YELLOW) == "raw/yellow_taxi"
+    assert ctx.download_manifest_path(YELLOW).name == "yellow_taxi.json"
+    assert [s.name for s in _ctx(tmp_path).services] == ["green"]
+
+
+def test_fact_sql_uses_service_columns_and_filters():
+    yellow = fact_select_sql("p.raw.yellow_tripdata_raw", service=YELLOW)
+    fhvhv = fact_select_sql("p.raw.fhvhv_tripdata_raw", service=FHVHV)
+    fhv = fact_select_sql("p.raw.fhv_tripdata_raw", service=FHV)
+
+    assert "tpep_pickup_datetime AS pickup_datetime" in yellow
+    assert "tpep_pickup_datetime IS NOT NULL" in yellow and "fare_amount > 0" in yellow
+    assert "trip_miles > 0" in fhvhv and "base_passenger_fare > 0" in fhvhv
+    assert "PUlocationID AS PULocationID" in fhv
+    assert "dropOff_datetime IS NOT NULL" in fhv and "fare_amount" not in fhv
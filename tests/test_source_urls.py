@@ -2,7 +2,7 @@ from datetime import date
 
 import pytest
 
-from de_pipeline.ingestion.source import TLCSources, month_start_n_months_back
+from de_pipeline.ingestion.source import TLCSources, month_start_n_months_back, parse_month_range
 
 
 def test_trip_url_format():
@@ -25,3 +25,13 @@ def test_months_back():
 def test_months_back_invalid():
     with pytest.raises(ValueError):
         month_start_n_months_back(date(2024, 1, 1), 0)
+
+
+def test_parse_month_range():
+    assert parse_month_range("2023-11..2024-02") == [(2023, 11), (2023, 12), (2024, 1), (2024, 2)]
+    assert parse_month_range("2024-05") == [(2024, 5)]
+    assert parse_month_range("2023-12..now", today=date(2024, 2, 10)) == [(2023, 12), (2024, 1)]
+    with pytest.raises(ValueError):
+        parse_month_range("2024-03..2024-01")
+    with pytest.raises(ValueError):
+        parse_month_range("2024-13")
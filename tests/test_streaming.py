@@ -0,0 +1,110 @@
+import hashlib
+
+import pytest
+import requests
+
+from de_pipeline.ingestion.batch import DownloadJob, download_many
+from de_pipeline.ingestion.streaming import stream_to_store
+from de_pipeline.storage.backends import LocalObjectStore
+
+BODY = bytes(range(256)) * 16
+
+
+class StreamResponse:
+    def __init__(self, body, status_code=200, fail_after=None):
+        self._body = body
+        self.status_code = status_code
+        self.headers = {"ETag": '"v1"'}
+        self._fail_after = fail_after
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code}", response=self)
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self._body), chunk_size):
+            if self._fail_after is not None and i >= self._fail_after:
+                raise requests.ConnectionError("connection reset")
+            yield self._body[i : i + chunk_size]
+
+
+class FlakyServer:
+    def __init__(self, body, fail_after=None, honour_ranges=True):
+        self.body = body
+        self.fail_after = fail_after
+        self.honour_ranges = honour_ranges
+        self.requests = []
+
+    def get(self, url, stream=True, timeout=60, headers=None):
+        byte_range = (headers or {}).get("Range")
+        self.requests.append(byte_range)
+        fail_after, self.fail_after = self.fail_after, None
+        if byte_range and self.honour_ranges:
+            start = int(byte_range.removeprefix("bytes=").rstrip("-"))
+            return StreamResponse(self.body[start:], status_code=206, fail_after=fail_after)
+        return StreamResponse(self.body, fail_after=fail_after)
+
+
+def test_stream_to_store_publishes_object_without_local_copy(tmp_path):
+    store = LocalObjectStore(tmp_path / "bucket")
+
+    meta = stream_to_store(
+        "http://x/f",
+        store,
+        "raw/green/f.parquet",
+        5,
+        1000,
+        session=FlakyServer(BODY, fail_after=2000),
+    )
+
+    assert (tmp_path / "bucket" / "raw/green/f.parquet").read_bytes() == BODY
+    assert meta["md5"] == hashlib.md5(BODY).hexdigest()
+    assert meta["bytes"] == len(BODY)
+    assert meta["path"] is None
+    assert meta["uri"].endswith("bucket/raw/green/f.parquet")
+    assert [p.name for p in (tmp_path / "bucket" / "raw/green").iterdir()] == ["f.parquet"]
+
+
+def test_stream_to_store_tees_local_copy(tmp_path):
+    store = LocalObjectStore(tmp_path / "bucket")
+    local = tmp_path / "raw" / "f.parquet"
+
+    meta = stream_to_store(
+        "http://x/f", store, "f.parquet", 5, 1000, session=FlakyServer(BODY), local_copy=local
+    )
+
+    assert local.read_bytes() == BODY
+    assert meta["path"] == str(local)
+
+
+def test_failed_stream_publishes_nothing(tmp_path):
+    store = LocalObjectStore(tmp_path / "bucket")
+    server = FlakyServer(BODY, fail_after=2000, honour_ranges=False)
+
+    with pytest.raises(OSError):
+        stream_to_store("http://x/f", store, "f.parquet", 5, 1000, session=server)
+
+    assert list((tmp_path / "bucket").iterdir()) == []
+
+
+def test_download_many_streams_jobs_to_store(tmp_path):
+    store = LocalObjectStore(tmp_path / "bucket")
+    job = DownloadJob(
+        url="http://x/f",
+        dest_path=tmp_path / "raw" / "f.parquet",
+        label="2024-05",
+        object_name="raw/ingestion_date=2024-06-01/f.parquet",
+    )
+
+    summary = download_many(
+        [job], 1, 5, 1000, session=FlakyServer(BODY), store=store, keep_local=False
+    )
+
+    assert summary["ok"][0]["uri"].endswith("raw/ingestion_date=2024-06-01/f.parquet")
+    assert not (tmp_path / "raw").exists()
@@ -0,0 +1,214 @@
+import base64
+import hashlib
+import threading
+
+import google_crc32c
+
+from de_pipeline.common.checksums import ChecksumIndex, file_checksums
+from de_pipeline.common.manifest import JsonManifest
+from de_pipeline.storage.uploader import iter_upload_jobs, upload_files
+
+
+def _b64(digest):
+    return base64.b64encode(digest).decode()
+
+
+class FakeBlob:
+    def __init__(self, bucket, name, data=None):
+        self.bucket = bucket
+        self.name = name
+        self.crc32c = self.md5_hash = None
+        if data is not None:
+            self.size = len(data)
+            self.crc32c = _b64(google_crc32c.Checksum(data).digest())
+            self.md5_hash = _b64(hashlib.md5(data).digest())
+
+    def _check_and_put(self, data):
+        # Comme GCS : un crc32c fourni qui ne correspond pas aux octets reçus est refusé.
+        if self.crc32c and self.crc32c != _b64(google_crc32c.Checksum(data).digest()):
+            raise ValueError("crc32c mismatch")
+        self.bucket.put(self.name, data)
+        # Propriétés renvoyées par GCS : calculées sur les octets reçus.
+        self.size = len(data)
+        self.crc32c = _b64(google_crc32c.Checksum(data).digest())
+
+    def upload_from_filename(self, filename):
+        with open(filename, "rb") as f:
+            self._check_and_put(f.read())
+
+    def upload_from_file(self, file_obj, size=None):
+        self._check_and_put(file_obj.read(size))
+
+    def compose(self, sources):
+        data = b"".join(self.bucket.objects[s.name] for s in sources)
+        self.bucket.put(self.name, data)
+        self.bucket.composed.append(self.name)
+        self.crc32c = _b64(google_crc32c.Checksum(data).digest())
+
+    def delete(self):
+        with self.bucket.lock:
+            del self.bucket.objects[self.name]
+
+
+class FakeBucket:
+    """In-memory stand-in for google.cloud.storage.Bucket."""
+
+    def __init__(self):
+        self.objects = {}
+        self.composed = []
+        self.uploaded = []
+        self.lock = threading.Lock()
+
+    def blob(self, name):
+        return FakeBlob(self, name)
+
+    def get_blob(self, name):
+        with self.lock:
+            data = self.objects.get(name)
+        return FakeBlob(self, name, data) if data is not None else None
+
+    def put(self, name, data):
+        with self.lock:
+            self.objects[name] = data
+            self.uploaded.append(name)
+
+
+def _make_tree(root):
+    for day, files in {
+        "ingestion_date=2024-06-01": {"green_tripdata_2024-04.parquet": b"old"},
+        "ingestion_date=2024-06-02": {
+            "green_tripdata_2024-05.parquet": bytes(range(256)) * 10,
+            "taxi_zone_lookup.csv": b"LocationID\n1\n",
+            "green_tripdata_2024-06.parquet.part": b"half",
+        },
+    }.items():
+        (root / day).mkdir(parents=True)
+        for name, data in files.items():
+            (root / day / name).write_bytes(data)
+
+
+def test_upload_limits_walk_to_partition_and_skips_temp_files(tmp_path):
+    _make_tree(tmp_path)
+
+    jobs = iter_upload_jobs(tmp_path, "raw/green_taxi", partition="ingestion_date=2024-06-02")
+
+    assert [j.blob_name for j in jobs] == [
+        "raw/green_taxi/ingestion_date=2024-06-02/green_tripdata_2024-05.parquet",
+        "raw/green_taxi/ingestion_date=2024-06-02/taxi_zone_lookup.csv",
+    ]
+    assert len(iter_upload_jobs(tmp_path, "raw/green_taxi")) == 3
+
+
+def test_large_files_are_uploaded_as_composed_chunks(tmp_path):
+    _make_tree(tmp_path)
+    bucket = FakeBucket()
+    jobs = iter_upload_jobs(tmp_path, "raw", partition="ingestion_date=2024-06-02")
+
+    summary = upload_files(bucket, jobs, max_workers=4, chunk_threshold=1000, part_size=300)
+
+    big = "raw/ingestion_date=2024-06-02/green_tripdata_2024-05.parquet"
+    assert bucket.composed == [big]
+    assert bucket.objects[big] == bytes(range(256)) * 10
+    assert not [name for name in bucket.objects if ".part-" in name]
+    assert summary["bytes"] == 2560 + len(b"LocationID\n1\n")
+    assert sorted(summary["ok"]) == sorted(bucket.objects)
+    assert summary["failed"] == []
+
+
+def test_failed_upload_does_not_block_others(tmp_path):
+    _make_tree(tmp_path)
+    bucket = FakeBucket()
+    original_put = bucket.put
+
+    def flaky_put(name, data):
+        if name.endswith(".csv"):
+            raise OSError("503 backend error")
+        original_put(name, data)
+
+    bucket.put = flaky_put
+    jobs = iter_upload_jobs(tmp_path, "raw", partition="ingestion_date=2024-06-02")
+
+    summary = upload_files(bucket, jobs, max_workers=2)
+
+    assert summary["ok"] == ["raw/ingestion_date=2024-06-02/green_tripdata_2024-05.parquet"]
+    assert len(summary["failed"]) == 1
+
+
+def test_missing_partition_yields_no_jobs(tmp_path):
+    assert iter_upload_jobs(tmp_path, "raw", partition="ingestion_date=2099-01-01") == []
+
+
+def test_rerun_only_moves_missing_bytes(tmp_path):
+    _make_tree(tmp_path)
+    bucket = FakeBucket()
+    checksums = ChecksumIndex(JsonManifest(tmp_path / "checksums.json"))
+    jobs = iter_upload_jobs(tmp_path, "raw", partition="ingestion_date=2024-06-02")
+    big = "raw/ingestion_date=2024-06-02/green_tripdata_2024-05.parquet"
+    original_put = bucket.put
+
+    def failing_part(name, data):
+        if name.endswith(".part-008"):
+            raise OSError("connection reset")
+        original_put(name, data)
+
+    bucket.put = failing_part
+    first = upload_files(bucket, jobs, chunk_threshold=1000, part_size=300, checksums=checksums)
+    bucket.put = original_put
+    bucket.uploaded.clear()
+    second = upload_files(bucket, jobs, chunk_threshold=1000, part_size=300, checksums=checksums)
+    bucket.uploaded.clear()
+    third = upload_files(bucket, jobs, chunk_threshold=1000, part_size=300, checksums=checksums)
+
+    assert [f["path"] for f in first["failed"]] == [str(tmp_path / big.removeprefix("raw/"))]
+    assert second["skipped"] == ["raw/ingestion_date=2024-06-02/taxi_zone_lookup.csv"]
+    assert second["ok"] == [big] and bucket.objects[big] == bytes(range(256)) * 10
+    assert third["ok"] == [] and len(third["skipped"]) == 2 and bucket.uploaded == []
+    # Seuls les octets envoyés comptent : la part manquante, puis rien.
+    assert (first["bytes"], second["bytes"], third["bytes"]) == (2400 + 13, 160, 0)
+    assert (second["skipped_bytes"], third["skipped_bytes"]) == (2400 + 13, 2560 + 13)
+    assert [f["bytes"] for f in second["files"]] == [160]
+
+
+def test_corrupted_upload_is_rejected(tmp_path, monkeypatch):
+    _make_tree(tmp_path)
+    bucket = FakeBucket()
+    checksums = ChecksumIndex(JsonManifest(tmp_path / "checksums.json"))
+    jobs = iter_upload_jobs(tmp_path, "raw", partition="ingestion_date=2024-06-02")
+    # Octet altéré en route : le crc32c envoyé avec l'objet ne correspond plus.
+    check_and_put = FakeBlob._check_and_put
+    monkeypatch.setattr(
+        FakeBlob, "_check_and_put", lambda blob, data: check_and_put(blob, data[:-1] + b"?")
+    )
+
+    summary = upload_files(bucket, jobs, checksums=checksums)
+
+    assert summary["ok"] == [] and bucket.objects == {}
+    assert len(summary["failed"]) == 2
+
+
+def test_parts_are_hashed_while_uploaded(tmp_path, monkeypatch):
+    from de_pipeline.storage import uploader
+
+    _make_tree(tmp_path)
+    bucket = FakeBucket()
+    checksums = ChecksumIndex(JsonManifest(tmp_path / "checksums.json"))
+    jobs = iter_upload_jobs(tmp_path, "raw", partition="ingestion_date=2024-06-02")
+    reread = []
+    monkeypatch.setattr(
+        uploader, "file_checksums", lambda *a, **kw: reread.append(kw) or file_checksums(*a, **kw)
+    )
+    check_and_put = FakeBlob._check_and_put
+
+    ok = upload_files(bucket, jobs, chunk_threshold=1000, part_size=300, checksums=checksums)
+    # Part altérée en route : le crc32c renvoyé par GCS ne correspond pas aux octets lus.
+    monkeypatch.setattr(
+        FakeBlob,
+        "_check_and_put",
+        lambda blob, data: check_and_put(blob, data[:-1] + b"?" if ".part-" in blob.name else data),
+    )
+    bucket = FakeBucket()
+    corrupted = upload_files(bucket, jobs, chunk_threshold=1000, part_size=300, checksums=checksums)
+
+    assert len(ok["ok"]) == 2 and reread == []
+    assert [f["path"] for f in corrupted["failed"]] == [str(jobs[0].path)]
+    assert not [name for name in bucket.objects if ".part-" in name]